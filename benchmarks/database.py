@@ -0,0 +1,97 @@
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from database import GraphDatabase, INSERT_RESULT, SELECT_RESULT, _result_from_row
+
+
+class ConnectPerCall:
+    # The access pattern GraphDatabase used before it kept a connection:
+    # a fresh sqlite3.connect per call with the default rollback journal.
+    def __init__(self, db_path):
+        self.db_path = db_path
+        GraphDatabase(db_path=db_path).close()
+        conn = sqlite3.connect(db_path)
+        conn.execute('PRAGMA journal_mode=DELETE')
+        conn.close()
+
+    def save_algorithm_result(self, graph_name, graph_data, algorithm_name, mst_weight, mst_edges,
+                              execution_time=None, profile=None):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(INSERT_RESULT, (graph_name, json.dumps(graph_data, ensure_ascii=False), algorithm_name,
+                                       mst_weight, json.dumps(mst_edges, ensure_ascii=False), execution_time,
+                                       json.dumps(profile) if profile is not None else None))
+        result_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+        return result_id
+
+    def get_result(self, result_id):
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute(SELECT_RESULT, (result_id,)).fetchone()
+        conn.close()
+        return _result_from_row(row) if row else None
+
+    def close(self):
+        pass
+
+
+def sample_result(vertex_count, seed):
+    rng = random.Random(seed)
+    points = [{'index': i, 'x': rng.uniform(0, 1000), 'y': rng.uniform(0, 1000)} for i in range(vertex_count)]
+    edges = [{'source_index': i - 1, 'dest_index': i, 'weight': rng.uniform(1, 100)} for i in range(1, vertex_count)]
+    return {
+        'graph_name': 'benchmark',
+        'graph_data': {'points': points, 'edges': edges},
+        'algorithm_name': 'Краскал',
+        'mst_weight': sum(edge['weight'] for edge in edges),
+        'mst_edges': edges,
+        'execution_time': 0.001,
+        'profile': {'spans_ns': {'mst': 1000000}, 'counters': {}},
+    }
+
+
+def measure(database, result, inserts, reads, seed):
+    start = time.perf_counter()
+    ids = [database.save_algorithm_result(**result) for _ in range(inserts)]
+    insert_seconds = time.perf_counter() - start
+
+    rng = random.Random(seed)
+    chosen = [rng.choice(ids) for _ in range(reads)]
+    start = time.perf_counter()
+    for result_id in chosen:
+        database.get_result(result_id)
+    read_seconds = time.perf_counter() - start
+    database.close()
+    return inserts / insert_seconds, read_seconds / reads
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GraphDatabase: соединение на каждый вызов против постоянного")
+    parser.add_argument("--inserts", type=int, default=1000)
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--vertices", type=int, default=50, help="размер сохраняемого графа")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--dir", help="каталог для временных баз (по умолчанию системный)")
+    args = parser.parse_args()
+
+    result = sample_result(args.vertices, args.seed)
+    variants = [
+        ("соединение на вызов", ConnectPerCall),
+        ("постоянное, WAL", lambda path: GraphDatabase(db_path=path)),
+    ]
+    print(f"{'вариант':<22} {'вставок/с':>12} {'чтение, мкс':>12}")
+    for name, factory in variants:
+        with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+            path = os.path.join(directory, 'results.db')
+            inserts_per_second, read_latency = measure(factory(path), result, args.inserts, args.reads, args.seed)
+        print(f"{name:<22} {inserts_per_second:12.0f} {read_latency * 1e6:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import random
+import time
+
+import graph as graph_module
+from graph import Graph
+
+
+def random_graph(vertex_count, edge_count, seed):
+    rng = random.Random(seed)
+    graph = Graph()
+    points = [graph.add_point(rng.uniform(0, 1000), rng.uniform(0, 1000)) for _ in range(vertex_count)]
+    for i in range(1, vertex_count):
+        graph.add_edge(points[rng.randrange(i)], points[i], rng.uniform(1, 1000))
+    while len(graph.edges) < edge_count:
+        source, dest = rng.sample(points, 2)
+        graph.add_edge(source, dest, rng.uniform(1, 1000))
+    return graph
+
+
+def best_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def eager_kruskal(graph):
+    threshold = graph_module.VECTORIZED_KRUSKAL_THRESHOLD
+    graph_module.VECTORIZED_KRUSKAL_THRESHOLD = float('inf')
+    try:
+        return graph.kruskal()
+    finally:
+        graph_module.VECTORIZED_KRUSKAL_THRESHOLD = threshold
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Filter-Kruskal против Graph.kruskal")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    cases = [
+        ("разреженный", 20000, 60000),
+        ("средний", 5000, 100000),
+        ("плотный", 1000, 300000),
+    ]
+    variants = [
+        ("kruskal (sorted)", eager_kruskal),
+        ("filter_kruskal", Graph.filter_kruskal),
+    ]
+    if graph_module.np is not None:
+        variants.append(("kruskal_indices (numpy)", lambda graph: graph.kruskal_indices()))
+
+    print(f"{'граф':<12} {'V':>7} {'E':>8}  " + "  ".join(f"{name:>24}" for name, _ in variants))
+    for name, vertex_count, edge_count in cases:
+        graph = random_graph(vertex_count, edge_count, args.seed)
+        expected = eager_kruskal(graph)
+        times = []
+        for variant_name, function in variants:
+            elapsed, result = best_time(lambda: function(graph), args.repeat)
+            if isinstance(result, list) and result != expected:
+                raise AssertionError(f"{variant_name}: результат отличается от Graph.kruskal")
+            times.append(elapsed)
+        print(f"{name:<12} {vertex_count:>7} {edge_count:>8}  " + "  ".join(f"{t * 1000:>21.1f} ms" for t in times))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import math
+import random
+
+from graph import Graph
+
+
+def _random_pairs(rng, vertex_count, edge_count, pairs=None):
+    seen = set() if pairs is None else {(min(a, b), max(a, b)) for a, b in pairs}
+    pairs = [] if pairs is None else list(pairs)
+    limit = vertex_count * (vertex_count - 1) // 2
+    edge_count = min(edge_count, limit)
+    while len(pairs) < edge_count:
+        a = rng.randrange(vertex_count)
+        b = rng.randrange(vertex_count)
+        key = (a, b) if a < b else (b, a)
+        if a != b and key not in seen:
+            seen.add(key)
+            pairs.append(key)
+    return pairs
+
+
+def _build(xs, ys, pairs, weights):
+    return Graph.from_arrays(xs, ys, [a for a, _ in pairs], [b for _, b in pairs], weights)
+
+
+def sparse_random(edge_count, seed=1):
+    rng = random.Random(seed)
+    vertex_count = max(2, edge_count // 4)
+    backbone = [(rng.randrange(i), i) for i in range(1, vertex_count)]
+    pairs = _random_pairs(rng, vertex_count, edge_count, backbone)
+    return _build([rng.uniform(0, 1000) for _ in range(vertex_count)],
+                  [rng.uniform(0, 1000) for _ in range(vertex_count)],
+                  pairs, [rng.uniform(1, 1000) for _ in pairs])
+
+
+def dense_random(edge_count, seed=1):
+    rng = random.Random(seed)
+    vertex_count = max(2, math.ceil(math.sqrt(4 * edge_count)))
+    pairs = _random_pairs(rng, vertex_count, edge_count)
+    return _build([rng.uniform(0, 1000) for _ in range(vertex_count)],
+                  [rng.uniform(0, 1000) for _ in range(vertex_count)],
+                  pairs, [rng.uniform(1, 1000) for _ in pairs])
+
+
+def grid(edge_count, seed=1):
+    rng = random.Random(seed)
+    side = max(2, round((1 + math.sqrt(1 + 2 * edge_count)) / 2))
+    pairs = []
+    for row in range(side):
+        for column in range(side):
+            vertex = row * side + column
+            if column + 1 < side:
+                pairs.append((vertex, vertex + 1))
+            if row + 1 < side:
+                pairs.append((vertex, vertex + side))
+    return _build([float(vertex % side) for vertex in range(side * side)],
+                  [float(vertex // side) for vertex in range(side * side)],
+                  pairs, [rng.uniform(1, 1000) for _ in pairs])
+
+
+def geometric(edge_count, seed=1):
+    # Random points in the unit square joined when closer than a radius
+    # chosen for an average degree of about eight; weights are distances.
+    rng = random.Random(seed)
+    vertex_count = max(2, edge_count // 4)
+    radius = math.sqrt(8 / (math.pi * vertex_count))
+    xs = [rng.random() for _ in range(vertex_count)]
+    ys = [rng.random() for _ in range(vertex_count)]
+
+    cells = {}
+    for vertex in range(vertex_count):
+        cells.setdefault((int(xs[vertex] / radius), int(ys[vertex] / radius)), []).append(vertex)
+
+    pairs = []
+    weights = []
+    for (cell_x, cell_y), members in cells.items():
+        for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+            others = cells.get((cell_x + dx, cell_y + dy))
+            if others is None:
+                continue
+            for a in members:
+                for b in others:
+                    if (dx, dy) == (0, 0) and b <= a:
+                        continue
+                    distance = math.hypot(xs[a] - xs[b], ys[a] - ys[b])
+                    if distance <= radius:
+                        pairs.append((a, b))
+                        weights.append(distance)
+    return _build(xs, ys, pairs, weights)
+
+
+def long_chain(edge_count, seed=1):
+    # A path with increasing weights followed by heavy chords: Kruskal
+    # grows one deep component and every chord is a rejected find across
+    # it, Prim walks the whole chain through the heap one step at a time.
+    rng = random.Random(seed)
+    vertex_count = max(2, edge_count // 2 + 1)
+    pairs = [(i, i + 1) for i in range(vertex_count - 1)]
+    weights = [float(i + 1) for i in range(vertex_count - 1)]
+    pairs = _random_pairs(rng, vertex_count, edge_count, pairs)
+    weights.extend(rng.uniform(vertex_count, 2 * vertex_count) for _ in range(len(pairs) - len(weights)))
+    return _build([float(i) for i in range(vertex_count)], [0.0] * vertex_count, pairs, weights)
+
+
+GENERATORS = {
+    'sparse': sparse_random,
+    'dense': dense_random,
+    'grid': grid,
+    'geometric': geometric,
+    'long_chain': long_chain,
+}
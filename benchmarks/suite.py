@@ -0,0 +1,205 @@
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks.generators import GENERATORS
+
+ALGORITHMS = {
+    'prim': lambda graph: graph.prim(),
+    'kruskal': lambda graph: graph.kruskal(),
+    'filter_kruskal': lambda graph: graph.filter_kruskal(),
+    'boruvka': lambda graph: graph.boruvka(),
+}
+SIZES = [10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+# Below this the timer and scheduler noise is larger than any regression.
+MIN_COMPARABLE_SECONDS = 0.02
+
+
+def reset_state(graph):
+    # Connected components found by one run (Filter-Kruskal computes them)
+    # would give every later run on the graph an exact forest size for free.
+    graph._components = None
+
+
+def measure_time(function, graph, repeat):
+    times = []
+    for _ in range(repeat):
+        reset_state(graph)
+        gc.collect()
+        start = time.perf_counter()
+        function(graph)
+        times.append(time.perf_counter() - start)
+    return sorted(times)
+
+
+def measure_peak_memory(function, graph):
+    reset_state(graph)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function(graph)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_suite(families, algorithms, sizes, repeat=5, seed=1, memory=True, log=None):
+    results = {}
+    for family in families:
+        for size in sizes:
+            graph = GENERATORS[family](size, seed)
+            for algorithm in algorithms:
+                function = ALGORITHMS[algorithm]
+                times = measure_time(function, graph, repeat)
+                result = {
+                    'vertices': len(graph.points),
+                    'edges': len(graph.edges),
+                    'seconds': statistics.median(times),
+                    'best_seconds': times[0],
+                }
+                if memory:
+                    result['peak_bytes'] = measure_peak_memory(function, graph)
+                results[f'{family}/{size}/{algorithm}'] = result
+                if log is not None:
+                    log(f"{family:<10} {size:>8} {algorithm:<15} {result['seconds'] * 1000:10.2f} ms")
+            del graph
+    return results
+
+
+def scaling_tables(results, families, algorithms, sizes):
+    lines = []
+    for family in families:
+        lines.append(f"\n{family}")
+        header = f"{'E':>8} {'V':>8}"
+        for algorithm in algorithms:
+            header += f" | {algorithm:>15} {'MB':>7} {'k':>5}"
+        lines.append(header)
+        lines.append('-' * len(header))
+
+        previous = {}
+        for size in sizes:
+            row_results = [results.get(f'{family}/{size}/{algorithm}') for algorithm in algorithms]
+            known = [result for result in row_results if result is not None]
+            if not known:
+                continue
+
+            line = f"{known[0]['edges']:>8} {known[0]['vertices']:>8}"
+            for algorithm, result in zip(algorithms, row_results):
+                if result is None:
+                    line += f" | {'':>15} {'':>7} {'':>5}"
+                    continue
+
+                # k is the empirical exponent in t ~ E^k against the previous size.
+                exponent = ''
+                before = previous.get(algorithm)
+                if before is not None and before['seconds'] > 0 and result['edges'] > before['edges']:
+                    exponent = f"{math.log(result['seconds'] / before['seconds']) / math.log(result['edges'] / before['edges']):.2f}"
+                memory = f"{result['peak_bytes'] / 2 ** 20:.1f}" if 'peak_bytes' in result else '-'
+                line += f" | {result['seconds'] * 1000:12.2f} ms {memory:>7} {exponent:>5}"
+                previous[algorithm] = result
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+def find_regressions(results, baseline, threshold):
+    regressions = []
+    for key, result in results.items():
+        expected = baseline.get(key)
+        if expected is None:
+            continue
+
+        # Noise only ever slows a run down, so a slowdown counts when even
+        # the fastest run is slower than the baseline median.
+        seconds = result.get('best_seconds', result['seconds'])
+        if expected['seconds'] >= MIN_COMPARABLE_SECONDS and seconds > expected['seconds'] * (1 + threshold):
+            regressions.append((key, 'seconds', expected['seconds'], seconds))
+        if 'peak_bytes' in result and 'peak_bytes' in expected \
+                and result['peak_bytes'] > expected['peak_bytes'] * (1 + threshold):
+            regressions.append((key, 'peak_bytes', expected['peak_bytes'], result['peak_bytes']))
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(path, results, args):
+    baseline = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def parse_list(choices):
+    def parse(value):
+        items = [item.strip() for item in value.split(',') if item.strip()]
+        unknown = [item for item in items if item not in choices]
+        if unknown:
+            raise argparse.ArgumentTypeError(f"неизвестно: {', '.join(unknown)}; доступны: {', '.join(choices)}")
+        return items
+    return parse
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Масштабирование алгоритмов MST на синтетических графах")
+    parser.add_argument("--families", type=parse_list(GENERATORS), default=list(GENERATORS))
+    parser.add_argument("--algorithms", type=parse_list(ALGORITHMS), default=list(ALGORITHMS))
+    parser.add_argument("--sizes", type=lambda value: [int(float(item)) for item in value.split(',')], default=SIZES,
+                        help="числа рёбер через запятую, например 1e2,1e4")
+    parser.add_argument("--max-edges", type=lambda value: int(float(value)),
+                        help="пропустить размеры больше этого")
+    parser.add_argument("--repeat", type=int, default=5, help="число прогонов, сравнивается медиана")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-memory", dest='memory', action='store_false',
+                        help="не измерять пиковую память (tracemalloc замедляет прогон)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action='store_true', help="перезаписать базовые результаты")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="допустимое ухудшение относительно базы (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    sizes = [size for size in args.sizes if args.max_edges is None or size <= args.max_edges]
+    results = run_suite(args.families, args.algorithms, sizes, args.repeat, args.seed, args.memory,
+                        log=lambda message: print(message, file=sys.stderr, flush=True))
+    print(scaling_tables(results, args.families, args.algorithms, sizes))
+
+    if args.update_baseline:
+        save_baseline(args.baseline, results, args)
+        print(f"\nБазовые результаты записаны в {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nНет базовых результатов ({args.baseline}), сравнение пропущено")
+        return 0
+
+    regressions = find_regressions(results, load_baseline(args.baseline)['results'], args.threshold)
+    if not regressions:
+        print(f"\nРегрессий больше {args.threshold:.0%} нет")
+        return 0
+
+    print(f"\nРегрессии больше {args.threshold:.0%}:")
+    for key, metric, expected, actual in regressions:
+        print(f"  {key:<32} {metric:<10} {expected:>14.6g} -> {actual:<14.6g} ({actual / expected - 1:+.0%})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
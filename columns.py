@@ -0,0 +1,279 @@
+from array import array
+from weakref import WeakValueDictionary
+
+
+class PointColumns:
+    # owner is the Graph whose points live here, so that writes through a
+    # Point go through Graph.move_point and its journal. incidence[slot]
+    # holds the slots of the point's edges in the linked EdgeColumns; a
+    # point outside any graph keeps its Edge objects there instead.
+    __slots__ = ('xs', 'ys', 'items', 'incidence', 'edges', 'owner')
+
+    def __init__(self, owner=None):
+        self.xs = array('d')
+        self.ys = array('d')
+        self.items = []
+        self.incidence = []
+        self.edges = None
+        self.owner = owner
+
+    def __len__(self):
+        return len(self.xs)
+
+    def append(self, x, y, item):
+        self.xs.append(x)
+        self.ys.append(y)
+        self.items.append(item)
+        self.incidence.append([] if self.edges is None else array('q'))
+        return len(self.xs) - 1
+
+    def swap_remove(self, slot):
+        # The point's edges must be removed first. The last point takes the
+        # freed slot and is returned, with its edges relinked to it.
+        last = len(self.xs) - 1
+        moved = None
+        if slot != last:
+            self.xs[slot] = self.xs[last]
+            self.ys[slot] = self.ys[last]
+            moved = self.items[slot] = self.items[last]
+            moved._slot = slot
+            self.incidence[slot] = self.incidence[last]
+            if self.edges is not None:
+                self.edges.repoint(self.incidence[slot], last, slot)
+        self.xs.pop()
+        self.ys.pop()
+        self.items.pop()
+        self.incidence.pop()
+        return moved
+
+
+class EdgeColumns:
+    # src and dst index points, the Point objects by slot. Linked to the
+    # graph's PointColumns, the edges keep their positions in the
+    # endpoints' incidence arrays (src_pos, dst_pos), so unlinking one is a
+    # swap with the last entry, and an open-addressing index from the
+    # unordered endpoint pair to the slot (table, -1 for a free bucket)
+    # whose keys are read back from src and dst. facades holds the Edge
+    # objects currently alive, by slot; there are no others.
+    __slots__ = ('src', 'dst', 'weights', 'src_pos', 'dst_pos', 'table', 'points', 'incidence', 'facades',
+                 'owner')
+
+    def __init__(self, points=None, owner=None):
+        self.src = array('q')
+        self.dst = array('q')
+        self.weights = array('d')
+        self.src_pos = array('q')
+        self.dst_pos = array('q')
+        self.table = array('q')
+        self.points = []
+        self.incidence = None
+        self.facades = None
+        self.owner = owner
+        if points is not None:
+            points.edges = self
+            self.points = points.items
+            self.incidence = points.incidence
+            self.facades = WeakValueDictionary()
+
+    def __len__(self):
+        return len(self.weights)
+
+    def append(self, src, dst, weight):
+        # For an edge outside any graph: no incidence and no index.
+        self.src.append(src)
+        self.dst.append(dst)
+        self.weights.append(weight)
+        return len(self.weights) - 1
+
+    def add(self, src, dst, weight):
+        # Returns the new edge's slot, or -1 if src and dst are already
+        # joined.
+        slot = len(self.weights)
+        if 3 * (slot + 1) > 2 * len(self.table):
+            self._grow()
+        table = self.table
+        mask = len(table) - 1
+        sources = self.src
+        dests = self.dst
+        bucket = hash((src, dst) if src < dst else (dst, src)) & mask
+        while True:
+            other = table[bucket]
+            if other < 0:
+                break
+            if (sources[other] == src and dests[other] == dst) or (sources[other] == dst and dests[other] == src):
+                return -1
+            bucket = (bucket + 1) & mask
+
+        table[bucket] = slot
+        sources.append(src)
+        dests.append(dst)
+        self.weights.append(weight)
+        incident = self.incidence[src]
+        self.src_pos.append(len(incident))
+        incident.append(slot)
+        if dst == src:
+            self.dst_pos.append(self.src_pos[slot])
+        else:
+            incident = self.incidence[dst]
+            self.dst_pos.append(len(incident))
+            incident.append(slot)
+        return slot
+
+    def add_many(self, edges, point_count):
+        # add() for each (src, dst, weight), inlined; stops with IndexError
+        # at the first endpoint outside range(point_count), keeping the
+        # edges added before it.
+        sources = self.src
+        dests = self.dst
+        weights = self.weights
+        src_pos = self.src_pos
+        dst_pos = self.dst_pos
+        incidence = self.incidence
+        table = self.table
+        mask = len(table) - 1
+        limit = 2 * len(table)
+        for src, dst, weight in edges:
+            if not (0 <= src < point_count and 0 <= dst < point_count):
+                raise IndexError(f"Ребро {src}-{dst} ссылается на несуществующую вершину")
+            slot = len(weights)
+            if 3 * (slot + 1) > limit:
+                self._grow()
+                table = self.table
+                mask = len(table) - 1
+                limit = 2 * len(table)
+            bucket = hash((src, dst) if src < dst else (dst, src)) & mask
+            while True:
+                other = table[bucket]
+                if other < 0:
+                    break
+                if (sources[other] == src and dests[other] == dst) or (sources[other] == dst and dests[other] == src):
+                    break
+                bucket = (bucket + 1) & mask
+            if other >= 0:
+                continue
+
+            table[bucket] = slot
+            sources.append(src)
+            dests.append(dst)
+            weights.append(float(weight))
+            incident = incidence[src]
+            src_pos.append(len(incident))
+            incident.append(slot)
+            if dst == src:
+                dst_pos.append(src_pos[slot])
+            else:
+                incident = incidence[dst]
+                dst_pos.append(len(incident))
+                incident.append(slot)
+
+    def find(self, src, dst):
+        table = self.table
+        if not table:
+            return -1
+        mask = len(table) - 1
+        bucket = hash((src, dst) if src < dst else (dst, src)) & mask
+        sources = self.src
+        dests = self.dst
+        while True:
+            slot = table[bucket]
+            if slot < 0:
+                return -1
+            if (sources[slot] == src and dests[slot] == dst) or (sources[slot] == dst and dests[slot] == src):
+                return slot
+            bucket = (bucket + 1) & mask
+
+    def swap_remove(self, slot):
+        # The last edge takes the freed slot, and its Edge, if alive, too.
+        self._unindex(slot)
+        self._unlink(self.src[slot], self.src_pos[slot])
+        if self.dst[slot] != self.src[slot]:
+            self._unlink(self.dst[slot], self.dst_pos[slot])
+
+        facades = self.facades
+        facades.pop(slot, None)
+        last = len(self.weights) - 1
+        columns = (self.src, self.dst, self.weights, self.src_pos, self.dst_pos)
+        if slot != last:
+            self.table[self._bucket(last)] = slot
+            for column in columns:
+                column[slot] = column[last]
+            self.incidence[self.src[slot]][self.src_pos[slot]] = slot
+            self.incidence[self.dst[slot]][self.dst_pos[slot]] = slot
+            moved = facades.pop(last, None)
+            if moved is not None:
+                moved._slot = slot
+                facades[slot] = moved
+        for column in columns:
+            column.pop()
+
+    def repoint(self, slots, old, new):
+        # The edges in slots move from point slot old to new; their index
+        # entries are keyed by the endpoints, so they are placed again.
+        src = self.src
+        dst = self.dst
+        for slot in slots:
+            self._unindex(slot)
+            if src[slot] == old:
+                src[slot] = new
+            if dst[slot] == old:
+                dst[slot] = new
+            self._place(slot)
+
+    def _unlink(self, point, position):
+        incident = self.incidence[point]
+        last = incident.pop()
+        if position < len(incident):
+            incident[position] = last
+            if self.src[last] == point:
+                self.src_pos[last] = position
+            if self.dst[last] == point:
+                self.dst_pos[last] = position
+
+    def _home(self, slot, mask):
+        src = self.src[slot]
+        dst = self.dst[slot]
+        return hash((src, dst) if src < dst else (dst, src)) & mask
+
+    def _bucket(self, slot):
+        table = self.table
+        mask = len(table) - 1
+        bucket = self._home(slot, mask)
+        while table[bucket] != slot:
+            bucket = (bucket + 1) & mask
+        return bucket
+
+    def _grow(self):
+        # Doubles the table, which is kept at most two thirds full.
+        size = max(8, 2 * len(self.table))
+        table = array('q', [-1]) * size
+        mask = size - 1
+        for slot, (src, dst) in enumerate(zip(self.src, self.dst)):
+            bucket = hash((src, dst) if src < dst else (dst, src)) & mask
+            while table[bucket] >= 0:
+                bucket = (bucket + 1) & mask
+            table[bucket] = slot
+        self.table = table
+
+    def _place(self, slot):
+        table = self.table
+        mask = len(table) - 1
+        bucket = self._home(slot, mask)
+        while table[bucket] >= 0:
+            bucket = (bucket + 1) & mask
+        table[bucket] = slot
+
+    def _unindex(self, slot):
+        # Backward-shift deletion: later entries of the probe run move into
+        # the hole unless that would put them before their home bucket.
+        table = self.table
+        mask = len(table) - 1
+        hole = bucket = self._bucket(slot)
+        while True:
+            bucket = (bucket + 1) & mask
+            other = table[bucket]
+            if other < 0:
+                break
+            if (bucket - self._home(other, mask)) & mask >= (bucket - hole) & mask:
+                table[hole] = other
+                hole = bucket
+        table[hole] = -1
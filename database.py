@@ -1,14 +1,54 @@
 import sqlite3
 import json
+import threading
 import requests
 from datetime import datetime
 from typing import List, Dict, Optional
 
+# Applied once to the long-lived connection. WAL lets readers run beside a
+# writer, and with synchronous=NORMAL a commit no longer waits for fsync
+# (the last transactions may be lost on power failure, never corrupted).
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-16384',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA temp_store=MEMORY',
+)
+# The statements are module constants, so every call hits the connection's
+# statement cache and SQLite prepares each of them only once.
+INSERT_RESULT = '''
+    INSERT INTO algorithm_results
+    (graph_name, graph_data, algorithm_name, mst_weight, mst_edges, execution_time, profile)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+SELECT_ALL_RESULTS = 'SELECT * FROM algorithm_results ORDER BY timestamp DESC'
+SELECT_RESULT = 'SELECT * FROM algorithm_results WHERE id = ?'
+DELETE_RESULT = 'DELETE FROM algorithm_results WHERE id = ?'
+DELETE_ALL_RESULTS = 'DELETE FROM algorithm_results'
+
+
+def _result_from_row(row) -> dict:
+    return {
+        'id': row[0],
+        'graph_name': row[1],
+        'graph_data': json.loads(row[2]),
+        'algorithm_name': row[3],
+        'mst_weight': row[4],
+        'mst_edges': json.loads(row[5]),
+        'execution_time': row[6],
+        'timestamp': row[7],
+        'profile': json.loads(row[8]) if row[8] else None
+    }
+
+
 class GraphDatabase:
     def __init__(self, db_path="data/algorithm_results.db", use_docker_api=False, api_url="http://localhost:5000"):
         self.use_docker_api = use_docker_api
         self.api_url = api_url
         self.db_path = db_path
+        self.conn = None
+        self.lock = threading.Lock()
         
         if not self.use_docker_api:
             self.init_database()
@@ -25,8 +65,24 @@ class GraphDatabase:
         except requests.exceptions.RequestException as e:
             raise Exception(f"Не удалось подключиться к Docker Database API: {e}")
     
+    def _connect(self):
+        # One connection for the object's lifetime, shared between threads
+        # under self.lock; sqlite3 connections are not safe to use
+        # concurrently on their own.
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=32)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+    
     def init_database(self):
-        conn = sqlite3.connect(self.db_path)
+        self.conn = self._connect()
+        conn = self.conn
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -38,16 +94,21 @@ class GraphDatabase:
                 mst_weight REAL NOT NULL,
                 mst_edges TEXT NOT NULL,
                 execution_time REAL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                profile TEXT
             )
         ''')
         
+        columns = [row[1] for row in cursor.execute('PRAGMA table_info(algorithm_results)')]
+        if 'profile' not in columns:
+            cursor.execute('ALTER TABLE algorithm_results ADD COLUMN profile TEXT')
+        
         conn.commit()
-        conn.close()
     
     def save_algorithm_result(self, graph_name: str, graph_data: dict, 
                             algorithm_name: str, mst_weight: float, 
-                            mst_edges: list, execution_time: float = None) -> int:
+                            mst_edges: list, execution_time: float = None,
+                            profile: dict = None) -> int:
         if self.use_docker_api:
             response = requests.post(f"{self.api_url}/results", json={
                 'graph_name': graph_name,
@@ -55,7 +116,8 @@ class GraphDatabase:
                 'algorithm_name': algorithm_name,
                 'mst_weight': mst_weight,
                 'mst_edges': mst_edges,
-                'execution_time': execution_time
+                'execution_time': execution_time,
+                'profile': profile
             })
             
             if response.status_code == 200:
@@ -63,27 +125,17 @@ class GraphDatabase:
             else:
                 raise Exception(f"API error: {response.json().get('error', 'Unknown error')}")
         else:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO algorithm_results 
-                (graph_name, graph_data, algorithm_name, mst_weight, mst_edges, execution_time)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
+            values = (
                 graph_name,
                 json.dumps(graph_data, ensure_ascii=False),
                 algorithm_name,
                 mst_weight,
                 json.dumps(mst_edges, ensure_ascii=False),
-                execution_time
-            ))
-            
-            result_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
-            
-            return result_id
+                execution_time,
+                json.dumps(profile) if profile is not None else None
+            )
+            with self.lock, self.conn:
+                return self.conn.execute(INSERT_RESULT, values).lastrowid
     
     def get_all_results(self) -> List[dict]:
         if self.use_docker_api:
@@ -93,26 +145,9 @@ class GraphDatabase:
             else:
                 raise Exception(f"API error: {response.json().get('error', 'Unknown error')}")
         else:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT * FROM algorithm_results ORDER BY timestamp DESC')
-            rows = cursor.fetchall()
-            conn.close()
-            
-            results = []
-            for row in rows:
-                results.append({
-                    'id': row[0],
-                    'graph_name': row[1],
-                    'graph_data': json.loads(row[2]),
-                    'algorithm_name': row[3],
-                    'mst_weight': row[4],
-                    'mst_edges': json.loads(row[5]),
-                    'execution_time': row[6],
-                    'timestamp': row[7]
-                })
-            return results
+            with self.lock:
+                rows = self.conn.execute(SELECT_ALL_RESULTS).fetchall()
+            return [_result_from_row(row) for row in rows]
     
     def get_result(self, result_id: int) -> Optional[dict]:
         if self.use_docker_api:
@@ -124,24 +159,11 @@ class GraphDatabase:
             else:
                 raise Exception(f"API error: {response.json().get('error', 'Unknown error')}")
         else:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT * FROM algorithm_results WHERE id = ?', (result_id,))
-            row = cursor.fetchone()
-            conn.close()
+            with self.lock:
+                row = self.conn.execute(SELECT_RESULT, (result_id,)).fetchone()
             
             if row:
-                return {
-                    'id': row[0],
-                    'graph_name': row[1],
-                    'graph_data': json.loads(row[2]),
-                    'algorithm_name': row[3],
-                    'mst_weight': row[4],
-                    'mst_edges': json.loads(row[5]),
-                    'execution_time': row[6],
-                    'timestamp': row[7]
-                }
+                return _result_from_row(row)
             return None
     
     def delete_result(self, result_id: int):
@@ -150,12 +172,8 @@ class GraphDatabase:
             if response.status_code != 200:
                 raise Exception(f"API error: {response.json().get('error', 'Unknown error')}")
         else:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('DELETE FROM algorithm_results WHERE id = ?', (result_id,))
-            conn.commit()
-            conn.close()
+            with self.lock, self.conn:
+                self.conn.execute(DELETE_RESULT, (result_id,))
     
     def clear_all_results(self):
         if self.use_docker_api:
@@ -163,12 +181,8 @@ class GraphDatabase:
             if response.status_code != 200:
                 raise Exception(f"API error: {response.json().get('error', 'Unknown error')}")
         else:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('DELETE FROM algorithm_results')
-            conn.commit()
-            conn.close()
+            with self.lock, self.conn:
+                self.conn.execute(DELETE_ALL_RESULTS)
     
     def get_database_info(self) -> dict:
         if self.use_docker_api:
@@ -20,10 +20,15 @@ def init_db():
             mst_weight REAL NOT NULL,
             mst_edges TEXT NOT NULL,
             execution_time REAL,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            profile TEXT
         )
     ''')
     
+    columns = [row[1] for row in cursor.execute('PRAGMA table_info(algorithm_results)')]
+    if 'profile' not in columns:
+        cursor.execute('ALTER TABLE algorithm_results ADD COLUMN profile TEXT')
+    
     conn.commit()
     conn.close()
 
@@ -41,15 +46,16 @@ def save_result():
         
         cursor.execute('''
             INSERT INTO algorithm_results 
-            (graph_name, graph_data, algorithm_name, mst_weight, mst_edges, execution_time)
-            VALUES (?, ?, ?, ?, ?, ?)
+            (graph_name, graph_data, algorithm_name, mst_weight, mst_edges, execution_time, profile)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
         ''', (
             data['graph_name'],
             json.dumps(data['graph_data']),
             data['algorithm_name'],
             data['mst_weight'],
             json.dumps(data['mst_edges']),
-            data.get('execution_time')
+            data.get('execution_time'),
+            json.dumps(data['profile']) if data.get('profile') is not None else None
         ))
         
         result_id = cursor.lastrowid
@@ -81,7 +87,8 @@ def get_all_results():
                 'mst_weight': row[4],
                 'mst_edges': json.loads(row[5]),
                 'execution_time': row[6],
-                'timestamp': row[7]
+                'timestamp': row[7],
+                'profile': json.loads(row[8]) if row[8] else None
             })
         
         return jsonify(results)
@@ -108,7 +115,8 @@ def get_result(result_id):
                 'mst_weight': row[4],
                 'mst_edges': json.loads(row[5]),
                 'execution_time': row[6],
-                'timestamp': row[7]
+                'timestamp': row[7],
+                'profile': json.loads(row[8]) if row[8] else None
             })
         else:
             return jsonify({'error': 'Result not found'}), 404
@@ -0,0 +1,92 @@
+from array import array
+
+
+class DisjointSet:
+    __slots__ = ('parent', 'rank', 'count')
+
+    def __init__(self, size=0):
+        self.parent = array('q', range(size))
+        self.rank = array('B', bytes(size))
+        self.count = size
+
+    def __len__(self):
+        return len(self.parent)
+
+    def add(self):
+        item = len(self.parent)
+        self.parent.append(item)
+        self.rank.append(0)
+        self.count += 1
+        return item
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, item1, item2):
+        root1 = self.find(item1)
+        root2 = self.find(item2)
+        if root1 == root2:
+            return False
+
+        rank = self.rank
+        if rank[root1] < rank[root2]:
+            root1, root2 = root2, root1
+        self.parent[root2] = root1
+        if rank[root1] == rank[root2]:
+            rank[root1] += 1
+        self.count -= 1
+        return True
+
+    def connected(self, item1, item2):
+        return self.find(item1) == self.find(item2)
+
+class KruskalForest:
+    # Union-find for one pass of Kruskal over edges in weight order: a
+    # plain list of parents, which indexes faster than an array, path
+    # halving and no rank, which keeps it a valid forest while saving the
+    # rank lookups that cost more than they shorten the paths here.
+    # compact keeps the parents in an array instead, 8 bytes per vertex
+    # rather than about 40, for callers whose memory is bounded.
+    __slots__ = ('parent', 'count')
+
+    def __init__(self, size=0, compact=False):
+        self.parent = array('q', range(size)) if compact else list(range(size))
+        self.count = size
+
+    def __len__(self):
+        return len(self.parent)
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = item = parent[parent[item]]
+        return item
+
+    def connected(self, item1, item2):
+        return self.find(item1) == self.find(item2)
+
+    def scan(self, edges, done=1):
+        # edges yields (key, source, dest); yields (key, accepted) for each
+        # edge examined until only done trees are left.
+        parent = self.parent
+        if self.count <= done:
+            return
+
+        for key, root1, root2 in edges:
+            while parent[root1] != root1:
+                parent[root1] = root1 = parent[parent[root1]]
+            while parent[root2] != root2:
+                parent[root2] = root2 = parent[parent[root2]]
+            if root1 == root2:
+                yield key, False
+                continue
+
+            parent[root2] = root1
+            self.count -= 1
+            yield key, True
+            if self.count == done:
+                return
@@ -0,0 +1,152 @@
+from collections import deque
+
+from journal import EDGE_ADDED, EDGE_REMOVED, WEIGHT_CHANGED
+
+
+class DynamicMST:
+    def __init__(self, graph):
+        self.graph = graph
+        self.rebuild()
+
+    def rebuild(self):
+        self._tree = {}
+        self._tree_neighbors = {}
+        for edge in self.graph.kruskal():
+            self._link(edge)
+
+    @property
+    def edges(self):
+        return list(self._tree)
+
+    @property
+    def total_weight(self):
+        return sum(edge.weight for edge in self._tree)
+
+    def __contains__(self, edge):
+        return edge in self._tree
+
+    def apply(self, events):
+        # A single event is applied incrementally. A batch is replayed
+        # against the graph's final state, where intermediate steps are
+        # no longer observable, so it is cheaper and safer to rebuild.
+        if len(events) == 1:
+            event = events[0]
+            if event.kind == EDGE_ADDED:
+                return self.edge_added(event.item)
+            if event.kind == EDGE_REMOVED:
+                return self.edge_removed(event.item)
+            if event.kind == WEIGHT_CHANGED:
+                return self.weight_changed(event.item, event.old)
+            if event.item is not None:
+                return [], []
+
+        old_tree = set(self._tree)
+        self.rebuild()
+        return [edge for edge in self._tree if edge not in old_tree], list(old_tree.difference(self._tree))
+
+    def edge_added(self, edge):
+        return self._offer(edge)
+
+    def edge_removed(self, edge):
+        if edge not in self._tree:
+            return [], []
+
+        self._unlink(edge)
+        replacement = self._cheapest_across_cut(edge.source, edge.dest)
+        if replacement is None:
+            return [], [edge]
+
+        self._link(replacement)
+        return [replacement], [edge]
+
+    def weight_changed(self, edge, old_weight):
+        if edge.weight == old_weight:
+            return [], []
+
+        if edge in self._tree:
+            if edge.weight < old_weight:
+                return [], []
+
+            self._unlink(edge)
+            replacement = self._cheapest_across_cut(edge.source, edge.dest)
+            self._link(replacement)
+            if replacement is edge:
+                return [], []
+            return [replacement], [edge]
+
+        if edge.weight > old_weight:
+            return [], []
+        return self._offer(edge)
+
+    def _offer(self, edge):
+        if edge.source is edge.dest:
+            return [], []
+
+        path = self._tree_path(edge.source, edge.dest)
+        if path is None:
+            self._link(edge)
+            return [edge], []
+
+        heaviest = max(path, key=lambda path_edge: path_edge.weight)
+        if heaviest.weight <= edge.weight:
+            return [], []
+
+        self._unlink(heaviest)
+        self._link(edge)
+        return [edge], [heaviest]
+
+    def _link(self, edge):
+        self._tree[edge] = None
+        self._tree_neighbors.setdefault(edge.source, {})[edge.dest] = edge
+        self._tree_neighbors.setdefault(edge.dest, {})[edge.source] = edge
+
+    def _unlink(self, edge):
+        del self._tree[edge]
+        for point, other in ((edge.source, edge.dest), (edge.dest, edge.source)):
+            neighbors = self._tree_neighbors[point]
+            del neighbors[other]
+            if not neighbors:
+                del self._tree_neighbors[point]
+
+    def _tree_path(self, start, goal):
+        came_from = {start: None}
+        queue = deque([start])
+        while queue:
+            point = queue.popleft()
+            if point is goal:
+                path = []
+                while came_from[point] is not None:
+                    edge = came_from[point]
+                    path.append(edge)
+                    point = edge.source if edge.dest is point else edge.dest
+                return path
+
+            for other, edge in self._tree_neighbors.get(point, {}).items():
+                if other not in came_from:
+                    came_from[other] = edge
+                    queue.append(other)
+        return None
+
+    def _cheapest_across_cut(self, point1, point2):
+        side = self._smaller_side(point1, point2)
+        best = None
+        for point in side:
+            for other, edge in point.neighbors():
+                if other not in side and (best is None or edge.weight < best.weight):
+                    best = edge
+        return best
+
+    def _smaller_side(self, point1, point2):
+        # Both trees are explored in lockstep so that the cost is bounded
+        # by the smaller half of the split component.
+        searches = [({point1}, deque([point1])), ({point2}, deque([point2]))]
+        while True:
+            for seen, queue in searches:
+                if not queue:
+                    return seen
+
+                point = queue.popleft()
+                for other in self._tree_neighbors.get(point, {}):
+                    if other not in seen:
+                        seen.add(other)
+                        queue.append(other)
@@ -1,10 +1,100 @@
-from point import Point
+from itertools import repeat
+
+from columns import EdgeColumns
+
 
 class Edge:
-    def __init__(self, source: Point, dest: Point, weight=1.0):
-        self.source = source
-        self.dest = dest
-        self.weight = weight
-    
+    # A view of one row of an EdgeColumns. The edges of a graph are made on
+    # demand by edge_at and shared while something holds them; an Edge made
+    # directly, or removed from its graph, owns a private one-row columns.
+    __slots__ = ('_columns', '_slot', '__weakref__')
+
+    def __init__(self, source, dest, weight=1.0):
+        self._columns, self._slot = _private_row(source, dest, weight)
+
+    @property
+    def source(self):
+        columns = self._columns
+        return columns.points[columns.src[self._slot]]
+
+    @property
+    def dest(self):
+        columns = self._columns
+        return columns.points[columns.dst[self._slot]]
+
+    @property
+    def weight(self):
+        return self._columns.weights[self._slot]
+
+    @weight.setter
+    def weight(self, value):
+        owner = self._columns.owner
+        if owner is None:
+            self._columns.weights[self._slot] = value
+        else:
+            owner.set_edge_weight(self, value)
+
+    def _detach(self):
+        self._columns, self._slot = _private_row(self.source, self.dest, self.weight)
+
     def __repr__(self):
         return f"Ребро({self.source.index} - {self.dest.index}, вес={self.weight})"
+
+
+def _private_row(source, dest, weight):
+    columns = EdgeColumns()
+    columns.points.append(source)
+    if dest is not source:
+        columns.points.append(dest)
+    return columns, columns.append(0, len(columns.points) - 1, weight)
+
+
+def edge_at(columns, slot):
+    edge = columns.facades.get(slot)
+    if edge is None:
+        edge = Edge.__new__(Edge)
+        edge._columns = columns
+        edge._slot = slot
+        columns.facades[slot] = edge
+    return edge
+
+
+class EdgeList:
+    # Graph.edges: a sequence over the edge columns that makes Edge objects
+    # only for the slots that are read. The graph's own view is live; a
+    # slice, like the result of add_edges_bulk, covers a fixed range of
+    # slots and is meant to be read before the graph changes again.
+    __slots__ = ('_columns', '_start', '_stop')
+
+    def __init__(self, columns, start=0, stop=None):
+        self._columns = columns
+        self._start = start
+        self._stop = stop
+
+    def _slots(self):
+        return range(self._start, len(self._columns) if self._stop is None else self._stop)
+
+    def __len__(self):
+        return len(self._slots())
+
+    def __getitem__(self, index):
+        slots = self._slots()[index]
+        if isinstance(slots, range):
+            if slots.step != 1:
+                return [edge_at(self._columns, slot) for slot in slots]
+            return EdgeList(self._columns, slots.start, max(slots.start, slots.stop))
+        return edge_at(self._columns, slots)
+
+    def __iter__(self):
+        return map(edge_at, repeat(self._columns), self._slots())
+
+    def __contains__(self, edge):
+        return isinstance(edge, Edge) and edge._columns is self._columns and edge._slot in self._slots()
+
+    def __eq__(self, other):
+        if isinstance(other, (list, EdgeList)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
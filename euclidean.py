@@ -0,0 +1,318 @@
+import math
+
+from disjoint_set import DisjointSet
+from instrumentation import NULL_PROFILE, CHECKPOINT_INTERVAL
+
+EPSILON = 2 ** -52
+
+
+def _orient(px, py, qx, qy, rx, ry):
+    return (qy - py) * (rx - qx) - (qx - px) * (ry - qy) < 0
+
+
+def _in_circle(ax, ay, bx, by, cx, cy, px, py):
+    dx = ax - px
+    dy = ay - py
+    ex = bx - px
+    ey = by - py
+    fx = cx - px
+    fy = cy - py
+
+    ap = dx * dx + dy * dy
+    bp = ex * ex + ey * ey
+    cp = fx * fx + fy * fy
+
+    return dx * (ey * cp - bp * fy) - dy * (ex * cp - bp * fx) + ap * (ex * fy - ey * fx) < 0
+
+
+def _circumcenter_offset(ax, ay, bx, by, cx, cy):
+    dx = bx - ax
+    dy = by - ay
+    ex = cx - ax
+    ey = cy - ay
+
+    denominator = dx * ey - dy * ex
+    if denominator == 0:
+        return None
+
+    bl = dx * dx + dy * dy
+    cl = ex * ex + ey * ey
+    d = 0.5 / denominator
+    return (ey * bl - dy * cl) * d, (dx * cl - ex * bl) * d
+
+
+def _pseudo_angle(dx, dy):
+    total = abs(dx) + abs(dy)
+    if total == 0:
+        return 0.0
+    p = dx / total
+    return (3 - p if dy > 0 else 1 + p) / 4
+
+
+class _Triangulation:
+    # Sweep-hull Delaunay triangulation (the scheme used by Delaunator):
+    # points are inserted in order of distance from a seed circumcenter,
+    # each one is joined to the visible part of the convex hull and the
+    # new triangles are made Delaunay again by edge flips.
+
+    def __init__(self, xs, ys, profile=NULL_PROFILE):
+        self.xs = xs
+        self.ys = ys
+        self.triangles = []
+        self.halfedges = []
+        self.collinear = None
+
+        n = len(xs)
+        self.hull_prev = [0] * n
+        self.hull_next = [0] * n
+        self.hull_tri = [0] * n
+        self.hash_size = max(1, math.ceil(math.sqrt(n)))
+        self.hull_hash = [-1] * self.hash_size
+        self.hull_start = 0
+        self.skipped = []
+
+        if n >= 3:
+            self._triangulate(profile)
+
+    def _hash_key(self, x, y):
+        return math.floor(_pseudo_angle(x - self.cx, y - self.cy) * self.hash_size) % self.hash_size
+
+    def _triangulate(self, profile):
+        xs, ys = self.xs, self.ys
+        n = len(xs)
+
+        center_x = (min(xs) + max(xs)) / 2
+        center_y = (min(ys) + max(ys)) / 2
+        i0 = min(range(n), key=lambda i: (xs[i] - center_x) ** 2 + (ys[i] - center_y) ** 2)
+        x0, y0 = xs[i0], ys[i0]
+
+        i1 = min((i for i in range(n) if i != i0), key=lambda i: (xs[i] - x0) ** 2 + (ys[i] - y0) ** 2)
+        x1, y1 = xs[i1], ys[i1]
+
+        i2 = None
+        min_radius = math.inf
+        for i in range(n):
+            if i == i0 or i == i1:
+                continue
+            offset = _circumcenter_offset(x0, y0, x1, y1, xs[i], ys[i])
+            if offset is not None:
+                radius = offset[0] ** 2 + offset[1] ** 2
+                if radius < min_radius:
+                    i2 = i
+                    min_radius = radius
+
+        if i2 is None:
+            self.collinear = sorted(range(n), key=lambda i: (xs[i] - x0) or (ys[i] - y0))
+            return
+
+        x2, y2 = xs[i2], ys[i2]
+        if _orient(x0, y0, x1, y1, x2, y2):
+            i1, i2 = i2, i1
+            x1, y1, x2, y2 = x2, y2, x1, y1
+
+        offset_x, offset_y = _circumcenter_offset(x0, y0, x1, y1, x2, y2)
+        self.cx = x0 + offset_x
+        self.cy = y0 + offset_y
+
+        ids = sorted(range(n), key=lambda i: (xs[i] - self.cx) ** 2 + (ys[i] - self.cy) ** 2)
+
+        hull_prev, hull_next, hull_tri, hull_hash = self.hull_prev, self.hull_next, self.hull_tri, self.hull_hash
+        self.hull_start = i0
+        hull_next[i0] = hull_prev[i2] = i1
+        hull_next[i1] = hull_prev[i0] = i2
+        hull_next[i2] = hull_prev[i1] = i0
+
+        hull_tri[i0] = 0
+        hull_tri[i1] = 1
+        hull_tri[i2] = 2
+
+        hull_hash[self._hash_key(x0, y0)] = i0
+        hull_hash[self._hash_key(x1, y1)] = i1
+        hull_hash[self._hash_key(x2, y2)] = i2
+
+        self._add_triangle(i0, i1, i2, -1, -1, -1)
+
+        xp = yp = None
+        for k, i in enumerate(ids):
+            if not k % CHECKPOINT_INTERVAL:
+                profile.checkpoint()
+            x, y = xs[i], ys[i]
+            if k > 0 and abs(x - xp) <= EPSILON and abs(y - yp) <= EPSILON:
+                self.skipped.append(i)
+                continue
+            xp, yp = x, y
+
+            if i == i0 or i == i1 or i == i2:
+                continue
+
+            start = 0
+            key = self._hash_key(x, y)
+            for j in range(self.hash_size):
+                start = hull_hash[(key + j) % self.hash_size]
+                if start != -1 and start != hull_next[start]:
+                    break
+
+            start = hull_prev[start]
+            e = start
+            while True:
+                q = hull_next[e]
+                if _orient(x, y, xs[e], ys[e], xs[q], ys[q]):
+                    break
+                e = q
+                if e == start:
+                    e = -1
+                    break
+
+            if e == -1:
+                self.skipped.append(i)
+                continue
+
+            t = self._add_triangle(e, i, hull_next[e], -1, -1, hull_tri[e])
+            hull_tri[i] = self._legalize(t + 2)
+            hull_tri[e] = t
+
+            following = hull_next[e]
+            while True:
+                q = hull_next[following]
+                if not _orient(x, y, xs[following], ys[following], xs[q], ys[q]):
+                    break
+                t = self._add_triangle(following, i, q, hull_tri[i], -1, hull_tri[following])
+                hull_tri[i] = self._legalize(t + 2)
+                hull_next[following] = following
+                following = q
+
+            if e == start:
+                while True:
+                    q = hull_prev[e]
+                    if not _orient(x, y, xs[q], ys[q], xs[e], ys[e]):
+                        break
+                    t = self._add_triangle(q, i, e, -1, hull_tri[e], hull_tri[q])
+                    self._legalize(t + 2)
+                    hull_tri[q] = t
+                    hull_next[e] = e
+                    e = q
+
+            self.hull_start = hull_prev[i] = e
+            hull_next[e] = hull_prev[following] = i
+            hull_next[i] = following
+
+            hull_hash[self._hash_key(x, y)] = i
+            hull_hash[self._hash_key(xs[e], ys[e])] = e
+
+    def _link(self, a, b):
+        self.halfedges[a] = b
+        if b != -1:
+            self.halfedges[b] = a
+
+    def _add_triangle(self, i0, i1, i2, a, b, c):
+        t = len(self.triangles)
+        self.triangles.extend((i0, i1, i2))
+        self.halfedges.extend((-1, -1, -1))
+        self._link(t, a)
+        self._link(t + 1, b)
+        self._link(t + 2, c)
+        return t
+
+    def _legalize(self, a):
+        triangles, halfedges, xs, ys = self.triangles, self.halfedges, self.xs, self.ys
+        stack = []
+        while True:
+            b = halfedges[a]
+            a0 = a - a % 3
+            ar = a0 + (a + 2) % 3
+
+            if b == -1:
+                if not stack:
+                    break
+                a = stack.pop()
+                continue
+
+            b0 = b - b % 3
+            al = a0 + (a + 1) % 3
+            bl = b0 + (b + 2) % 3
+
+            p0 = triangles[ar]
+            pr = triangles[a]
+            pl = triangles[al]
+            p1 = triangles[bl]
+
+            if _in_circle(xs[p0], ys[p0], xs[pr], ys[pr], xs[pl], ys[pl], xs[p1], ys[p1]):
+                triangles[a] = p1
+                triangles[b] = p0
+
+                hbl = halfedges[bl]
+                if hbl == -1:
+                    e = self.hull_start
+                    while True:
+                        if self.hull_tri[e] == bl:
+                            self.hull_tri[e] = a
+                            break
+                        e = self.hull_prev[e]
+                        if e == self.hull_start:
+                            break
+
+                self._link(a, hbl)
+                self._link(b, halfedges[ar])
+                self._link(ar, bl)
+
+                stack.append(b0 + (b + 1) % 3)
+            else:
+                if not stack:
+                    break
+                a = stack.pop()
+
+        return ar
+
+    def edges(self):
+        if self.collinear is not None:
+            return list(zip(self.collinear, self.collinear[1:]))
+
+        triangles, halfedges = self.triangles, self.halfedges
+        pairs = []
+        for e in range(len(triangles)):
+            if e > halfedges[e]:
+                pairs.append((triangles[e], triangles[e - e % 3 + (e + 1) % 3]))
+        return pairs
+
+
+def delaunay_edges(xs, ys, profile=NULL_PROFILE):
+    unique = {}
+    representatives = []
+    duplicates = []
+    for i, point in enumerate(zip(xs, ys)):
+        first = unique.setdefault(point, i)
+        if first == i:
+            representatives.append(i)
+        else:
+            duplicates.append((first, i))
+
+    if len(representatives) < 3:
+        pairs = [(a, b) for k, a in enumerate(representatives) for b in representatives[k + 1:]]
+        return pairs + duplicates
+
+    triangulation = _Triangulation([xs[i] for i in representatives], [ys[i] for i in representatives], profile)
+    pairs = [(representatives[a], representatives[b]) for a, b in triangulation.edges()]
+
+    # Points the sweep could not place (numerically coincident with an
+    # already inserted one) are joined to everything to stay exact.
+    for skipped in triangulation.skipped:
+        point = representatives[skipped]
+        pairs.extend((point, other) for other in representatives if other != point)
+
+    return pairs + duplicates
+
+
+def euclidean_mst_pairs(xs, ys, profile=NULL_PROFILE):
+    candidates = sorted(
+        delaunay_edges(xs, ys, profile),
+        key=lambda pair: math.hypot(xs[pair[0]] - xs[pair[1]], ys[pair[0]] - ys[pair[1]]),
+    )
+
+    components = DisjointSet(len(xs))
+    mst_pairs = []
+    for a, b in candidates:
+        if components.union(a, b):
+            mst_pairs.append((a, b))
+            if len(mst_pairs) == len(xs) - 1:
+                break
+    return mst_pairs
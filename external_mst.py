@@ -0,0 +1,169 @@
+import csv
+import heapq
+import os
+import struct
+import tempfile
+from array import array
+from collections import namedtuple
+from contextlib import ExitStack, contextmanager
+from itertools import count, islice
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import graph_io
+from disjoint_set import KruskalForest
+from instrumentation import NULL_PROFILE
+
+# Sorted runs on disk are flat little-endian records. The original edge
+# order is kept in each record, so merging by (weight, order) reproduces
+# the stable sort of the in-memory Kruskal exactly.
+RUN_RECORD = struct.Struct('<dqqq')
+RUN_DTYPE = [('weight', '<f8'), ('order', '<i8'), ('source', '<i8'), ('dest', '<i8')]
+# Peak bytes per edge while a run is sorted: the three input columns plus
+# the record array, its argsort and the reordered copy.
+BYTES_PER_BUFFERED_EDGE = 104
+DEFAULT_MEMORY_BUDGET = 256 * 2 ** 20
+# More runs than this are merged in several passes, so the number of open
+# files and read buffers stays bounded.
+MERGE_FAN_IN = 64
+MIN_READ_RECORDS = 256
+WRITE_BLOCK_RECORDS = 65536
+
+ExternalMST = namedtuple('ExternalMST', ['vertex_count', 'edge_count', 'mst_edge_count', 'mst_weight', 'runs'])
+
+
+def _write_run(path, first_order, sources, dests, weights):
+    if np is not None:
+        records = np.empty(len(weights), dtype=RUN_DTYPE)
+        records['weight'] = weights
+        records['order'] = np.arange(first_order, first_order + len(weights))
+        records['source'] = sources
+        records['dest'] = dests
+        records[np.argsort(records['weight'], kind='stable')].tofile(path)
+        return
+
+    order = sorted(range(len(weights)), key=weights.__getitem__)
+    pack = RUN_RECORD.pack
+    with open(path, 'wb') as f:
+        for start in range(0, len(order), WRITE_BLOCK_RECORDS):
+            f.write(b''.join([pack(weights[i], first_order + i, sources[i], dests[i])
+                              for i in order[start:start + WRITE_BLOCK_RECORDS]]))
+
+
+def _write_runs(batches, directory, names, capacity):
+    runs = []
+    edge_count = 0
+    sources = array('q')
+    dests = array('q')
+    weights = array('d')
+    for batch_sources, batch_dests, batch_weights in batches:
+        sources.extend(batch_sources)
+        dests.extend(batch_dests)
+        weights.extend(batch_weights)
+        while len(weights) >= capacity:
+            runs.append(os.path.join(directory, f'run-{next(names)}.bin'))
+            _write_run(runs[-1], edge_count, sources[:capacity], dests[:capacity], weights[:capacity])
+            edge_count += capacity
+            del sources[:capacity], dests[:capacity], weights[:capacity]
+
+    if weights:
+        runs.append(os.path.join(directory, f'run-{next(names)}.bin'))
+        _write_run(runs[-1], edge_count, sources, dests, weights)
+        edge_count += len(weights)
+    return runs, edge_count
+
+
+def _run_records(f, block_records):
+    while True:
+        block = f.read(block_records * RUN_RECORD.size)
+        if not block:
+            return
+        yield from RUN_RECORD.iter_unpack(block)
+
+
+@contextmanager
+def _merged_runs(runs, memory_budget):
+    block_records = max(MIN_READ_RECORDS, memory_budget // (RUN_RECORD.size * max(len(runs), 1)))
+    with ExitStack() as stack:
+        files = [stack.enter_context(open(path, 'rb')) for path in runs]
+        readers = [_run_records(f, block_records) for f in files]
+        yield heapq.merge(*readers) if len(readers) != 1 else readers[0]
+
+
+def _merge_passes(runs, directory, names, memory_budget, profile):
+    pack = RUN_RECORD.pack
+    while len(runs) > MERGE_FAN_IN:
+        merged = []
+        for start in range(0, len(runs), MERGE_FAN_IN):
+            group = runs[start:start + MERGE_FAN_IN]
+            merged.append(os.path.join(directory, f'run-{next(names)}.bin'))
+            with _merged_runs(group, memory_budget) as records, open(merged[-1], 'wb') as f:
+                while True:
+                    block = list(islice(records, WRITE_BLOCK_RECORDS))
+                    if not block:
+                        break
+                    f.write(b''.join([pack(*record) for record in block]))
+            for path in group:
+                os.remove(path)
+        runs = merged
+        profile.count('merge_passes')
+    return runs
+
+
+def _kruskal_records(records, vertex_count, profile):
+    # Only the forest edges leave this generator.
+    forest = KruskalForest(vertex_count, compact=True)
+    edges = ((record, record[2], record[3]) for record in records)
+    examined = 0
+    try:
+        for examined, (record, accepted) in enumerate(forest.scan(edges), 1):
+            if accepted:
+                weight, _, source, dest = record
+                yield source, dest, weight
+    finally:
+        profile.count('edges_examined', examined)
+
+
+@contextmanager
+def _edge_writer(output):
+    if output is None:
+        yield None
+        return
+    with graph_io.open_file(output, 'wt', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(graph_io.EDGE_FIELDS)
+        yield writer
+
+
+def external_kruskal(path, output=None, memory_budget=DEFAULT_MEMORY_BUDGET, temp_dir=None, profile=NULL_PROFILE):
+    # Memory is bounded by memory_budget for the edges plus the per-vertex
+    # arrays (union-find parents and labels), which is what makes graphs with more
+    # edges than fit in RAM tractable. Repeated edges between one pair of
+    # vertices are all kept, so the lightest of them is used.
+    capacity = memory_budget // BYTES_PER_BUFFERED_EDGE
+    if capacity < 1:
+        raise ValueError(f"Бюджет памяти должен быть не меньше {BYTES_PER_BUFFERED_EDGE} байт")
+
+    stream = graph_io.EdgeStream(path)
+    names = count()
+    with profile.span('mst'), tempfile.TemporaryDirectory(prefix='mst-runs-', dir=temp_dir) as directory:
+        with profile.span('runs'):
+            runs, edge_count = _write_runs(stream, directory, names, capacity)
+        profile.count('runs', len(runs))
+        run_count = len(runs)
+
+        with profile.span('merge'):
+            runs = _merge_passes(runs, directory, names, memory_budget, profile)
+            labels = stream.labels
+            mst_edge_count = 0
+            mst_weight = 0.0
+            with _merged_runs(runs, memory_budget) as records, _edge_writer(output) as writer:
+                for source, dest, weight in _kruskal_records(records, stream.vertex_count, profile):
+                    mst_edge_count += 1
+                    mst_weight += weight
+                    if writer is not None:
+                        writer.writerow((labels[source], labels[dest], weight))
+    return ExternalMST(stream.vertex_count, edge_count, mst_edge_count, mst_weight, run_count)
@@ -1,100 +1,1085 @@
+import gc
+import heapq
+import math
+import multiprocessing
+import os
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import count, repeat
+from multiprocessing import shared_memory
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from columns import PointColumns, EdgeColumns
+from disjoint_set import DisjointSet, KruskalForest
+from euclidean import euclidean_mst_pairs
+from instrumentation import NULL_PROFILE, CHECKPOINT_INTERVAL
+from journal import (ChangeJournal, GraphEvent, POINT_ADDED, POINT_REMOVED, POINT_MOVED,
+                     EDGE_ADDED, EDGE_REMOVED, WEIGHT_CHANGED, CLEARED)
+from mst_cache import MSTCache
 from point import Point
-from edge import Edge
+from edge import EdgeList, edge_at
+
+VECTORIZED_KRUSKAL_THRESHOLD = 20000
+PARALLEL_BORUVKA_THRESHOLD = 200000
+# Process pools are started from worker threads of a Qt application, and
+# forking a multithreaded process can deadlock the child, so workers are
+# spawned fresh instead.
+POOL_CONTEXT = multiprocessing.get_context('spawn')
+# Scenario batches are argsorted a block of rows at a time; a block holds
+# about this many scenario-edges, so three int64 copies stay near 24 MB.
+SCENARIO_BLOCK_SIZE = 2 ** 20
+PARALLEL_SCENARIOS_THRESHOLD = 2000000
+FILTER_KRUSKAL_CUTOFF = 1024
+FILTER_KRUSKAL_OVERSAMPLING = 8
+# From benchmarks/baseline.json and the same families without NumPy:
+# Filter-Kruskal is 2-3x faster than sorting everything once there are
+# eight or more edges per tree edge, and within a few percent below that.
+AUTO_FILTER_DENSITY = 8
+# The change journal keeps at least this many recent entries and is trimmed
+# once it holds twice as many, unless a consumer retains older ones.
+JOURNAL_RETENTION = 65536
+
+ALGORITHMS = {
+    'прим': 'prim',
+    'краскал': 'kruskal',
+    'борувка': 'boruvka',
+    'евклидово mst': 'euclidean_mst',
+    'фильтр-краскал': 'filter_kruskal',
+    'авто': 'auto',
+}
+AUTO_ALGORITHM = 'авто'
+
+# What auto() may pick. The spanning forest is only a minimum tree when all
+# weights are equal, so it is kept out of the public ALGORITHMS.
+_AUTO_METHODS = {
+    'краскал': 'kruskal',
+    'фильтр-краскал': 'filter_kruskal',
+    'остовный лес': 'spanning_forest',
+}
+
+# Algorithms that also have a step-wise generator, for progressive rendering.
+STEP_ALGORITHMS = {
+    'прим': 'prim_steps',
+    'краскал': 'kruskal_steps',
+}
+
+AlgorithmChoice = namedtuple('AlgorithmChoice', ['algorithm', 'reason'])
+
+# Field order of the tuples yielded by the *_steps generators. They yield
+# plain tuples: building a namedtuple costs more than a union-find step.
+# slot is the edge's position in Graph.edges; resolving it only for the
+# edges a consumer draws avoids touching every Edge in weight order.
+# state is the live frontier heap (Prim) or KruskalForest (Kruskal), not a
+# copy, so it is only meaningful until the generator is advanced again.
+MSTStep = namedtuple('MSTStep', ['slot', 'accepted', 'state'])
+
+GraphSnapshot = namedtuple('GraphSnapshot', ['version', 'xs', 'ys', 'src', 'dst', 'weights'])
+
+GraphArrays = namedtuple('GraphArrays', ['vertex_count', 'src', 'dst', 'weights', 'indptr', 'indices', 'edge_ids'])
+
+ScenarioMST = namedtuple('ScenarioMST', ['mst_weights', 'membership'])
+
+_worker_blocks = None
+_worker_topology = None
+
+
+def _share_arrays(*arrays):
+    # Each array is copied once into its own shared memory block. Pool
+    # workers attach to the blocks by name, so only names and index ranges
+    # are pickled, not the arrays.
+    blocks = []
+    try:
+        for values in arrays:
+            with memoryview(values).cast('B') as data:
+                block = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+                blocks.append(block)
+                block.buf[:len(data)] = data
+    except BaseException:
+        _release_shared(blocks)
+        raise
+    return blocks
+
+
+def _write_shared(block, values):
+    with memoryview(values).cast('B') as data:
+        block.buf[:len(data)] = data
+
+
+def _release_shared(blocks):
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+
+def _init_boruvka_worker(names):
+    global _worker_blocks
+    _worker_blocks = [shared_memory.SharedMemory(name) for name in names]
+
+
+def _cheapest_edges_shard(start, stop):
+    # The views are released before returning: a block with live views
+    # cannot be closed when the worker exits.
+    views = [block.buf.cast(typecode) for block, typecode in zip(_worker_blocks, 'qqdq')]
+    try:
+        return _cheapest_edges(views[:3], views[3], start, stop)
+    finally:
+        for view in views:
+            view.release()
+
+
+def _cheapest_edges(edges, labels, start, stop, cheapest=None):
+    src, dst, weights = edges
+    if cheapest is None:
+        cheapest = {}
+    for edge_id in range(start, stop):
+        comp1 = labels[src[edge_id]]
+        comp2 = labels[dst[edge_id]]
+        if comp1 == comp2:
+            continue
+
+        candidate = (weights[edge_id], edge_id)
+        best = cheapest.get(comp1)
+        if best is None or candidate < best:
+            cheapest[comp1] = candidate
+        best = cheapest.get(comp2)
+        if best is None or candidate < best:
+            cheapest[comp2] = candidate
+    return cheapest
+
+
+def _kruskal_pass(vertex_count, target, edge_ids, sources, dests, profile=NULL_PROFILE):
+    forest = KruskalForest(vertex_count)
+    mst_indices = []
+    checkpoint = CHECKPOINT_INTERVAL
+    for examined, (edge_id, accepted) in enumerate(forest.scan(zip(edge_ids, sources, dests),
+                                                               vertex_count - target), 1):
+        if accepted:
+            mst_indices.append(edge_id)
+        if examined == checkpoint:
+            profile.checkpoint()
+            checkpoint += CHECKPOINT_INTERVAL
+    return mst_indices
+
+
+def _init_scenario_worker(vertex_count, target, shape, names):
+    global _worker_topology
+    _worker_topology = (vertex_count, target, shape, [shared_memory.SharedMemory(name) for name in names])
+
+
+def _scenario_block_shard(start, stop):
+    vertex_count, target, (scenario_count, edge_count), blocks = _worker_topology
+    src = np.ndarray(edge_count, np.int64, blocks[0].buf)
+    dst = np.ndarray(edge_count, np.int64, blocks[1].buf)
+    weights = np.ndarray((scenario_count, edge_count), np.float64, blocks[2].buf)
+    mst_weights, membership = _scenario_block(vertex_count, target, src, dst, weights[start:stop])
+    np.ndarray(scenario_count, np.float64, blocks[3].buf)[start:stop] = mst_weights
+    np.ndarray((scenario_count, edge_count), np.bool_, blocks[4].buf)[start:stop] = membership
+
+
+def _scenario_block(vertex_count, target, src, dst, weights):
+    orders = np.argsort(weights, axis=1, kind='stable')
+    sources = src[orders]
+    dests = dst[orders]
+    mst_weights = np.zeros(len(weights))
+    membership = np.zeros(weights.shape, dtype=bool)
+    for row in range(len(weights)):
+        mst_indices = _kruskal_pass(vertex_count, target, orders[row].tolist(),
+                                    sources[row].tolist(), dests[row].tolist())
+        membership[row, mst_indices] = True
+        mst_weights[row] = weights[row, mst_indices].sum()
+    return mst_weights, membership
+
+
+def mst_scenarios(vertex_count, src, dst, weights, workers=None):
+    if np is None:
+        raise RuntimeError("Для пакетного расчёта сценариев требуется NumPy")
+
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    weights = np.asarray(weights, dtype=np.float64)
+    if weights.ndim != 2 or weights.shape[1] != len(src) or len(src) != len(dst):
+        raise ValueError(f"Матрица весов должна иметь форму (сценарии, {len(src)}), получено {weights.shape}")
+
+    # The topology is shared, so the size of the spanning forest is found
+    # once and every scenario can stop as soon as it reaches it.
+    target = len(_kruskal_pass(vertex_count, vertex_count - 1, range(len(src)), src.tolist(), dst.tolist()))
+    scenario_count, edge_count = weights.shape
+    rows = max(1, SCENARIO_BLOCK_SIZE // max(edge_count, 1))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if scenario_count * edge_count < PARALLEL_SCENARIOS_THRESHOLD:
+        workers = 1
+    if workers > 1 and -(-scenario_count // rows) < workers:
+        rows = -(-scenario_count // workers)
+    starts = range(0, scenario_count, rows)
+
+    if workers == 1:
+        results = [_scenario_block(vertex_count, target, src, dst, weights[start:start + rows]) for start in starts]
+        if not results:
+            return ScenarioMST(np.zeros(0), np.zeros((0, edge_count), dtype=bool))
+        return ScenarioMST(np.concatenate([mst_weights for mst_weights, _ in results]),
+                           np.concatenate([membership for _, membership in results]))
+
+    # Workers read the topology and the weights from shared memory and
+    # write their rows of the result there, so a task is just a row range.
+    mst_weights = np.zeros(scenario_count)
+    membership = np.zeros(weights.shape, dtype=bool)
+    blocks = _share_arrays(np.ascontiguousarray(src), np.ascontiguousarray(dst), np.ascontiguousarray(weights),
+                           mst_weights, membership)
+    try:
+        with ProcessPoolExecutor(workers, mp_context=POOL_CONTEXT, initializer=_init_scenario_worker,
+                                 initargs=(vertex_count, target, weights.shape,
+                                           [block.name for block in blocks])) as executor:
+            for _ in executor.map(_scenario_block_shard, starts,
+                                  [min(start + rows, scenario_count) for start in starts]):
+                pass
+        mst_weights[:] = np.ndarray(scenario_count, np.float64, blocks[3].buf)
+        membership[:] = np.ndarray(weights.shape, np.bool_, blocks[4].buf)
+    finally:
+        _release_shared(blocks)
+    return ScenarioMST(mst_weights, membership)
+
+
+@contextmanager
+def _gc_paused():
+    # Everything a bulk build allocates stays reachable from the graph, so
+    # the collector passes triggered by those allocations are pure overhead.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _as_list(values):
+    return values.tolist() if hasattr(values, 'tolist') else values
+
+
+def _edge_length(edge):
+    return math.dist((edge.source.x, edge.source.y), (edge.dest.x, edge.dest.y))
+
+
+def mst_weight(mst_edges, algorithm):
+    # The Euclidean MST is chosen by length alone, so its weight is the
+    # total length even where it reuses an edge that carries another weight.
+    if ALGORITHMS.get(algorithm) == 'euclidean_mst':
+        return sum(map(_edge_length, mst_edges))
+    return sum(edge.weight for edge in mst_edges)
 
 
 class Graph:
     def __init__(self):
-        self.points = []
-        self.edges = []
+        self._point_columns = PointColumns(self)
+        self._edge_columns = EdgeColumns(self._point_columns, self)
+        self.journal = ChangeJournal()
+        self.mst_cache = MSTCache()
+        self._subscribers = []
+        self._journal_holds = []
+        self._transaction_depth = 0
+        self._pending_events = []
+        self.profile = NULL_PROFILE
+        self.last_choice = None
+        self._components = None
+
+    @property
+    def points(self):
+        return self._point_columns.items
+
+    @property
+    def edges(self):
+        return EdgeList(self._edge_columns)
+
+    @property
+    def version(self):
+        return self.journal.last_seq
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback)
+
+    @contextmanager
+    def transaction(self):
+        self._transaction_depth += 1
+        try:
+            yield self
+        finally:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0 and self._pending_events:
+                events, self._pending_events = self._pending_events, []
+                self._notify(events)
+
+    @contextmanager
+    def profiling(self, profile):
+        previous, self.profile = self.profile, profile
+        try:
+            yield profile
+        finally:
+            self.profile = previous
+
+    def changes_since(self, seq):
+        return self.journal.since(seq)
+
+    def retain_journal(self, seq):
+        # Keeps every entry after seq until the returned callable is called,
+        # for consumers that catch up with changes_since later.
+        self._journal_holds.append(seq)
+        return lambda: self._journal_holds.remove(seq)
+
+    def _trim_journal(self):
+        journal = self.journal
+        if len(journal) <= 2 * JOURNAL_RETENTION:
+            return
+        seq = journal.last_seq - JOURNAL_RETENTION
+        if self._journal_holds:
+            seq = min(seq, *self._journal_holds)
+        journal.trim(seq)
+
+    def _changed(self, kind, item, old=None, first=-1, second=-1, value=0.0, extra=0.0):
+        seq = self.journal.record(kind, first, second, value, extra)
+        self._trim_journal()
+        if not self._subscribers:
+            return
+
+        event = GraphEvent(seq, kind, item, old)
+        if self._transaction_depth:
+            self._pending_events.append(event)
+        else:
+            self._notify([event])
+
+    def _changed_many(self, kind, items, firsts, seconds, values, extras):
+        seq = self.journal.record_many(kind, firsts, seconds, values, extras)
+        self._trim_journal()
+        if not self._subscribers:
+            return
+
+        events = [GraphEvent(seq + offset, kind, item, None) for offset, item in enumerate(items)]
+        if self._transaction_depth:
+            self._pending_events.extend(events)
+        else:
+            self._notify(events)
+
+    def _notify(self, events):
+        for callback in list(self._subscribers):
+            callback(self, events)
+
+    def _edge_changed(self, kind, edge, old=None):
+        self._changed(kind, edge, old, edge.source.index, edge.dest.index, edge.weight,
+                      0.0 if old is None else old)
 
     def add_point(self, x, y):
-        point = Point(x, y, len(self.points))
-        self.points.append(point)
+        point = Point(x, y, len(self.points), self._point_columns)
+        if self._components is not None:
+            self._components.add()
+        self._changed(POINT_ADDED, point, None, point.index, -1, point.x, point.y)
         return point
 
+    # The Point and Edge setters call these, so writing a coordinate or a
+    # weight in place also moves the version and reaches the subscribers.
+    def move_point(self, point, x, y):
+        columns = self._point_columns
+        old = (point.x, point.y)
+        columns.xs[point._slot] = x
+        columns.ys[point._slot] = y
+        self._changed(POINT_MOVED, point, old, point.index, -1, point.x, point.y)
+
+    def set_edge_weight(self, edge, weight):
+        if edge.weight != weight:
+            old = edge.weight
+            self._edge_columns.weights[edge._slot] = weight
+            self._edge_changed(WEIGHT_CHANGED, edge, old)
+
+    def find_edge(self, source, dest):
+        slot = self._edge_columns.find(source._slot, dest._slot)
+        return None if slot < 0 else edge_at(self._edge_columns, slot)
+
     def add_edge(self, source, dest, weight=1.0):
-        for edge in self.edges:
-            if (edge.source == source and edge.dest == dest) or \
-                    (edge.source == dest and edge.dest == source):
-                return None
-
-        edge = Edge(source, dest, weight)
-        self.edges.append(edge)
-        source.add_edge(edge)
-        dest.add_edge(edge)
+        columns = self._edge_columns
+        slot = columns.add(source._slot, dest._slot, weight)
+        if slot < 0:
+            return None
+
+        edge = edge_at(columns, slot)
+        if self._components is not None:
+            self._components.union(source._slot, dest._slot)
+        self._edge_changed(EDGE_ADDED, edge)
         return edge
 
+    @classmethod
+    def from_arrays(cls, xs, ys, src, dst, weights):
+        if len(xs) != len(ys):
+            raise ValueError("Длины массивов координат не совпадают")
+        if not len(src) == len(dst) == len(weights):
+            raise ValueError("Длины массивов рёбер не совпадают")
+
+        graph = cls()
+        with graph.transaction():
+            graph.add_points_bulk(zip(_as_list(xs), _as_list(ys)))
+            graph.add_edges_bulk(zip(_as_list(src), _as_list(dst), _as_list(weights)))
+        return graph
+
+    def add_points_bulk(self, coordinates):
+        points = self.points
+        columns = self._point_columns
+        added = []
+        try:
+            with _gc_paused():
+                for x, y in coordinates:
+                    added.append(Point(float(x), float(y), len(points), columns))
+        finally:
+            if added and self._components is not None:
+                for _ in added:
+                    self._components.add()
+            if added:
+                first_slot = added[0]._slot
+                self._changed_many(POINT_ADDED, added, array('q', [point.index for point in added]),
+                                   array('q', repeat(-1, len(added))), columns.xs[first_slot:],
+                                   columns.ys[first_slot:])
+        return added
+
+    def add_edges_bulk(self, edges):
+        points = self.points
+        columns = self._edge_columns
+        first_slot = len(columns)
+        try:
+            with _gc_paused():
+                columns.add_many(edges, len(points))
+        finally:
+            sources = columns.src[first_slot:]
+            dests = columns.dst[first_slot:]
+            added = EdgeList(columns, first_slot, len(columns))
+            if added:
+                if self._components is not None:
+                    union = self._components.union
+                    for source_slot, dest_slot in zip(sources, dests):
+                        union(source_slot, dest_slot)
+                self._changed_many(EDGE_ADDED, added, array('q', [points[slot].index for slot in sources]),
+                                   array('q', [points[slot].index for slot in dests]),
+                                   columns.weights[first_slot:], array('d', repeat(0.0, len(added))))
+        return added
+
+    def snapshot(self):
+        # Copies of the columns are a memcpy each, cheap enough for the GUI
+        # thread; the object graph is rebuilt from them by whoever runs on it.
+        points = self._point_columns
+        edges = self._edge_columns
+        return GraphSnapshot(self.version, points.xs[:], points.ys[:], edges.src[:], edges.dst[:], edges.weights[:])
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        return cls.from_arrays(snapshot.xs, snapshot.ys, snapshot.src, snapshot.dst, snapshot.weights)
+
+    @classmethod
+    def from_dict(cls, graph_data):
+        graph = cls()
+        graph.load_dict(graph_data)
+        return graph
+
+    def load_dict(self, graph_data):
+        first_slot = len(self.points)
+        slots = {point_data['index']: first_slot + offset for offset, point_data in enumerate(graph_data['points'])}
+        with self.transaction():
+            points = self.add_points_bulk((point_data['x'], point_data['y']) for point_data in graph_data['points'])
+            edges = self.add_edges_bulk(
+                (slots[edge_data['source_index']], slots[edge_data['dest_index']], edge_data['weight'])
+                for edge_data in graph_data['edges'])
+        return points, edges
+
+    def to_dict(self):
+        points = self.points
+        columns = self._edge_columns
+        return {
+            'points': [{'index': point.index, 'x': point.x, 'y': point.y} for point in points],
+            'edges': [{'source_index': points[source].index, 'dest_index': points[dest].index, 'weight': weight}
+                      for source, dest, weight in zip(columns.src, columns.dst, columns.weights)],
+        }
+
     def remove_point(self, point):
-        for edge in point.edges[:]:
+        columns = self._check_member(self._point_columns, point)
+        for edge in point.edges:
             self.remove_edge(edge)
-        self.points.remove(point)
+
+        slot = point._slot
+        point._detach()
+        columns.swap_remove(slot)
+        self._components = None
+        self._changed(POINT_REMOVED, point, None, point.index, -1, point.x, point.y)
 
     def remove_edge(self, edge):
-        edge.source.remove_edge(edge)
-        edge.dest.remove_edge(edge)
-        self.edges.remove(edge)
+        columns = self._check_member(self._edge_columns, edge)
+        slot = edge._slot
+        edge._detach()
+        columns.swap_remove(slot)
+        self._components = None
+        self._edge_changed(EDGE_REMOVED, edge)
+
+    def _edges_at(self, slots):
+        return list(map(edge_at, repeat(self._edge_columns), slots))
+
+    @staticmethod
+    def _check_member(columns, item):
+        if item._columns is not columns:
+            raise ValueError(f"{item!r} не принадлежит графу")
+        return columns
+
+    def minimum_spanning_tree(self, algorithm):
+        method = getattr(self, ALGORITHMS[algorithm])
+        profile = self.profile
+        key = (self.version, algorithm)
+        hits = self.mst_cache.hits
+        profile.start('mst')
+        mst_edges = self.mst_cache.get(key, method)
+        profile.stop('mst')
+        hit = self.mst_cache.hits > hits
+        if hit:
+            profile.count('cache_hits')
+        elif self.version != key[0]:
+            # The Euclidean MST adds its missing edges, which moves the
+            # version past the key the result was stored under.
+            self.mst_cache.put((self.version, algorithm), mst_edges)
+        if algorithm == AUTO_ALGORITHM:
+            if hit:
+                self.last_choice = self.mst_cache.note(key) or self.choose_algorithm()
+            else:
+                self.mst_cache.put(key, mst_edges, self.last_choice)
+            profile.note('auto', f"{self.last_choice.algorithm}: {self.last_choice.reason}")
+        return mst_edges
+
+    def choose_algorithm(self):
+        vertex_count = len(self.points)
+        edge_count = len(self.edges)
+        if edge_count == 0:
+            return AlgorithmChoice('краскал', "рёбер нет")
+
+        if np is not None and edge_count >= VECTORIZED_KRUSKAL_THRESHOLD:
+            return AlgorithmChoice('краскал', f"E={edge_count} ≥ {VECTORIZED_KRUSKAL_THRESHOLD}, сортировка NumPy")
+
+        weights = self._edge_columns.weights
+        if weights.count(weights[0]) == edge_count:
+            return AlgorithmChoice('остовный лес', f"все веса равны {weights[0]:g}, подходит любое остовное дерево")
+
+        # Density is edges per tree edge, E/(V-C). Rebuilding the components
+        # costs as much as Kruskal itself, so unless they are already known
+        # C is bounded from below by the isolated vertices, which can only
+        # understate the density.
+        components = 1
+        relation = "≥"
+        density = edge_count / max(vertex_count - 1, 1)
+        if self._components is not None:
+            components = self._components.count
+            relation = "="
+            density = edge_count / max(vertex_count - components, 1)
+        elif density < AUTO_FILTER_DENSITY and edge_count > FILTER_KRUSKAL_CUTOFF:
+            components += sum(1 for incident in self._point_columns.incidence if not incident)
+            density = edge_count / max(vertex_count - components, 1)
+
+        details = f"V={vertex_count}, E={edge_count}, компонент {relation} {components}"
+        if density >= AUTO_FILTER_DENSITY:
+            return AlgorithmChoice('фильтр-краскал', f"{details}: {density:.1f} рёбер на ребро дерева ≥ {AUTO_FILTER_DENSITY}")
+        return AlgorithmChoice('краскал', f"{details}: {density:.1f} рёбер на ребро дерева < {AUTO_FILTER_DENSITY}")
+
+    def auto(self):
+        self.last_choice = self.choose_algorithm()
+        return getattr(self, _AUTO_METHODS[self.last_choice.algorithm])()
 
     def prim(self):
         if not self.points:
             return []
 
+        profile = self.profile
+        profile.start('heap')
+        visited = bytearray(len(self.points))
+        mst_slots = []
+        order = count()
+        target = self._forest_size()
+
+        for start in range(len(visited)):
+            if len(mst_slots) == target:
+                break
+            if visited[start]:
+                continue
+
+            visited[start] = 1
+            heap = []
+            self._push_frontier(heap, start, visited, order)
+
+            while heap:
+                _, _, slot, other = heapq.heappop(heap)
+                if visited[other]:
+                    continue
+
+                mst_slots.append(slot)
+                visited[other] = 1
+                self._push_frontier(heap, other, visited, order)
+                if not len(mst_slots) % CHECKPOINT_INTERVAL:
+                    profile.checkpoint()
+
+        profile.stop('heap')
+        if profile.enabled:
+            pushes = next(order)
+            profile.count('heap_pushes', pushes)
+            profile.count('heap_pops', pushes)
+            profile.count('edges_examined', sum(map(len, self._point_columns.incidence)))
+        return self._edges_at(mst_slots)
 
-        visited = set()
-        edges_used = []
+    def mst_steps(self, algorithm):
+        return getattr(self, STEP_ALGORITHMS[algorithm])()
 
-        for point in self.points:
-            if point in visited:
+    def prim_steps(self):
+        visited = bytearray(len(self.points))
+        order = count()
+        target = self._forest_size()
+        accepted = 0
+
+        for start in range(len(visited)):
+            if accepted == target:
+                break
+            if visited[start]:
                 continue
 
-            start_point = point
-            visited.add(start_point)
+            visited[start] = 1
+            heap = []
+            self._push_frontier(heap, start, visited, order)
 
-            while True:
-                min_edge = None
-                for node in visited:
-                    for edge in node.edges:
-                        other_node = edge.dest if edge.source == node else edge.source
-                        if other_node not in visited:
-                            if min_edge is None or edge.weight < min_edge.weight:
-                                min_edge = edge
+            while heap:
+                _, _, slot, other = heapq.heappop(heap)
+                if visited[other]:
+                    yield slot, False, heap
+                    continue
 
-                if min_edge is None:
-                    break
+                visited[other] = 1
+                self._push_frontier(heap, other, visited, order)
+                accepted += 1
+                yield slot, True, heap
 
-                edges_used.append(min_edge)
-                other_node = min_edge.dest if min_edge.source in visited else min_edge.source
-                visited.add(other_node)
+    def spanning_forest(self):
+        profile = self.profile
+        columns = self._edge_columns
+        src = columns.src
+        dst = columns.dst
+        incidence = self._point_columns.incidence
+        visited = bytearray(len(self.points))
+        forest = []
+        for start in range(len(visited)):
+            if visited[start]:
+                continue
 
-        return edges_used
+            visited[start] = 1
+            stack = [start]
+            while stack:
+                point = stack.pop()
+                for slot in incidence[point]:
+                    other = src[slot] + dst[slot] - point
+                    if not visited[other]:
+                        visited[other] = 1
+                        forest.append(slot)
+                        stack.append(other)
+                        if not len(forest) % CHECKPOINT_INTERVAL:
+                            profile.checkpoint()
+        return self._edges_at(forest)
+
+    def _push_frontier(self, heap, point, visited, order):
+        # Heap entries are (weight, order, edge slot, far endpoint slot); an
+        # edge's endpoints sum to src + dst, which also covers self-loops.
+        columns = self._edge_columns
+        src = columns.src
+        dst = columns.dst
+        weights = columns.weights
+        for slot in self._point_columns.incidence[point]:
+            other = src[slot] + dst[slot] - point
+            if not visited[other]:
+                heapq.heappush(heap, (weights[slot], next(order), slot, other))
 
     def kruskal(self):
         if not self.points:
             return []
 
+        if np is not None and len(self.edges) >= VECTORIZED_KRUSKAL_THRESHOLD:
+            return self._edges_at(self.kruskal_indices().tolist())
 
-        edges_sorted = sorted(self.edges, key=lambda x: x.weight)
-        parent = {point: point for point in self.points}
+        profile = self.profile
+        columns = self._edge_columns
+        profile.start('sort')
+        order = sorted(range(len(columns)), key=columns.weights.__getitem__)
+        profile.stop('sort')
 
-        def find(point):
-            if parent[point] != point:
-                parent[point] = find(parent[point])
-            return parent[point]
+        profile.start('union_find')
+        target = self._forest_size()
+        mst_slots = _kruskal_pass(len(self.points), target, order, map(columns.src.__getitem__, order),
+                                  map(columns.dst.__getitem__, order), profile)
+        profile.stop('union_find')
+        if profile.enabled:
+            examined = len(order)
+            if mst_slots and len(mst_slots) == target:
+                examined = order.index(mst_slots[-1]) + 1
+            profile.count('edges_examined', examined)
+            profile.count('finds', 2 * examined)
+        profile.count('unions', len(mst_slots))
+        return self._edges_at(mst_slots)
 
-        def union(point1, point2):
-            root1 = find(point1)
-            root2 = find(point2)
-            if root1 != root2:
-                parent[root2] = root1
-                return True
-            return False
+    def kruskal_steps(self):
+        columns = self._edge_columns
+        if np is not None and len(columns) >= VECTORIZED_KRUSKAL_THRESHOLD:
+            order = np.argsort(columns.weights, kind='stable')
+            ordered = zip(order.tolist(), np.asarray(columns.src)[order].tolist(),
+                          np.asarray(columns.dst)[order].tolist())
+        else:
+            order = sorted(range(len(columns)), key=columns.weights.__getitem__)
+            ordered = zip(order, map(columns.src.__getitem__, order), map(columns.dst.__getitem__, order))
 
-        mst_edges = []
-        for edge in edges_sorted:
-            if union(edge.source, edge.dest):
-                mst_edges.append(edge)
+        components = KruskalForest(len(self.points))
+        for edge_id, accepted in components.scan(ordered, len(self.points) - self._forest_size()):
+            yield edge_id, accepted, components
+
+    def filter_kruskal(self):
+        if not self.points:
+            return []
+
+        columns = self._edge_columns
+        weights = columns.weights.tolist()
+        src = columns.src.tolist()
+        dst = columns.dst.tolist()
+
+        target = self._forest_size()
+        if FILTER_KRUSKAL_OVERSAMPLING * target < len(weights):
+            target = len(self.points) - self.component_count()
+
+        profile = self.profile
+        components = DisjointSet(len(self.points))
+        find = components.find
+        union = components.union
+        mst_indices = []
+        examined = 0
+        stack = [(list(range(len(weights))), FILTER_KRUSKAL_OVERSAMPLING * target / max(len(weights), 1))]
+        while stack and len(mst_indices) < target:
+            part, share = stack.pop()
+            profile.start('partition')
+            pivot = self._filter_pivot(part, weights, share)
+            if pivot is not None:
+                upper = [i for i in part if weights[i] > pivot]
+                stack.append((upper, share * 4))
+                stack.append(([i for i in part if weights[i] <= pivot], 1.0))
+                profile.stop('partition')
+                profile.count('partitions')
+                continue
+            profile.stop('partition')
+
+            if mst_indices:
+                profile.start('filter')
+                filtered = len(part)
+                part = [i for i in part if find(src[i]) != find(dst[i])]
+                profile.stop('filter')
+                profile.count('edges_filtered', filtered - len(part))
+                profile.count('finds', 2 * filtered)
+
+            profile.start('sort')
+            part.sort(key=weights.__getitem__)
+            profile.stop('sort')
+
+            profile.start('union_find')
+            unions = len(mst_indices)
+            for position, i in enumerate(part, 1):
+                if not position % CHECKPOINT_INTERVAL:
+                    profile.checkpoint()
+                if union(src[i], dst[i]):
+                    mst_indices.append(i)
+                    if len(mst_indices) == target:
+                        break
+            profile.stop('union_find')
+            if profile.enabled:
+                examined += part.index(mst_indices[-1]) + 1 if len(mst_indices) == target else len(part)
+
+        profile.count('edges_examined', examined)
+        profile.count('finds', 2 * examined)
+        profile.count('unions', len(mst_indices))
+        return self._edges_at(mst_indices)
+
+    @staticmethod
+    def _filter_pivot(part, weights, share):
+        # The pivot is a low quantile rather than the median: the lower part
+        # only has to be large enough to finish the forest, and the share
+        # grows fourfold each time it turns out to be too small.
+        if len(part) <= FILTER_KRUSKAL_CUTOFF or share >= 1.0:
+            return None
+
+        step = max(1, len(part) // 2048)
+        sample = sorted(weights[i] for i in part[::step])
+        rank = int(share * len(sample))
+        if rank >= len(sample) - 1:
+            return None
+        return sample[rank]
 
+    def _connectivity(self):
+        # Insertions keep the disjoint set current; any removal drops it and
+        # the next query rebuilds it from the edge columns.
+        if self._components is None:
+            self._components = self._traverse_components()
+        return self._components
+
+    def _traverse_components(self):
+        # A traversal over the incidence arrays is cheaper than replaying
+        # every edge through union(); the result is written as a flat
+        # disjoint set in which each member points straight at its root.
+        columns = self._edge_columns
+        src = columns.src
+        dst = columns.dst
+        incidence = self._point_columns.incidence
+        components = DisjointSet(len(self.points))
+        parent = components.parent
+        seen = bytearray(len(self.points))
+        for root in range(len(seen)):
+            if seen[root]:
+                continue
+
+            seen[root] = 1
+            members = [root]
+            stack = [root]
+            while stack:
+                current = stack.pop()
+                for slot in incidence[current]:
+                    other = src[slot] + dst[slot] - current
+                    if not seen[other]:
+                        seen[other] = 1
+                        stack.append(other)
+                        members.append(other)
+
+            if len(members) > 1:
+                for member in members:
+                    parent[member] = root
+                components.rank[root] = 1
+                components.count -= len(members) - 1
+        return components
+
+    def component_count(self):
+        return self._connectivity().count
+
+    def same_component(self, point1, point2):
+        return self._connectivity().connected(point1._slot, point2._slot)
+
+    def component_labels(self):
+        components = self._connectivity()
+        labels = {}
+        return array('q', [labels.setdefault(components.find(slot), len(labels)) for slot in range(len(components))])
+
+    def component_sizes(self):
+        sizes = [0] * self.component_count()
+        for label in self.component_labels():
+            sizes[label] += 1
+        return sizes
+
+    def _forest_size(self):
+        # V - C when the components are already known, otherwise the upper
+        # bound V - 1; either way it is safe to stop once this many edges
+        # have been taken.
+        if self._components is None:
+            return max(len(self.points) - 1, 0)
+        return len(self.points) - self._components.count
+
+    def euclidean_mst(self):
+        columns = self._point_columns
+        profile = self.profile
+        profile.start('triangulation')
+        pairs = euclidean_mst_pairs(columns.xs, columns.ys, profile)
+        profile.stop('triangulation')
+
+        profile.start('edges')
+        mst_edges = []
+        reweighted = 0
+        for source_slot, dest_slot in pairs:
+            source = self.points[source_slot]
+            dest = self.points[dest_slot]
+            length = math.dist((source.x, source.y), (dest.x, dest.y))
+            edge = self.find_edge(source, dest)
+            if edge is None:
+                edge = self.add_edge(source, dest, length)
+                profile.count('edges_added')
+            elif not math.isclose(edge.weight, length, rel_tol=1e-9):
+                reweighted += 1
+            mst_edges.append(edge)
+        profile.stop('edges')
+        if reweighted:
+            profile.note('euclidean', f"рёбер дерева с весом, не равным длине: {reweighted}; вес MST посчитан по длинам")
         return mst_edges
 
+    def boruvka(self, workers=None):
+        if not self.points:
+            return []
+
+        columns = self._edge_columns
+        edges = (array('q', columns.src), array('q', columns.dst), array('d', columns.weights))
+        edge_count = len(columns)
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if edge_count < PARALLEL_BORUVKA_THRESHOLD:
+            workers = 1
+
+        shard_size = -(-edge_count // workers) if edge_count else 1
+        starts = range(0, edge_count, shard_size)
+        stops = [min(start + shard_size, edge_count) for start in starts]
+
+        executor = None
+        blocks = []
+        if workers > 1:
+            # The edges and the per-round labels live in shared memory; the
+            # labels block is rewritten in place each round.
+            blocks = _share_arrays(*edges, array('q', bytes(8 * len(self.points))))
+            try:
+                executor = ProcessPoolExecutor(workers, mp_context=POOL_CONTEXT, initializer=_init_boruvka_worker,
+                                               initargs=([block.name for block in blocks],))
+            except BaseException:
+                _release_shared(blocks)
+                raise
+
+        profile = self.profile
+        components = DisjointSet(len(self.points))
+        src, dst, _ = edges
+        mst_indices = []
+        target = self._forest_size()
+        futures = []
+        try:
+            while len(mst_indices) < target:
+                profile.count('rounds')
+                profile.start('labels')
+                labels = array('q', map(components.find, range(len(components))))
+                profile.stop('labels')
+
+                profile.start('cheapest')
+                cheapest = {}
+                if executor is None:
+                    # One shared dict filled in blocks, so a cancel request
+                    # is noticed between blocks of a round.
+                    block = 16 * CHECKPOINT_INTERVAL
+                    for start in range(0, edge_count, block):
+                        profile.checkpoint()
+                        _cheapest_edges(edges, labels, start, min(start + block, edge_count), cheapest)
+                else:
+                    _write_shared(blocks[3], labels)
+                    futures = [executor.submit(_cheapest_edges_shard, start, stop)
+                               for start, stop in zip(starts, stops)]
+                    for future in futures:
+                        profile.checkpoint()
+                        shard = future.result()
+                        for comp, candidate in shard.items():
+                            best = cheapest.get(comp)
+                            if best is None or candidate < best:
+                                cheapest[comp] = candidate
+
+                profile.stop('cheapest')
+                profile.count('edges_examined', edge_count)
+                if not cheapest:
+                    break
+
+                profile.start('union_find')
+                for _, edge_id in sorted(cheapest.values()):
+                    if components.union(src[edge_id], dst[edge_id]):
+                        mst_indices.append(edge_id)
+                profile.stop('union_find')
+                profile.count('finds', len(components) + 2 * len(cheapest))
+        finally:
+            if executor is not None:
+                # Shards not yet started are dropped so a cancel does not
+                # wait for the rest of the round.
+                for future in futures:
+                    future.cancel()
+                executor.shutdown()
+            _release_shared(blocks)
+
+        profile.count('unions', len(mst_indices))
+        return self._edges_at(mst_indices)
+
+    def to_arrays(self, csr=True):
+        if np is None:
+            raise RuntimeError("Для экспорта в массивы требуется NumPy")
+
+        columns = self._edge_columns
+        vertex_count = len(self.points)
+        src = np.frombuffer(columns.src, dtype=np.int64).copy()
+        dst = np.frombuffer(columns.dst, dtype=np.int64).copy()
+        weights = np.frombuffer(columns.weights, dtype=np.float64).copy()
+        if not csr:
+            return GraphArrays(vertex_count, src, dst, weights, None, None, None)
+
+        heads = np.concatenate((src, dst))
+        order = np.argsort(heads, kind='stable')
+        indices = np.concatenate((dst, src))[order]
+        edge_ids = np.concatenate((np.arange(len(src)), np.arange(len(src))))[order]
+
+        indptr = np.zeros(vertex_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(heads, minlength=vertex_count), out=indptr[1:])
+
+        return GraphArrays(vertex_count, src, dst, weights, indptr, indices, edge_ids)
+
+    def mst_scenarios(self, weights, workers=None):
+        # Column j of the weight matrix holds the weight of self.edges[j].
+        columns = self._edge_columns
+        return mst_scenarios(len(self.points), columns.src, columns.dst, weights, workers)
+
+    def kruskal_indices(self, arrays=None):
+        profile = self.profile
+        target = arrays.vertex_count - 1 if arrays is not None else self._forest_size()
+        if arrays is None:
+            arrays = self.to_arrays(csr=False)
+
+        profile.start('sort')
+        order = np.argsort(arrays.weights, kind='stable')
+        profile.stop('sort')
+
+        profile.start('union_find')
+        mst_indices = _kruskal_pass(arrays.vertex_count, target, order.tolist(),
+                                    arrays.src[order].tolist(), arrays.dst[order].tolist(), profile)
+        profile.stop('union_find')
+        if profile.enabled:
+            examined = len(order)
+            if mst_indices and len(mst_indices) == target:
+                examined = int(np.flatnonzero(order == mst_indices[-1])[0]) + 1
+            profile.count('edges_examined', examined)
+            profile.count('finds', 2 * examined)
+            profile.count('unions', len(mst_indices))
+        return np.array(mst_indices, dtype=np.int64)
+
+    def truncate(self, point_count, edge_count):
+        # Drops whatever was appended past the given sizes, newest first, so
+        # every removal pops the last slot and nothing else moves.
+        with self.transaction():
+            while len(self.edges) > edge_count:
+                self.remove_edge(self.edges[-1])
+            while len(self.points) > point_count:
+                self.remove_point(self.points[-1])
+
+    def replace_with(self, other):
+        # Takes over the points, edges and columns of a graph built on the
+        # side, e.g. by an import, so a load that fails halfway never
+        # touches this one. other is left empty.
+        with self.transaction():
+            self.clear()
+            self._point_columns, other._point_columns = other._point_columns, PointColumns(other)
+            self._edge_columns, other._edge_columns = other._edge_columns, EdgeColumns(other._point_columns, other)
+            self._point_columns.owner = self._edge_columns.owner = self
+            other._components = None
+
+            points = self.points
+            edges = self.edges
+            columns = self._edge_columns
+            if points:
+                self._changed_many(POINT_ADDED, points, array('q', [point.index for point in points]),
+                                   array('q', repeat(-1, len(points))), self._point_columns.xs,
+                                   self._point_columns.ys)
+            if edges:
+                self._changed_many(EDGE_ADDED, edges, array('q', [points[slot].index for slot in columns.src]),
+                                   array('q', [points[slot].index for slot in columns.dst]), columns.weights,
+                                   array('d', repeat(0.0, len(edges))))
+        return list(points), edges
+
     def clear(self):
-        self.points.clear()
-        self.edges.clear()
\ No newline at end of file
+        self._point_columns = PointColumns(self)
+        self._edge_columns = EdgeColumns(self._point_columns, self)
+        self._components = None
+        self._changed(CLEARED, None)
\ No newline at end of file
@@ -0,0 +1,604 @@
+import csv
+import gzip
+import io
+import json
+import lzma
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import warnings
+from array import array
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import partial
+from itertools import chain
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from graph import Graph
+
+# Binary layout: a fixed header followed by little-endian columns
+# xs, ys (float64 per point) and src, dst (int64), weights (float64)
+# per edge. Every column starts on an 8-byte boundary, so each one can be
+# viewed in place from a memory map.
+BINARY_MAGIC = b'MSTGRAPH'
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct('<8sIIQQ')
+BINARY_DTYPES = {'d': '<f8', 'q': '<i8'}
+# Columns are converted to Python objects this many values at a time, so
+# a load never holds a full list copy of a multi-million-edge column.
+LOAD_CHUNK_SIZE = 65536
+# Line-oriented files are read in blocks of this many bytes, cut back to
+# the last complete line; only one block of text is alive at a time.
+STREAM_CHUNK_BYTES = 1 << 20
+POINT_FIELDS = ('index', 'x', 'y')
+EDGE_FIELDS = ('source_index', 'dest_index', 'weight')
+COMPRESSORS = {
+    '.gz': partial(gzip.open, compresslevel=6),
+    '.xz': lzma.open,
+}
+# Points read from a DIMACS file without a .co companion are laid out on
+# a grid with this spacing.
+DIMACS_GRID_STEP = 40.0
+
+_HEADER_LINE = re.compile(r'^[ \t]*[A-Za-z_].*$', re.M)
+_CONTENT_LINE = re.compile(r'^[ \t]*\S', re.M)
+_NON_ARC_LINE = re.compile(r'^(?![ \t]*a[ \t]).*(?:\n|$)', re.M)
+_ARC_LINE = re.compile(r'^[ \t]*a[ \t]', re.M)
+
+BinaryColumns = namedtuple('BinaryColumns', ['xs', 'ys', 'src', 'dst', 'weights'])
+
+
+def _column_bytes(column):
+    if sys.byteorder == 'little':
+        return column
+    swapped = array(column.typecode, column)
+    swapped.byteswap()
+    return swapped
+
+
+def write_binary(graph, path):
+    points = graph._point_columns
+    edges = graph._edge_columns
+    with open(path, 'wb') as f:
+        f.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 0, len(points), len(edges)))
+        for column in (points.xs, points.ys, edges.src, edges.dst, edges.weights):
+            _column_bytes(column).tofile(f)
+
+
+def _view(buffer, offset, count, typecode):
+    if np is not None:
+        return np.frombuffer(buffer, dtype=BINARY_DTYPES[typecode], count=count, offset=offset)
+
+    view = memoryview(buffer)[offset:offset + 8 * count]
+    if sys.byteorder == 'little':
+        return view.cast(typecode)
+    column = array(typecode, view.tobytes())
+    column.byteswap()
+    return column
+
+
+def open_binary(path):
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < BINARY_HEADER.size:
+            raise ValueError(f"Файл {path} не является бинарным файлом графа")
+        # The map outlives the file object; the views below keep it open.
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, _, point_count, edge_count = BINARY_HEADER.unpack_from(buffer)
+    if magic != BINARY_MAGIC:
+        raise ValueError(f"Файл {path} не является бинарным файлом графа")
+    if version != BINARY_VERSION:
+        raise ValueError(f"Неподдерживаемая версия бинарного формата графа: {version}")
+    expected = BINARY_HEADER.size + 16 * point_count + 24 * edge_count
+    if size != expected:
+        raise ValueError(f"Файл графа повреждён: ожидалось {expected} байт, получено {size}")
+
+    offsets = []
+    offset = BINARY_HEADER.size
+    for count in (point_count, point_count, edge_count, edge_count, edge_count):
+        offsets.append(offset)
+        offset += 8 * count
+    return BinaryColumns(_view(buffer, offsets[0], point_count, 'd'),
+                         _view(buffer, offsets[1], point_count, 'd'),
+                         _view(buffer, offsets[2], edge_count, 'q'),
+                         _view(buffer, offsets[3], edge_count, 'q'),
+                         _view(buffer, offsets[4], edge_count, 'd'))
+
+
+def _column_chunks(column, progress):
+    for start in range(0, len(column), LOAD_CHUNK_SIZE):
+        if progress is not None:
+            progress(start, len(column))
+        yield column[start:start + LOAD_CHUNK_SIZE].tolist()
+
+
+def _chunked(column, progress=None):
+    return chain.from_iterable(_column_chunks(column, progress))
+
+
+def read_binary(path, graph, progress=None):
+    columns = open_binary(path)
+    first_slot = len(graph.points)
+    src = _chunked(columns.src)
+    dst = _chunked(columns.dst)
+    if first_slot:
+        src = map(first_slot.__add__, src)
+        dst = map(first_slot.__add__, dst)
+
+    with graph.transaction():
+        points = graph.add_points_bulk(zip(_chunked(columns.xs), _chunked(columns.ys)))
+        edges = graph.add_edges_bulk(zip(src, dst, _chunked(columns.weights, progress)))
+    return points, edges
+
+
+def open_file(path, mode, **kwargs):
+    extension = os.path.splitext(path)[1].lower()
+    return COMPRESSORS.get(extension, open)(path, mode, **kwargs)
+
+
+def write_json(graph, path):
+    with open_file(path, 'wt', encoding='utf-8') as f:
+        json.dump(graph.to_dict(), f, indent=2, ensure_ascii=False)
+
+
+def read_json(path, graph, progress=None):
+    with open_file(path, 'rt', encoding='utf-8') as f:
+        graph_data = json.load(f)
+    return graph.load_dict(graph_data)
+
+
+@contextmanager
+def _open_stream(path):
+    # Progress is measured on the file as stored, so for compressed files
+    # the raw file is opened separately and the decompressor wraps it.
+    with open(path, 'rb') as raw:
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.gz':
+            with gzip.GzipFile(fileobj=raw) as f:
+                yield f, raw
+        elif extension == '.xz':
+            with lzma.LZMAFile(raw) as f:
+                yield f, raw
+        else:
+            yield raw, raw
+
+
+def _text_chunks(f, raw, progress, total):
+    # Blocks are cut at the last newline, and a cut there never splits a
+    # UTF-8 sequence, so each block decodes on its own.
+    tail = b''
+    while True:
+        block = f.read(STREAM_CHUNK_BYTES)
+        if not block:
+            break
+        if progress is not None:
+            progress(raw.tell(), total)
+
+        block = tail + block
+        cut = block.rfind(b'\n') + 1
+        tail = block[cut:]
+        if cut:
+            yield block[:cut].decode('utf-8')
+    if tail:
+        yield tail.decode('utf-8') + '\n'
+
+
+def _parse_jsonl(blocks):
+    point_count = 0
+    for block in blocks:
+        indices, xs, ys = [], [], []
+        sources, dests, weights = [], [], []
+        for line in block.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if 'source_index' in record:
+                sources.append(record['source_index'])
+                dests.append(record['dest_index'])
+                weights.append(record.get('weight', 1.0))
+            else:
+                indices.append(record.get('index', point_count))
+                xs.append(record['x'])
+                ys.append(record['y'])
+                point_count += 1
+        yield (indices, xs, ys), (sources, dests, weights)
+
+
+def _parse_numbers(text, columns, delimiter=','):
+    # One C-level pass over a whole block instead of a split per line.
+    # loadtxt checks the field count of every row, so a short row is never
+    # paired up with the next one; anything irregular returns None and is
+    # left to the csv module, which also produces the error message.
+    if np is None:
+        return None
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            values = np.loadtxt(io.StringIO(text), delimiter=delimiter, comments=None, ndmin=2)
+    except (ValueError, UserWarning):
+        return None
+    if values.shape[1] != columns or len(values) != len(_CONTENT_LINE.findall(text)):
+        return None
+    return values
+
+
+def _integer_column(values):
+    if not np.array_equal(values, np.floor(values)):
+        raise ValueError("Номер вершины должен быть целым числом")
+    return values.astype(np.int64).tolist()
+
+
+def _csv_segment(segment, section, point_count, point_columns, edge_columns):
+    indices, xs, ys = point_columns
+    sources, dests, weights = edge_columns
+    width = {'points': 3, 'coordinates': 2, 'edges': 3, 'pairs': 2}[section]
+    values = _parse_numbers(segment, width)
+    if values is not None:
+        if section == 'points':
+            indices.extend(_integer_column(values[:, 0]))
+            xs.extend(values[:, 1].tolist())
+            ys.extend(values[:, 2].tolist())
+        elif section == 'coordinates':
+            indices.extend(range(point_count, point_count + len(values)))
+            xs.extend(values[:, 0].tolist())
+            ys.extend(values[:, 1].tolist())
+        else:
+            sources.extend(_integer_column(values[:, 0]))
+            dests.extend(_integer_column(values[:, 1]))
+            weights.extend(values[:, 2].tolist() if width == 3 else [1.0] * len(values))
+        return len(values) if section in ('points', 'coordinates') else 0
+
+    added = 0
+    for row in csv.reader(segment.splitlines()):
+        if not row or not ''.join(row).strip():
+            continue
+        try:
+            if section == 'points':
+                indices.append(int(row[0]))
+                xs.append(float(row[1]))
+                ys.append(float(row[2]))
+            elif section == 'coordinates':
+                indices.append(point_count + added)
+                xs.append(float(row[0]))
+                ys.append(float(row[1]))
+            else:
+                sources.append(int(row[0]))
+                dests.append(int(row[1]))
+                weights.append(float(row[2]) if width == 3 else 1.0)
+        except (ValueError, IndexError):
+            raise ValueError(f"Неверная строка CSV: {','.join(row)}") from None
+        if section in ('points', 'coordinates'):
+            added += 1
+    return added
+
+
+def _parse_csv(blocks):
+    # A header row switches sections: "index,x,y" (or "x,y") starts the
+    # points, "source_index,dest_index,weight" starts the edges. The rows
+    # between two headers are parsed as one block of numbers.
+    section = None
+    point_count = 0
+    for block in blocks:
+        point_columns = ([], [], [])
+        edge_columns = ([], [], [])
+        position = 0
+        for header in chain(_HEADER_LINE.finditer(block), [None]):
+            end = len(block) if header is None else header.start()
+            segment = block[position:end]
+            if _CONTENT_LINE.search(segment):
+                if section is None:
+                    raise ValueError("В CSV нет строки заголовка перед данными")
+                point_count += _csv_segment(segment, section, point_count, point_columns, edge_columns)
+            if header is not None:
+                section = _csv_section(next(csv.reader([header.group()])))
+                position = header.end()
+        yield point_columns, edge_columns
+
+
+def _csv_section(header):
+    fields = tuple(field.strip().lower() for field in header)
+    if fields == POINT_FIELDS:
+        return 'points'
+    if fields == POINT_FIELDS[1:]:
+        return 'coordinates'
+    if fields == EDGE_FIELDS:
+        return 'edges'
+    if fields == EDGE_FIELDS[:2]:
+        return 'pairs'
+    raise ValueError(f"Неизвестный заголовок CSV: {','.join(header)}")
+
+
+def stream_graph(path, graph, parse, progress=None):
+    slots = {}
+    points = []
+    first_edge = len(graph.edges)
+    with _open_stream(path) as (f, raw), graph.transaction():
+        total = os.fstat(raw.fileno()).st_size
+        for (indices, xs, ys), (sources, dests, weights) in parse(_text_chunks(f, raw, progress, total)):
+            added = graph.add_points_bulk(zip(xs, ys))
+            slots.update(zip(indices, (point._slot for point in added)))
+            points.extend(added)
+
+            try:
+                graph.add_edges_bulk(zip(map(slots.__getitem__, sources), map(slots.__getitem__, dests), weights))
+            except KeyError as e:
+                raise ValueError(f"Ребро ссылается на неизвестную вершину {e.args[0]}") from None
+    return points, graph.edges[first_edge:]
+
+
+def read_jsonl(path, graph, progress=None):
+    return stream_graph(path, graph, _parse_jsonl, progress)
+
+
+def read_csv(path, graph, progress=None):
+    return stream_graph(path, graph, _parse_csv, progress)
+
+
+def write_jsonl(graph, path):
+    with open_file(path, 'wt', encoding='utf-8') as f:
+        for point in graph.points:
+            f.write(json.dumps({'index': point.index, 'x': point.x, 'y': point.y}) + '\n')
+        for edge in graph.edges:
+            f.write(json.dumps({'source_index': edge.source.index, 'dest_index': edge.dest.index,
+                                'weight': edge.weight}) + '\n')
+
+
+def write_csv(graph, path):
+    with open_file(path, 'wt', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(POINT_FIELDS)
+        writer.writerows((point.index, point.x, point.y) for point in graph.points)
+        writer.writerow(EDGE_FIELDS)
+        writer.writerows((edge.source.index, edge.dest.index, edge.weight) for edge in graph.edges)
+
+
+def _dimacs_number(value):
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _coordinates_path(path):
+    # graph.gr.gz keeps its coordinates in graph.co.gz, as in the DIMACS
+    # shortest-path challenge files.
+    base, extension = os.path.splitext(path)
+    compression = ''
+    if extension.lower() in COMPRESSORS:
+        compression = extension
+        base = os.path.splitext(base)[0]
+    return base + '.co' + compression
+
+
+def write_dimacs(graph, path):
+    # Vertices are numbered from 1 in slot order and every edge is written
+    # as a pair of arcs, which is how DIMACS stores undirected graphs.
+    columns = graph._edge_columns
+    with open_file(path, 'wt', encoding='ascii') as f:
+        f.write(f"c MST graph\np sp {len(graph.points)} {2 * len(columns)}\n")
+        for source, dest, weight in zip(columns.src, columns.dst, columns.weights):
+            weight = _dimacs_number(weight)
+            f.write(f"a {source + 1} {dest + 1} {weight}\na {dest + 1} {source + 1} {weight}\n")
+
+    points = graph._point_columns
+    with open_file(_coordinates_path(path), 'wt', encoding='ascii') as f:
+        f.write(f"p aux sp co {len(points)}\n")
+        for vertex, (x, y) in enumerate(zip(points.xs, points.ys), 1):
+            f.write(f"v {vertex} {_dimacs_number(x)} {_dimacs_number(y)}\n")
+
+
+def _read_dimacs_coordinates(path, vertex_count):
+    xs = [math.nan] * vertex_count
+    ys = [math.nan] * vertex_count
+    with open_file(path, 'rt', encoding='ascii') as f:
+        for line in f:
+            if line.startswith('v'):
+                _, vertex, x, y = line.split()
+                xs[int(vertex) - 1] = float(x)
+                ys[int(vertex) - 1] = float(y)
+    if any(math.isnan(x) for x in xs):
+        raise ValueError(f"В {path} заданы координаты не всех вершин")
+    return xs, ys
+
+
+def _parse_dimacs(blocks):
+    vertex_count = None
+    for block in blocks:
+        if vertex_count is None:
+            problem = re.search(r'^p[ \t]+\S+[ \t]+(\d+)[ \t]+(\d+)', block, re.M)
+            if problem is None:
+                raise ValueError("В файле DIMACS нет строки 'p'")
+            vertex_count = int(problem.group(1))
+            yield vertex_count
+
+        arcs = _NON_ARC_LINE.sub('', block)
+        values = _parse_numbers(_ARC_LINE.sub(' ', arcs), 3, delimiter=None)
+        if values is None:
+            rows = [line.split()[1:4] for line in arcs.splitlines() if line.strip()]
+            try:
+                values = [(int(source), int(dest), float(weight)) for source, dest, weight in rows]
+            except ValueError:
+                raise ValueError("Неверная строка дуги в файле DIMACS") from None
+            yield [row[0] - 1 for row in values], [row[1] - 1 for row in values], [row[2] for row in values]
+        else:
+            yield ([slot - 1 for slot in _integer_column(values[:, 0])],
+                   [slot - 1 for slot in _integer_column(values[:, 1])], values[:, 2].tolist())
+
+
+def read_dimacs(path, graph, progress=None):
+    first_slot = len(graph.points)
+    first_edge = len(graph.edges)
+    coordinates_path = _coordinates_path(path)
+    with _open_stream(path) as (f, raw), graph.transaction():
+        arcs = _parse_dimacs(_text_chunks(f, raw, progress, os.fstat(raw.fileno()).st_size))
+        vertex_count = next(arcs, 0)
+        if os.path.exists(coordinates_path):
+            xs, ys = _read_dimacs_coordinates(coordinates_path, vertex_count)
+        else:
+            side = max(1, math.ceil(math.sqrt(vertex_count)))
+            xs = [DIMACS_GRID_STEP * (vertex % side) for vertex in range(vertex_count)]
+            ys = [DIMACS_GRID_STEP * (vertex // side) for vertex in range(vertex_count)]
+        points = graph.add_points_bulk(zip(xs, ys))
+
+        # Reverse arcs of an undirected edge are dropped by add_edges_bulk.
+        for sources, dests, weights in arcs:
+            if first_slot:
+                sources = [first_slot + slot for slot in sources]
+                dests = [first_slot + slot for slot in dests]
+            graph.add_edges_bulk(zip(sources, dests, weights))
+    return points, graph.edges[first_edge:]
+
+
+class EdgeStream:
+    # The edges of a file as column batches over vertex ids 0..n-1, read
+    # without building a Graph. labels[id] is the identifier the file uses
+    # for that vertex; it is complete once the batches are exhausted.
+    def __init__(self, path, progress=None):
+        self.path = path
+        self.progress = progress
+        self.format = file_format(path)
+        if self.format == '.json':
+            raise ValueError("JSON-граф нельзя прочитать потоком, сохраните его как .mstg, .csv, .jsonl или .gr")
+        self.labels = array('q')
+
+    @property
+    def vertex_count(self):
+        return len(self.labels)
+
+    def __iter__(self):
+        if self.format == '.mstg':
+            return self._binary_batches()
+        if self.format == '.gr':
+            return self._dimacs_batches()
+        return self._indexed_batches(_parse_csv if self.format == '.csv' else _parse_jsonl)
+
+    def _checked(self, sources, dests, weights):
+        vertex_count = len(self.labels)
+        for slots in (sources, dests):
+            if slots and (min(slots) < 0 or max(slots) >= vertex_count):
+                raise IndexError("Ребро ссылается на несуществующую вершину")
+        return sources, dests, weights
+
+    def _binary_batches(self):
+        columns = open_binary(self.path)
+        self.labels.extend(range(len(columns.xs)))
+        batches = zip(_column_chunks(columns.src, self.progress), _column_chunks(columns.dst, None),
+                      _column_chunks(columns.weights, None))
+        for sources, dests, weights in batches:
+            yield self._checked(sources, dests, weights)
+
+    def _dimacs_batches(self):
+        with _open_stream(self.path) as (f, raw):
+            arcs = _parse_dimacs(_text_chunks(f, raw, self.progress, os.fstat(raw.fileno()).st_size))
+            self.labels.extend(range(1, next(arcs, 0) + 1))
+            for sources, dests, weights in arcs:
+                yield self._checked(sources, dests, weights)
+
+    def _indexed_batches(self, parse):
+        # As in stream_graph, a repeated index rebinds to the later point.
+        labels = self.labels
+        ids = {}
+        with _open_stream(self.path) as (f, raw):
+            total = os.fstat(raw.fileno()).st_size
+            for (indices, _, _), (sources, dests, weights) in parse(_text_chunks(f, raw, self.progress, total)):
+                ids.update(zip(indices, range(len(labels), len(labels) + len(indices))))
+                labels.extend(indices)
+                try:
+                    batch = list(map(ids.__getitem__, sources)), list(map(ids.__getitem__, dests)), weights
+                except KeyError as e:
+                    raise ValueError(f"Ребро ссылается на неизвестную вершину {e.args[0]}") from None
+                yield batch
+
+
+READERS = {
+    '.json': read_json,
+    '.mstg': read_binary,
+    '.jsonl': read_jsonl,
+    '.csv': read_csv,
+    '.gr': read_dimacs,
+}
+WRITERS = {
+    '.json': write_json,
+    '.mstg': write_binary,
+    '.jsonl': write_jsonl,
+    '.csv': write_csv,
+    '.gr': write_dimacs,
+}
+# The binary format is read through a memory map of the file itself.
+UNCOMPRESSED_ONLY = {'.mstg'}
+FILE_FILTERS = {
+    '.json': "Graph Files (*.json)",
+    '.mstg': "Binary Graph Files (*.mstg)",
+    '.jsonl': "JSON Lines (*.jsonl)",
+    '.csv': "CSV Edge List (*.csv)",
+    '.gr': "DIMACS (*.gr)",
+    '.json.gz': "Compressed Graph Files (*.json.gz)",
+    '.json.xz': "Compressed Graph Files (*.json.xz)",
+}
+
+
+def open_file_filter():
+    patterns = ' '.join(f'*{extension}' for extension in READERS)
+    compressed = ' '.join(f'*{extension}{compression}' for extension in READERS
+                          if extension not in UNCOMPRESSED_ONLY for compression in COMPRESSORS)
+    return ';;'.join([f"All Graph Files ({patterns} {compressed})", *FILE_FILTERS.values()])
+
+
+def save_file_filter():
+    return ';;'.join(FILE_FILTERS.values())
+
+
+def is_graph_file(path):
+    try:
+        file_format(path)
+    except ValueError:
+        return False
+    return True
+
+
+def with_extension(path, selected_filter):
+    if is_graph_file(path):
+        return path
+    for extension, file_filter in FILE_FILTERS.items():
+        if file_filter == selected_filter:
+            return path + extension
+    return path
+
+
+def file_format(path):
+    base, extension = os.path.splitext(path.lower())
+    compression = ''
+    if extension in COMPRESSORS:
+        compression = extension
+        extension = os.path.splitext(base)[1]
+    if extension not in READERS or (compression and extension in UNCOMPRESSED_ONLY):
+        raise ValueError(f"Неизвестный формат файла графа: {path}")
+    return extension
+
+
+def load_graph(path, graph, progress=None):
+    # Streaming readers add rows as they go; a file that fails halfway is
+    # rolled back so the graph never keeps a partial import.
+    reader = READERS[file_format(path)]
+    point_count = len(graph.points)
+    edge_count = len(graph.edges)
+    try:
+        return reader(path, graph, progress)
+    except BaseException:
+        graph.truncate(point_count, edge_count)
+        raise
+
+
+def read_graph(path):
+    graph = Graph()
+    load_graph(path, graph)
+    return graph
+
+
+def save_graph(graph, path):
+    WRITERS[file_format(path)](graph, path)
@@ -38,20 +38,23 @@ class Node(QGraphicsEllipseItem):
     def itemChange(self, change, value):
         if change == QGraphicsItem.ItemPositionChange:
             new_pos = value
-            self.point.x = new_pos.x()
-            self.point.y = new_pos.y()
-            
-            for edge in self.point.edges:
-                if hasattr(edge, 'graphics_item'):
-                    edge.graphics_item.adjust()
-                    edge.graphics_item.update_text_pos()
+            scene = self.scene()
+            if scene is not None:
+                scene.graph.move_point(self.point, new_pos.x(), new_pos.y())
+                for edge in self.point.edges:
+                    graphics_edge = scene.edge_items.get(edge)
+                    if graphics_edge is not None:
+                        graphics_edge.adjust()
+                        graphics_edge.update_text_pos()
+            else:
+                self.point.x = new_pos.x()
+                self.point.y = new_pos.y()
         return super().itemChange(change, value)
 
 class GraphicsEdge(QGraphicsLineItem):
     def __init__(self, edge):
         super().__init__()
         self.edge = edge
-        edge.graphics_item = self
         self.setPen(QPen(Qt.black, 2))
         self.adjust()
         
@@ -71,7 +74,10 @@ class GraphicsEdge(QGraphicsLineItem):
     def update_weight(self):
         try:
             new_weight = float(self.weight_text.toPlainText())
-            self.edge.weight = new_weight
+            if self.scene() is not None:
+                self.scene().graph.set_edge_weight(self.edge, new_weight)
+            else:
+                self.edge.weight = new_weight
             self.weight_text.setPlainText(f"{self.edge.weight:.1f}")
         except ValueError:
             self.weight_text.setPlainText(f"{self.edge.weight:.1f}")
\ No newline at end of file
@@ -1,11 +1,16 @@
 import math
+from itertools import islice
 from PySide6.QtWidgets import *
 from PySide6.QtCore import *
 from PySide6.QtGui import *
 
 from graphics_items import *
+from dynamic_mst import DynamicMST
+from graph import ALGORITHMS
 
 class GraphicsScene(QGraphicsScene):
+    animation_finished = Signal(list)
+
     def __init__(self, graph):
         super().__init__()
         self.graph = graph
@@ -15,9 +20,17 @@ class GraphicsScene(QGraphicsScene):
         self.current_algorithm = None
         self.drag_node = None
         self.is_dragging_edge = False
+        self.dynamic_mst = None
         
         self.node_items = {}
         self.edge_items = {}
+        self.graph.subscribe(self.on_graph_changed)
+        
+        self.animation_steps = None
+        self.animation_edges = []
+        self.steps_per_frame = 1
+        self.animation_timer = QTimer()
+        self.animation_timer.timeout.connect(self.animation_frame)
 
     def set_mode(self, mode):
         self.mode = mode
@@ -80,6 +93,8 @@ class GraphicsScene(QGraphicsScene):
 
     def add_edge(self, edge):
         graphics_edge = GraphicsEdge(edge)
+        if self.dynamic_mst and edge in self.dynamic_mst:
+            graphics_edge.setPen(QPen(Qt.red, 3))
         self.edge_items[edge] = graphics_edge
         self.addItem(graphics_edge)
 
@@ -152,13 +167,9 @@ class GraphicsScene(QGraphicsScene):
         self.is_dragging_edge = False
 
     def remove_node(self, node):
-        edges_to_remove = []
-        for edge, graphics_edge in self.edge_items.items():
-            if edge.source == node.point or edge.dest == node.point:
-                edges_to_remove.append(graphics_edge)
-        
-        for graphics_edge in edges_to_remove:
-            self.remove_edge(graphics_edge)
+        for edge in node.point.edges:
+            if edge in self.edge_items:
+                self.remove_edge(self.edge_items[edge])
         
         self.graph.remove_point(node.point)
         self.removeItem(node)
@@ -171,24 +182,87 @@ class GraphicsScene(QGraphicsScene):
         if graphics_edge.edge in self.edge_items:
             del self.edge_items[graphics_edge.edge]
 
-    def run_algorithm(self):
-        if self.current_algorithm == "прим":
-            mst_edges = self.graph.prim()
-        elif self.current_algorithm == "краскал":
-            mst_edges = self.graph.kruskal()
-        else:
-            return None
+    def on_graph_changed(self, graph, events):
+        if self.animation_steps is not None:
+            self.stop_animation()
+            self.highlight_mst([])
+        if self.dynamic_mst:
+            self.apply_mst_changes(*self.dynamic_mst.apply(events))
+
+    def set_dynamic_mst(self, enabled):
+        self.dynamic_mst = DynamicMST(self.graph) if enabled else None
+        self.highlight_mst(self.dynamic_mst.edges if enabled else [])
+
+    def apply_mst_changes(self, added, removed):
+        for edge in removed:
+            if edge in self.edge_items:
+                self.edge_items[edge].setPen(QPen(Qt.black, 2))
+        for edge in added:
+            if edge in self.edge_items:
+                self.edge_items[edge].setPen(QPen(Qt.red, 3))
 
+    def highlight_mst(self, mst_edges):
         for graphics_edge in self.edge_items.values():
             graphics_edge.setPen(QPen(Qt.black, 2))
 
         for edge in mst_edges:
             if edge in self.edge_items:
                 self.edge_items[edge].setPen(QPen(Qt.red, 3))
-        
+
+    def run_algorithm(self):
+        if self.current_algorithm not in ALGORITHMS:
+            return None
+
+        mst_edges = self.graph.minimum_spanning_tree(self.current_algorithm)
+        self.show_mst(mst_edges)
         return mst_edges
 
+    def show_mst(self, mst_edges):
+        with self.graph.profile.span('highlight'):
+            for edge in mst_edges:
+                if edge not in self.edge_items:
+                    self.add_edge(edge)
+
+            self.highlight_mst(mst_edges)
+
+    def animate_mst(self, steps, steps_per_second, frames_per_second=30):
+        # Steps are pulled from the generator in batches, one batch per
+        # frame, so a fast rate does not cost one repaint per edge.
+        self.stop_animation()
+        self.highlight_mst([])
+        self.animation_steps = steps
+        self.animation_edges = []
+        frames_per_second = min(frames_per_second, steps_per_second)
+        self.steps_per_frame = math.ceil(steps_per_second / frames_per_second)
+        self.animation_timer.start(1000 // frames_per_second)
+
+    def animation_frame(self):
+        taken = 0
+        edges = self.graph.edges
+        for slot, accepted, _ in islice(self.animation_steps, self.steps_per_frame):
+            taken += 1
+            edge = edges[slot]
+            graphics_edge = self.edge_items.get(edge)
+            if accepted:
+                self.animation_edges.append(edge)
+                if graphics_edge is not None:
+                    graphics_edge.setPen(QPen(Qt.red, 3))
+            elif graphics_edge is not None:
+                graphics_edge.setPen(QPen(Qt.lightGray, 2))
+
+        if taken < self.steps_per_frame:
+            mst_edges = self.animation_edges
+            self.stop_animation()
+            self.highlight_mst(mst_edges)
+            self.animation_finished.emit(mst_edges)
+
+    def stop_animation(self):
+        self.animation_timer.stop()
+        self.animation_steps = None
+        self.animation_edges = []
+
     def clear(self):
+        self.stop_animation()
         self.graph.clear()
         self.node_items.clear()
         self.edge_items.clear()
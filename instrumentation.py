@@ -0,0 +1,104 @@
+from contextlib import contextmanager, nullcontext
+from time import perf_counter_ns
+
+# Long loops call checkpoint() once per this many iterations, so a cancel
+# request is noticed within a few milliseconds even inside one phase.
+CHECKPOINT_INTERVAL = 4096
+
+
+class Cancelled(Exception):
+    pass
+
+
+class Profile:
+    # A cancellation request from another thread is noticed at the next
+    # phase boundary (start()) or loop checkpoint, whichever comes first.
+    __slots__ = ('spans', 'counters', 'notes', 'phase', 'cancelled', '_started')
+    enabled = True
+
+    def __init__(self, spans=None, counters=None, notes=None):
+        self.spans = dict(spans or {})
+        self.counters = dict(counters or {})
+        self.notes = dict(notes or {})
+        self.phase = None
+        self.cancelled = False
+        self._started = {}
+
+    def start(self, name):
+        if self.cancelled:
+            raise Cancelled(name)
+        self.phase = name
+        self._started[name] = perf_counter_ns()
+
+    def checkpoint(self):
+        if self.cancelled:
+            raise Cancelled(self.phase)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def stop(self, name):
+        elapsed = perf_counter_ns() - self._started.pop(name)
+        self.spans[name] = self.spans.get(name, 0) + elapsed
+        return elapsed
+
+    @contextmanager
+    def span(self, name):
+        self.start(name)
+        try:
+            yield self
+        finally:
+            self.stop(name)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def note(self, name, text):
+        self.notes[name] = text
+
+    def seconds(self, name):
+        return self.spans.get(name, 0) / 1e9
+
+    def to_dict(self):
+        data = {'spans_ns': dict(self.spans), 'counters': dict(self.counters)}
+        if self.notes:
+            data['notes'] = dict(self.notes)
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('spans_ns'), data.get('counters'), data.get('notes'))
+
+    def summary(self):
+        spans = ", ".join(f"{name} {elapsed / 1e6:.2f} мс" for name, elapsed in self.spans.items())
+        counters = ", ".join(f"{name} {value}" for name, value in self.counters.items())
+        notes = ", ".join(f"{name}: {text}" for name, text in self.notes.items())
+        return "; ".join(part for part in (spans, counters, notes) if part)
+
+
+class NullProfile:
+    # Stand-in used while profiling is off: the algorithms call it once per
+    # phase, never per edge, so leaving the calls in costs a few hundred ns.
+    __slots__ = ()
+    enabled = False
+
+    def start(self, name):
+        pass
+
+    def stop(self, name):
+        return 0
+
+    def checkpoint(self):
+        pass
+
+    def span(self, name):
+        return nullcontext(self)
+
+    def count(self, name, amount=1):
+        pass
+
+    def note(self, name, text):
+        pass
+
+
+NULL_PROFILE = NullProfile()
@@ -0,0 +1,65 @@
+from array import array
+from collections import namedtuple
+from itertools import repeat
+
+POINT_ADDED = 1
+POINT_REMOVED = 2
+POINT_MOVED = 3
+EDGE_ADDED = 4
+EDGE_REMOVED = 5
+WEIGHT_CHANGED = 6
+CLEARED = 7
+
+JournalEntry = namedtuple('JournalEntry', ['seq', 'kind', 'first', 'second', 'value', 'extra'])
+GraphEvent = namedtuple('GraphEvent', ['seq', 'kind', 'item', 'old'])
+
+
+class ChangeJournal:
+    __slots__ = ('first_seq', 'kinds', 'firsts', 'seconds', 'values', 'extras')
+
+    def __init__(self):
+        self.first_seq = 1
+        self.kinds = array('B')
+        self.firsts = array('q')
+        self.seconds = array('q')
+        self.values = array('d')
+        self.extras = array('d')
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @property
+    def last_seq(self):
+        return self.first_seq + len(self.kinds) - 1
+
+    def record(self, kind, first=-1, second=-1, value=0.0, extra=0.0):
+        self.kinds.append(kind)
+        self.firsts.append(first)
+        self.seconds.append(second)
+        self.values.append(value)
+        self.extras.append(extra)
+        return self.last_seq
+
+    def record_many(self, kind, firsts, seconds, values, extras):
+        start = self.last_seq + 1
+        self.kinds.extend(repeat(kind, len(firsts)))
+        self.firsts.extend(firsts)
+        self.seconds.extend(seconds)
+        self.values.extend(values)
+        self.extras.extend(extras)
+        return start
+
+    def since(self, seq):
+        if seq + 1 < self.first_seq:
+            raise LookupError(f"Журнал изменений усечён до #{self.first_seq}, запрошено с #{seq + 1}")
+
+        start = seq + 1 - self.first_seq
+        for offset in range(start, len(self.kinds)):
+            yield JournalEntry(self.first_seq + offset, self.kinds[offset], self.firsts[offset],
+                               self.seconds[offset], self.values[offset], self.extras[offset])
+
+    def trim(self, seq):
+        count = min(max(seq + 1 - self.first_seq, 0), len(self.kinds))
+        for column in (self.kinds, self.firsts, self.seconds, self.values, self.extras):
+            del column[:count]
+        self.first_seq += count
\ No newline at end of file
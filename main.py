@@ -1,14 +1,16 @@
+import os
 import sys
-import json
-import time
 from datetime import datetime
 from PySide6.QtWidgets import *
 from PySide6.QtCore import *
 from PySide6.QtGui import *
 
-from graph import Graph
+from graph import Graph, ALGORITHMS, AUTO_ALGORITHM, STEP_ALGORITHMS, mst_weight
+from instrumentation import Profile
 from graphics_scene import GraphicsScene
+from mst_worker import MSTWorker, apply_snapshot_mst
 from database import GraphDatabase
+import graph_io
 
 class GraphListWidget(QWidget):
     def __init__(self, graph, scene):
@@ -69,8 +71,12 @@ class GraphListWidget(QWidget):
         vertex_count = len(self.graph.points)
         edge_count = len(self.graph.edges)
         info_text = f"Вершин: {vertex_count}\nРёбер: {edge_count}"
+        if vertex_count:
+            info_text += f"\nКомпонент связности: {self.graph.component_count()}"
         
-        if self.algorithm_name and self.mst_weight is not None:
+        if self.scene.dynamic_mst:
+            info_text += f"\n\nДинамическое MST: {self.scene.dynamic_mst.total_weight:.2f}"
+        elif self.algorithm_name and self.mst_weight is not None:
             info_text += f"\n\nАлгоритм: {self.algorithm_name}\nВес MST: {self.mst_weight:.2f}"
         
         self.info_text.setPlainText(info_text)
@@ -97,9 +103,9 @@ class DatabaseDialog(QDialog):
         layout = QVBoxLayout()
         
         self.results_table = QTableWidget()
-        self.results_table.setColumnCount(7)
+        self.results_table.setColumnCount(8)
         self.results_table.setHorizontalHeaderLabels([
-            "ID", "Граф", "Алгоритм", "Вес MST", "Время (сек)", "Дата", "Вершин/Рёбер"
+            "ID", "Граф", "Алгоритм", "Вес MST", "Время (сек)", "Дата", "Вершин/Рёбер", "Профиль"
         ])
         self.results_table.setSelectionBehavior(QTableWidget.SelectRows)
         self.results_table.doubleClicked.connect(self.load_result)
@@ -148,6 +154,14 @@ class DatabaseDialog(QDialog):
                 result['timestamp'].split('.')[0] if isinstance(result['timestamp'], str) else str(result['timestamp'])
             ))
             self.results_table.setItem(i, 6, QTableWidgetItem(f"{vertex_count}/{edge_count}"))
+            
+            profile_item = QTableWidgetItem("N/A")
+            if result.get('profile'):
+                profile = Profile.from_dict(result['profile'])
+                profile_item.setText(", ".join(
+                    f"{name} {elapsed / 1e6:.2f} мс" for name, elapsed in profile.spans.items()))
+                profile_item.setToolTip(profile.summary().replace("; ", "\n"))
+            self.results_table.setItem(i, 7, profile_item)
         
         self.results_table.resizeColumnsToContents()
     
@@ -216,10 +230,25 @@ class MainWindow(QMainWindow):
         
         self.create_toolbar()
         self.create_menubar()
+        self.scene.animation_finished.connect(self.on_animation_finished)
         
         self.update_timer = QTimer()
+        self.update_timer.setSingleShot(True)
+        self.update_timer.setInterval(100)
         self.update_timer.timeout.connect(self.graph_list_widget.update_graph_info)
-        self.update_timer.start(500)
+        self.graph.subscribe(self.on_graph_changed)
+        
+        self.thread_pool = QThreadPool(self)
+        self.worker = None
+        self.retired_workers = []
+        self.worker_clock = QElapsedTimer()
+        self.progress_timer = QTimer()
+        self.progress_timer.setInterval(200)
+        self.progress_timer.timeout.connect(self.update_progress)
+        
+    def on_graph_changed(self, graph, events):
+        if not self.update_timer.isActive():
+            self.update_timer.start()
         
     def create_menubar(self):
         menubar = self.menuBar()
@@ -277,8 +306,32 @@ class MainWindow(QMainWindow):
         self.kruskal_action.triggered.connect(lambda: self.set_algorithm("Краскал"))
         self.algorithm_group.addAction(self.kruskal_action)
         
+        self.boruvka_action = QAction("Борувка", self)
+        self.boruvka_action.setCheckable(True)
+        self.boruvka_action.triggered.connect(lambda: self.set_algorithm("Борувка"))
+        self.algorithm_group.addAction(self.boruvka_action)
+        
+        self.euclidean_action = QAction("Евклидово MST", self)
+        self.euclidean_action.setCheckable(True)
+        self.euclidean_action.triggered.connect(lambda: self.set_algorithm("Евклидово MST"))
+        self.algorithm_group.addAction(self.euclidean_action)
+        
+        self.auto_action = QAction("Авто", self)
+        self.auto_action.setCheckable(True)
+        self.auto_action.setToolTip("Выбрать алгоритм по размеру, плотности и весам графа")
+        self.auto_action.triggered.connect(lambda: self.set_algorithm("Авто"))
+        self.algorithm_group.addAction(self.auto_action)
+        
         toolbar.addAction(self.prim_action)
         toolbar.addAction(self.kruskal_action)
+        toolbar.addAction(self.boruvka_action)
+        toolbar.addAction(self.euclidean_action)
+        toolbar.addAction(self.auto_action)
+        
+        self.dynamic_mst_action = QAction("Динамическое MST", self)
+        self.dynamic_mst_action.setCheckable(True)
+        self.dynamic_mst_action.toggled.connect(self.set_dynamic_mst)
+        toolbar.addAction(self.dynamic_mst_action)
         
         toolbar.addSeparator()
         
@@ -286,6 +339,17 @@ class MainWindow(QMainWindow):
         self.run_algorithm_action.triggered.connect(self.run_algorithm)
         toolbar.addAction(self.run_algorithm_action)
         
+        self.animate_action = QAction("Анимация", self)
+        self.animate_action.setToolTip("Показать построение MST по шагам (Прим, Краскал)")
+        self.animate_action.triggered.connect(self.animate_algorithm)
+        toolbar.addAction(self.animate_action)
+        
+        self.animation_speed = QSpinBox()
+        self.animation_speed.setRange(1, 1000000)
+        self.animation_speed.setValue(20)
+        self.animation_speed.setSuffix(" шагов/с")
+        toolbar.addWidget(self.animation_speed)
+        
         self.export_action = QAction("Экспорт", self)
         self.export_action.triggered.connect(self.export_graph)
         toolbar.addAction(self.export_action)
@@ -302,6 +366,17 @@ class MainWindow(QMainWindow):
         
         self.status_bar = QStatusBar()
         self.setStatusBar(self.status_bar)
+        
+        self.cancel_button = QPushButton("Отмена")
+        self.cancel_button.setVisible(False)
+        self.cancel_button.clicked.connect(self.cancel_algorithm)
+        self.status_bar.addPermanentWidget(self.cancel_button)
+        
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setMaximumWidth(200)
+        self.progress_bar.setVisible(False)
+        self.status_bar.addPermanentWidget(self.progress_bar)
         self.update_status()
         
     def set_mode(self, mode):
@@ -314,69 +389,179 @@ class MainWindow(QMainWindow):
             self.prim_action.setChecked(True)
         elif algorithm == "Краскал":
             self.kruskal_action.setChecked(True)
+        elif algorithm == "Борувка":
+            self.boruvka_action.setChecked(True)
+        elif algorithm == "Евклидово MST":
+            self.euclidean_action.setChecked(True)
+        elif algorithm == "Авто":
+            self.auto_action.setChecked(True)
         self.status_bar.showMessage(f"Выбранный алгоритм: {algorithm}")
         
-    def run_algorithm(self):
-        if self.scene.current_algorithm:
-            graph_name, ok = QInputDialog.getText(
-                self, "Сохранение результата", 
-                "Введите название для этого графа:",
-                text=f"Граф_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            )
-            
-            if not ok or not graph_name:
-                return
-            
-            start_time = time.time()
-            mst_edges = self.scene.run_algorithm()
-            execution_time = time.time() - start_time
-            
-            if mst_edges is not None:
-                total_weight = sum(edge.weight for edge in mst_edges)
-                
-                algorithm_name = self.scene.current_algorithm.capitalize()
-                self.graph_list_widget.set_algorithm_result(algorithm_name, total_weight)
-                
-                graph_data = self.get_graph_data()
-                
-                mst_edges_data = []
-                for edge in mst_edges:
-                    mst_edges_data.append({
-                        'source_index': edge.source.index,
-                        'dest_index': edge.dest.index,
-                        'weight': edge.weight
-                    })
-                
-                self.database.save_algorithm_result(
-                    graph_name=graph_name,
-                    graph_data=graph_data,
-                    algorithm_name=algorithm_name,
-                    mst_weight=total_weight,
-                    mst_edges=mst_edges_data,
-                    execution_time=execution_time
-                )
-                
-                self.status_bar.showMessage(
-                    f"Алгоритм {algorithm_name} выполнен. Вес MST: {total_weight:.2f}. Результат сохранен в БД."
-                )
-            else:
-                self.status_bar.showMessage(f"Запуск {self.scene.current_algorithm.capitalize()} алгоритма")
-            
-            self.graph_list_widget.update_graph_info()
+    def set_dynamic_mst(self, enabled):
+        self.scene.set_dynamic_mst(enabled)
+        if enabled:
+            self.status_bar.showMessage("Динамическое MST: дерево обновляется при изменении графа")
         else:
+            self.status_bar.showMessage("Динамическое MST выключено")
+        
+    def run_algorithm(self):
+        if not self.scene.current_algorithm:
             self.status_bar.showMessage("Сперва выберите алгоритм")
+            return
+        if self.worker is not None:
+            self.status_bar.showMessage("Алгоритм уже выполняется")
+            return
+        
+        graph_name, ok = QInputDialog.getText(
+            self, "Сохранение результата", 
+            "Введите название для этого графа:",
+            text=f"Граф_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        )
+        
+        if not ok or not graph_name:
+            return
+        
+        algorithm = self.scene.current_algorithm
+        if algorithm not in ALGORITHMS:
+            self.status_bar.showMessage(f"Запуск {algorithm.capitalize()} алгоритма")
+            return
+        
+        profile = Profile()
+        if (self.graph.version, algorithm) in self.graph.mst_cache:
+            with self.graph.profiling(profile):
+                mst_edges = self.scene.run_algorithm()
+            self.save_algorithm_result(graph_name, algorithm, mst_edges, profile)
+            return
+        
+        # The worker gets its own copy of the graph; edits made meanwhile
+        # bump the version and the result is then dropped, not applied.
+        worker = MSTWorker(self.graph.snapshot(), algorithm, profile)
+        worker.signals.finished.connect(lambda result: self.on_algorithm_finished(worker, graph_name, result))
+        worker.signals.failed.connect(lambda message: self.on_algorithm_failed(worker, message))
+        worker.signals.cancelled.connect(lambda: self.release_worker(worker))
+        self.worker = worker
+        self.worker_clock.start()
+        self.progress_timer.start()
+        self.cancel_button.setVisible(True)
+        self.update_progress()
+        self.thread_pool.start(worker)
+    
+    def animate_algorithm(self):
+        algorithm = self.scene.current_algorithm
+        if algorithm not in STEP_ALGORITHMS:
+            self.status_bar.showMessage("Анимация доступна для алгоритмов Прима и Краскала")
+            return
+        
+        self.animation_algorithm = algorithm
+        self.scene.animate_mst(self.graph.mst_steps(algorithm), self.animation_speed.value())
+        self.status_bar.showMessage(f"Анимация алгоритма {algorithm.capitalize()}")
+    
+    def on_animation_finished(self, mst_edges):
+        total_weight = sum(edge.weight for edge in mst_edges)
+        self.status_bar.showMessage(
+            f"Анимация алгоритма {self.animation_algorithm.capitalize()} завершена. Вес MST: {total_weight:.2f}"
+        )
+    
+    def update_progress(self):
+        if self.worker is None:
+            return
+        phase = self.worker.profile.phase
+        self.status_bar.showMessage(
+            f"Выполняется {self.worker.algorithm.capitalize()}: {self.worker_clock.elapsed() / 1000:.1f} с"
+            f"{f', этап {phase}' if phase else ''}"
+        )
+    
+    def release_worker(self, worker):
+        if worker is not self.worker:
+            self.retired_workers.remove(worker)
+            return False
+        self.worker = None
+        self.progress_timer.stop()
+        self.cancel_button.setVisible(False)
+        return True
+    
+    def cancel_algorithm(self):
+        if self.worker is None:
+            return
+        # Cancellation is noticed at the next loop checkpoint; until then
+        # the worker is kept alive here and its result is ignored.
+        worker = self.worker
+        worker.cancel()
+        self.release_worker(worker)
+        self.retired_workers.append(worker)
+        self.status_bar.showMessage(f"Алгоритм {worker.algorithm.capitalize()} отменён")
+    
+    def on_algorithm_failed(self, worker, message):
+        if self.release_worker(worker):
+            QMessageBox.critical(self, "Ошибка алгоритма", f"Не удалось выполнить алгоритм: {message}")
+    
+    def on_algorithm_finished(self, worker, graph_name, result):
+        if not self.release_worker(worker):
+            return
+        
+        mst_edges = apply_snapshot_mst(self.graph, result)
+        if mst_edges is None:
+            self.status_bar.showMessage(
+                f"Граф изменился во время работы алгоритма {result.algorithm.capitalize()}, результат не применён"
+            )
+            return
+        
+        with self.graph.profiling(worker.profile):
+            self.scene.show_mst(mst_edges)
+        self.save_algorithm_result(graph_name, result.algorithm, mst_edges, worker.profile)
+    
+    def save_algorithm_result(self, graph_name, algorithm, mst_edges, profile):
+        execution_time = profile.seconds('mst')
+        from_cache = 'cache_hits' in profile.counters
+        total_weight = mst_weight(mst_edges, algorithm)
+        
+        algorithm_name = algorithm.capitalize()
+        if algorithm == AUTO_ALGORITHM:
+            algorithm_name = f"{algorithm_name} → {self.graph.last_choice.algorithm.capitalize()}"
+        self.graph_list_widget.set_algorithm_result(algorithm_name, total_weight)
+        
+        graph_data = self.get_graph_data()
+        
+        mst_edges_data = []
+        for edge in mst_edges:
+            mst_edges_data.append({
+                'source_index': edge.source.index,
+                'dest_index': edge.dest.index,
+                'weight': edge.weight
+            })
+        
+        self.database.save_algorithm_result(
+            graph_name=graph_name,
+            graph_data=graph_data,
+            algorithm_name=algorithm_name,
+            mst_weight=total_weight,
+            mst_edges=mst_edges_data,
+            execution_time=execution_time,
+            profile=profile.to_dict()
+        )
+        
+        self.status_bar.showMessage(
+            f"Алгоритм {algorithm_name} выполнен{' (из кэша)' if from_cache else ''}. "
+            f"Вес MST: {total_weight:.2f}. Результат сохранен в БД."
+        )
+        self.graph_list_widget.update_graph_info()
+    
+    def closeEvent(self, event):
+        if self.worker is not None:
+            self.cancel_algorithm()
+        self.thread_pool.waitForDone()
+        self.database.close()
+        super().closeEvent(event)
     
     def export_graph(self):
-        file_path, _ = QFileDialog.getSaveFileName(
-            self, "Экспорт графа", "", "Graph Files (*.json)"
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Экспорт графа", "", graph_io.save_file_filter()
         )
         
         if file_path:
             try:
-                graph_data = self.get_graph_data()
-                
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(graph_data, f, indent=2, ensure_ascii=False)
+                file_path = graph_io.with_extension(file_path, selected_filter)
+                graph_io.save_graph(self.graph, file_path)
                 
                 self.status_bar.showMessage(f"Граф экспортирован в {file_path}")
                 
@@ -385,61 +570,52 @@ class MainWindow(QMainWindow):
     
     def import_graph(self):
         file_path, _ = QFileDialog.getOpenFileName(
-            self, "Импорт графа", "", "Graph Files (*.json)"
+            self, "Импорт графа", "", graph_io.open_file_filter()
         )
         
         if file_path:
+            message = f"Импорт {os.path.basename(file_path)}"
+            self.progress_bar.setValue(0)
+            self.progress_bar.setVisible(True)
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    graph_data = json.load(f)
-                
-                self.load_graph_data(graph_data)
+                graph = Graph()
+                graph_io.load_graph(file_path, graph, lambda done, total: self.show_progress(message, done, total))
+                self.replace_graph(graph)
                 
                 self.status_bar.showMessage(f"Граф импортирован из {file_path}")
                 self.graph_list_widget.update_graph_info()
                 
             except Exception as e:
                 QMessageBox.critical(self, "Ошибка импорта", f"Не удалось импортировать граф: {str(e)}")
+            finally:
+                self.progress_bar.setVisible(False)
+    
+    def show_progress(self, message, done, total):
+        # Imports run on the GUI thread, so the status bar is repainted
+        # directly instead of letting the event loop in mid-load.
+        percent = done * 100 // total if total else 100
+        self.progress_bar.setValue(percent)
+        self.status_bar.showMessage(f"{message}: {percent}%")
+        self.status_bar.repaint()
     
     def get_graph_data(self):
-        graph_data = {
-            'points': [],
-            'edges': []
-        }
-        
-        for point in self.graph.points:
-            graph_data['points'].append({
-                'index': point.index,
-                'x': point.x,
-                'y': point.y
-            })
-        
-        for edge in self.graph.edges:
-            graph_data['edges'].append({
-                'source_index': edge.source.index,
-                'dest_index': edge.dest.index,
-                'weight': edge.weight
-            })
-        
-        return graph_data
+        return self.graph.to_dict()
     
     def load_graph_data(self, graph_data):
-        self.scene.clear()
-        self.graph_list_widget.clear_algorithm_result()
-        
-        points_map = {}
-        for point_data in graph_data['points']:
-            point = self.graph.add_point(point_data['x'], point_data['y'])
-            points_map[point_data['index']] = point
-            self.scene.add_node(point)
-        
-        for edge_data in graph_data['edges']:
-            source = points_map[edge_data['source_index']]
-            dest = points_map[edge_data['dest_index']]
-            weight = edge_data['weight']
+        self.replace_graph(Graph.from_dict(graph_data))
+    
+    def replace_graph(self, graph):
+        # The new graph is fully loaded before the current one is cleared,
+        # so a file that fails to parse leaves the scene as it was.
+        with self.graph.transaction():
+            self.scene.clear()
+            self.graph_list_widget.clear_algorithm_result()
             
-            edge = self.graph.add_edge(source, dest, weight)
-            if edge:
+            points, edges = self.graph.replace_with(graph)
+
+            for point in points:
+                self.scene.add_node(point)
+            for edge in edges:
                 self.scene.add_edge(edge)
     
     def show_algorithm_history(self):
@@ -456,13 +632,17 @@ class MainWindow(QMainWindow):
                 result['mst_weight']
             )
             
-            mst_edges_data = result['mst_edges']
-            for edge in self.graph.edges:
-                for mst_edge in mst_edges_data:
-                    if (edge.source.index == mst_edge['source_index'] and 
-                        edge.dest.index == mst_edge['dest_index']):
-                        if edge in self.scene.edge_items:
-                            self.scene.edge_items[edge].setPen(QPen(Qt.red, 3))
+            edges_by_indices = {(edge.source.index, edge.dest.index): edge for edge in self.graph.edges}
+            mst_edges = []
+            for mst_edge in result['mst_edges']:
+                edge = edges_by_indices.get((mst_edge['source_index'], mst_edge['dest_index']))
+                if edge is not None:
+                    mst_edges.append(edge)
+            self.scene.highlight_mst(mst_edges)
+            
+            algorithm = result['algorithm_name'].lower()
+            if algorithm in ALGORITHMS and len(mst_edges) == len(result['mst_edges']):
+                self.graph.mst_cache.put((self.graph.version, algorithm), mst_edges)
             
             self.status_bar.showMessage(
                 f"Загружен граф '{result['graph_name']}'. " +
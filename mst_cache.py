@@ -0,0 +1,44 @@
+from collections import OrderedDict
+
+
+class MSTCache:
+    # An entry is the edge list plus an optional note, e.g. the algorithm
+    # Auto picked, so a hit never depends on what ran in between.
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, compute):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(self._entries[key][0])
+
+        self.misses += 1
+        value = compute()
+        self.put(key, value)
+        return list(value)
+
+    def put(self, key, value, note=None):
+        self._entries[key] = (list(value), note)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def note(self, key):
+        entry = self._entries.get(key)
+        return None if entry is None else entry[1]
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
\ No newline at end of file
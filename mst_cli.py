@@ -0,0 +1,255 @@
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import graph_io
+from external_mst import external_kruskal
+from graph import Graph, ALGORITHMS, mst_weight
+from instrumentation import Profile
+
+ALGORITHM_NAMES = {method: name for name, method in ALGORITHMS.items()}
+SIZE_SUFFIXES = {'k': 2 ** 10, 'm': 2 ** 20, 'g': 2 ** 30}
+
+
+def collect_files(patterns):
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.extend(sorted(path for path in glob.glob(os.path.join(pattern, '*')) if graph_io.is_graph_file(path)))
+        elif glob.has_magic(pattern):
+            files.extend(sorted(glob.glob(pattern, recursive=True)))
+        else:
+            files.append(pattern)
+    return list(dict.fromkeys(files))
+
+
+def parse_algorithms(value):
+    algorithms = []
+    for name in value.split(','):
+        name = name.strip().lower()
+        method = ALGORITHMS.get(name, name)
+        if method not in ALGORITHM_NAMES:
+            choices = ', '.join(ALGORITHM_NAMES)
+            raise argparse.ArgumentTypeError(f"Неизвестный алгоритм '{name}', доступны: {choices}")
+        algorithms.append(method)
+    return algorithms
+
+
+def parse_size(value):
+    text = value.strip().lower()
+    if text.endswith('b'):
+        text = text[:-1]
+    multiplier = SIZE_SUFFIXES.get(text[-1:], 1)
+    if text[-1:] in SIZE_SUFFIXES:
+        text = text[:-1]
+    try:
+        size = int(float(text) * multiplier)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Неверный размер '{value}', пример: 512M") from None
+    if size <= 0:
+        raise argparse.ArgumentTypeError("Размер должен быть положительным")
+    return size
+
+
+def mst_path(mst_dir, path):
+    name = os.path.basename(path)
+    for _ in range(2):
+        base, extension = os.path.splitext(name)
+        if extension.lower() in graph_io.COMPRESSORS or extension.lower() in graph_io.READERS:
+            name = base
+    return os.path.join(mst_dir, name + '.mst.csv')
+
+
+def process_external(path, memory_budget, mst_dir=None):
+    # Out-of-core Kruskal: the graph is never built in memory, so only the
+    # totals are reported and the forest goes straight to mst_dir.
+    row = {'file': path, 'points': None, 'edges': None}
+    try:
+        profile = Profile()
+        output = mst_path(mst_dir, path) if mst_dir else None
+        result = external_kruskal(path, output, memory_budget, profile=profile)
+        row['points'] = result.vertex_count
+        row['edges'] = result.edge_count
+        row['kruskal_weight'] = result.mst_weight
+        row['kruskal_seconds'] = profile.seconds('mst')
+        row['error'] = ''
+    except (OSError, ValueError, KeyError, IndexError, TypeError) as e:
+        row['error'] = f"{type(e).__name__}: {e}"
+    return row, []
+
+
+def process_file(path, algorithms, keep_details=False, memory_budget=None, mst_dir=None):
+    if memory_budget is not None:
+        return process_external(path, memory_budget, mst_dir)
+
+    row = {'file': path, 'points': None, 'edges': None}
+    details = []
+    try:
+        graph = graph_io.read_graph(path)
+        row['points'] = len(graph.points)
+        row['edges'] = len(graph.edges)
+
+        for method in algorithms:
+            # The Euclidean MST adds distance edges, so it gets its own copy.
+            target = Graph.from_snapshot(graph.snapshot()) if method == 'euclidean_mst' else graph
+            profile = Profile()
+            with target.profiling(profile):
+                mst_edges = target.minimum_spanning_tree(ALGORITHM_NAMES[method])
+            elapsed = profile.seconds('mst')
+            weight = mst_weight(mst_edges, ALGORITHM_NAMES[method])
+            row[f'{method}_weight'] = weight
+            row[f'{method}_seconds'] = elapsed
+            algorithm_name = ALGORITHM_NAMES[method].capitalize()
+            if method == 'auto':
+                row['auto_choice'] = target.last_choice.algorithm
+                algorithm_name = f"{algorithm_name} → {target.last_choice.algorithm.capitalize()}"
+
+            if keep_details:
+                details.append({
+                    'algorithm_name': algorithm_name,
+                    'graph_data': target.to_dict(),
+                    'mst_weight': weight,
+                    'mst_edges': [{'source_index': edge.source.index, 'dest_index': edge.dest.index,
+                                   'weight': edge.weight} for edge in mst_edges],
+                    'execution_time': elapsed,
+                    'profile': profile.to_dict(),
+                })
+        row['error'] = ''
+    except (OSError, ValueError, KeyError, IndexError, TypeError) as e:
+        row['error'] = f"{type(e).__name__}: {e}"
+        details = []
+    return row, details
+
+
+def run(files, algorithms, jobs=1, keep_details=False, memory_budget=None, mst_dir=None):
+    if jobs == 1:
+        for path in files:
+            yield process_file(path, algorithms, keep_details, memory_budget, mst_dir)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(process_file, path, algorithms, keep_details, memory_budget, mst_dir)
+                   for path in files]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+class RowWriter:
+    def __init__(self, stream, output_format, algorithms):
+        self.stream = stream
+        self.output_format = output_format
+        self.csv_writer = None
+        if output_format == 'csv':
+            fields = ['file', 'points', 'edges']
+            for method in algorithms:
+                fields.extend((f'{method}_weight', f'{method}_seconds'))
+                if method == 'auto':
+                    fields.append('auto_choice')
+            fields.append('error')
+            self.csv_writer = csv.DictWriter(stream, fieldnames=fields, extrasaction='ignore')
+            self.csv_writer.writeheader()
+
+    def write(self, row):
+        if self.csv_writer is not None:
+            self.csv_writer.writerow(row)
+        else:
+            self.stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+        self.stream.flush()
+
+
+def report_progress(done, total, path):
+    message = f"[{done}/{total}] {path}"
+    if sys.stderr.isatty():
+        print(f"\r\033[K{message}", end='', file=sys.stderr, flush=True)
+    else:
+        print(message, file=sys.stderr, flush=True)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Пакетный расчёт MST для графов, экспортированных из приложения (JSON, .mstg, .jsonl, .csv, DIMACS .gr; .gz/.xz)")
+    parser.add_argument("inputs", nargs='+', help="файлы, каталоги или glob-шаблоны (*.json, *.csv.gz, ...)")
+    parser.add_argument("-a", "--algorithms", type=parse_algorithms, default=['kruskal'],
+                        help="алгоритмы через запятую: " + ", ".join(ALGORITHM_NAMES))
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="число процессов (по умолчанию — число ядер)")
+    parser.add_argument("-o", "--output", help="файл результатов (по умолчанию stdout)")
+    parser.add_argument("-f", "--format", choices=['csv', 'jsonl'],
+                        help="формат вывода (по умолчанию по расширению файла, иначе csv)")
+    parser.add_argument("--database", nargs='?', const="data/algorithm_results.db",
+                        help="сохранить результаты в GraphDatabase (путь к SQLite)")
+    parser.add_argument("--memory-budget", type=parse_size, metavar="SIZE",
+                        help="считать Краскала вне памяти с этим бюджетом на процесс (например 512M); "
+                             "граф не загружается целиком, рёбра сортируются во временных файлах")
+    parser.add_argument("--mst-dir", metavar="DIR", help="с --memory-budget: записать рёбра MST в <каталог>/<имя>.mst.csv")
+    parser.add_argument("-q", "--quiet", action='store_true', help="не выводить прогресс в stderr")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs должен быть не меньше 1")
+
+    if args.memory_budget is not None:
+        if args.algorithms != ['kruskal']:
+            parser.error("--memory-budget поддерживает только алгоритм kruskal")
+        if args.database:
+            parser.error("--memory-budget нельзя сочетать с --database")
+    elif args.mst_dir:
+        parser.error("--mst-dir используется только вместе с --memory-budget")
+
+    files = collect_files(args.inputs)
+    if not files:
+        parser.error("не найдено ни одного файла графа")
+
+    output_format = args.format
+    if output_format is None:
+        output_format = 'jsonl' if args.output and args.output.endswith(('.jsonl', '.ndjson')) else 'csv'
+
+    database = None
+    if args.database:
+        from database import GraphDatabase
+        database = GraphDatabase(db_path=args.database)
+
+    if args.mst_dir:
+        os.makedirs(args.mst_dir, exist_ok=True)
+
+    stream = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    failed = 0
+    try:
+        writer = RowWriter(stream, output_format, args.algorithms)
+        results = run(files, args.algorithms, min(args.jobs, len(files)), database is not None,
+                      args.memory_budget, args.mst_dir)
+        for done, (row, details) in enumerate(results, 1):
+            writer.write(row)
+            if row['error']:
+                failed += 1
+
+            if database is not None:
+                graph_name = os.path.splitext(os.path.basename(row['file']))[0]
+                for result in details:
+                    database.save_algorithm_result(graph_name=graph_name, **result)
+
+            if not args.quiet:
+                report_progress(done, len(files), row['file'])
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+        if database is not None:
+            database.close()
+
+    if not args.quiet:
+        if sys.stderr.isatty():
+            print(file=sys.stderr)
+        print(f"Готово: {len(files) - failed} из {len(files)}, ошибок: {failed}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+from collections import namedtuple
+
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from graph import Graph
+from instrumentation import Cancelled
+
+MSTResult = namedtuple('MSTResult', ['version', 'algorithm', 'edge_slots', 'added_edges', 'choice'])
+
+
+def compute_snapshot_mst(snapshot, algorithm, profile):
+    with profile.span('snapshot'):
+        graph = Graph.from_snapshot(snapshot)
+    with graph.profiling(profile):
+        mst_edges = graph.minimum_spanning_tree(algorithm)
+
+    # Slots of the rebuilt graph match the live one at snapshot.version;
+    # edges past the snapshot were added by the algorithm itself.
+    edge_count = len(snapshot.weights)
+    edge_slots = [edge._slot for edge in mst_edges if edge._slot < edge_count]
+    added_edges = [(edge.source._slot, edge.dest._slot, edge.weight)
+                   for edge in mst_edges if edge._slot >= edge_count]
+    return MSTResult(snapshot.version, algorithm, edge_slots, added_edges, graph.last_choice)
+
+
+def apply_snapshot_mst(graph, result):
+    if graph.version != result.version:
+        return None
+
+    mst_edges = [graph.edges[slot] for slot in result.edge_slots]
+    with graph.transaction():
+        for source_slot, dest_slot, weight in result.added_edges:
+            mst_edges.append(graph.add_edge(graph.points[source_slot], graph.points[dest_slot], weight))
+    if result.choice is not None:
+        graph.last_choice = result.choice
+    graph.mst_cache.put((graph.version, result.algorithm), mst_edges, result.choice)
+    return mst_edges
+
+
+class MSTWorkerSignals(QObject):
+    finished = Signal(object)
+    failed = Signal(str)
+    cancelled = Signal()
+
+
+class MSTWorker(QRunnable):
+    def __init__(self, snapshot, algorithm, profile):
+        super().__init__()
+        self.snapshot = snapshot
+        self.algorithm = algorithm
+        self.profile = profile
+        self.signals = MSTWorkerSignals()
+
+    def cancel(self):
+        self.profile.cancel()
+
+    def run(self):
+        try:
+            result = compute_snapshot_mst(self.snapshot, self.algorithm, self.profile)
+        except Cancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            if self.profile.cancelled:
+                self.signals.cancelled.emit()
+            else:
+                self.signals.finished.emit(result)
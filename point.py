@@ -1,15 +1,84 @@
+from columns import PointColumns
+from edge import edge_at
+
+
 class Point:
-    def __init__(self, x, y, index):
-        self.x = x
-        self.y = y
+    __slots__ = ('index', '_columns', '_slot')
+
+    def __init__(self, x, y, index, columns=None):
         self.index = index
-        self.edges = []
-        
+        self._columns = PointColumns() if columns is None else columns
+        self._slot = self._columns.append(x, y, self)
+
+    @property
+    def x(self):
+        return self._columns.xs[self._slot]
+
+    @x.setter
+    def x(self, value):
+        owner = self._columns.owner
+        if owner is None:
+            self._columns.xs[self._slot] = value
+        else:
+            owner.move_point(self, value, self.y)
+
+    @property
+    def y(self):
+        return self._columns.ys[self._slot]
+
+    @y.setter
+    def y(self, value):
+        owner = self._columns.owner
+        if owner is None:
+            self._columns.ys[self._slot] = value
+        else:
+            owner.move_point(self, self.x, value)
+
+    @property
+    def edges(self):
+        columns = self._columns
+        incident = columns.incidence[self._slot]
+        if columns.edges is None:
+            return list(incident)
+        edges = columns.edges
+        return [edge_at(edges, slot) for slot in incident]
+
+    def neighbors(self):
+        return [(edge.dest if edge.source is self else edge.source, edge) for edge in self.edges]
+
+    def edge_to(self, other):
+        columns = self._columns
+        if columns.edges is not None:
+            if other._columns is not columns:
+                return None
+            slot = columns.edges.find(self._slot, other._slot)
+            return None if slot < 0 else edge_at(columns.edges, slot)
+        for edge in columns.incidence[self._slot]:
+            if edge.dest is other or edge.source is other:
+                return edge
+        return None
+
+    # A point in a graph gets its edges through Graph.add_edge and
+    # Graph.remove_edge; these are for a point on its own.
     def add_edge(self, edge):
-        self.edges.append(edge)
-    
+        self._own_edges().append(edge)
+
     def remove_edge(self, edge):
-        self.edges.remove(edge)
-    
+        try:
+            self._own_edges().remove(edge)
+        except ValueError:
+            raise ValueError(f"{edge!r} не инцидентно {self!r}") from None
+
+    def _own_edges(self):
+        if self._columns.edges is not None:
+            raise ValueError(f"{self!r} принадлежит графу, рёбра меняются через граф")
+        return self._columns.incidence[self._slot]
+
+    def _detach(self):
+        columns = PointColumns()
+        columns.append(self.x, self.y, self)
+        self._columns = columns
+        self._slot = 0
+
     def __repr__(self):
-        return f"Point({self.index}, x={self.x}, y={self.y})"
\ No newline at end of file
+        return f"Point({self.index}, x={self.x}, y={self.y})"
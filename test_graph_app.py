@@ -1,8 +1,26 @@
+import argparse
+import csv
+import json
+import math
+import random
+
 import pytest
 
 from point import Point
 from edge import Edge
-from graph import Graph
+from graph import Graph, MSTStep, ALGORITHMS, VECTORIZED_KRUSKAL_THRESHOLD, mst_weight
+from disjoint_set import DisjointSet, KruskalForest
+from dynamic_mst import DynamicMST
+from euclidean import delaunay_edges, euclidean_mst_pairs
+from mst_cache import MSTCache
+from instrumentation import Profile, Cancelled, CHECKPOINT_INTERVAL
+from mst_worker import compute_snapshot_mst, apply_snapshot_mst
+import mst_cli
+import graph_io
+import external_mst
+from benchmarks import suite
+from benchmarks.generators import GENERATORS
+from journal import POINT_ADDED, POINT_MOVED, EDGE_ADDED, EDGE_REMOVED, WEIGHT_CHANGED, CLEARED
 
 
 class TestPoint:
@@ -52,6 +70,51 @@ class TestEdge:
         assert "вес=2.5" in repr_str
 
 
+class TestDisjointSet:
+    def test_union_and_find(self):
+        components = DisjointSet(5)
+
+        assert components.count == 5
+        assert components.union(0, 1)
+        assert components.union(3, 4)
+        assert not components.union(1, 0)
+        assert components.connected(0, 1)
+        assert not components.connected(1, 3)
+        assert components.count == 3
+
+    def test_add(self):
+        components = DisjointSet()
+        first = components.add()
+        second = components.add()
+
+        assert (first, second) == (0, 1)
+        assert len(components) == 2
+        assert components.union(first, second)
+        assert components.count == 1
+
+    def test_long_chain_is_iterative(self):
+        size = 200000
+        components = DisjointSet(size)
+        for item in range(size - 1):
+            components.union(item + 1, item)
+
+        assert components.count == 1
+        assert components.find(size - 1) == components.find(0)
+        assert max(components.rank) <= size.bit_length()
+
+    @pytest.mark.parametrize("compact", [False, True])
+    def test_kruskal_forest_scan(self, compact):
+        forest = KruskalForest(5, compact)
+        edges = [("a", 0, 1), ("b", 1, 0), ("c", 3, 4), ("d", 2, 4), ("e", 0, 4), ("f", 1, 3)]
+
+        steps = list(forest.scan(edges))
+
+        assert steps == [("a", True), ("b", False), ("c", True), ("d", True), ("e", True)]
+        assert forest.count == 1
+        assert forest.connected(1, 2)
+        assert list(KruskalForest(5, compact).scan(edges, done=3)) == [("a", True), ("b", False), ("c", True)]
+
+
 class TestGraph:
     def test_graph_creation(self):
         graph = Graph()
@@ -120,6 +183,133 @@ class TestGraph:
         assert edge not in point1.edges
         assert edge not in point2.edges
     
+    def test_find_edge_is_unordered(self):
+        graph = Graph()
+        point1 = graph.add_point(10, 20)
+        point2 = graph.add_point(30, 40)
+        point3 = graph.add_point(50, 60)
+        edge = graph.add_edge(point1, point2, 2.5)
+
+        assert graph.find_edge(point1, point2) is edge
+        assert graph.find_edge(point2, point1) is edge
+        assert graph.find_edge(point1, point3) is None
+        assert graph.add_edge(point2, point1, 1.0) is None
+
+    def test_remove_keeps_order_deterministic(self):
+        graph = Graph()
+        points = [graph.add_point(i * 10, 0) for i in range(5)]
+        edges = [graph.add_edge(points[0], point, float(i)) for i, point in enumerate(points[1:])]
+
+        graph.remove_edge(edges[1])
+
+        # The last edge takes the freed slot, in the graph and in the
+        # endpoint's incidence alike.
+        assert graph.edges == [edges[0], edges[3], edges[2]]
+        assert points[0].edges == [edges[0], edges[3], edges[2]]
+
+        graph.remove_point(points[1])
+
+        assert graph.points == [points[0], points[4], points[2], points[3]]
+        assert graph.edges == [edges[2], edges[3]]
+
+        graph.remove_edge(edges[3])
+        graph.remove_edge(edges[2])
+
+        assert graph.edges == []
+        assert points[0].edges == []
+
+    def test_remove_foreign_edge_raises(self):
+        graph = Graph()
+        point1 = graph.add_point(10, 20)
+        point2 = graph.add_point(30, 40)
+        edge = graph.add_edge(point1, point2, 2.5)
+        graph.remove_edge(edge)
+
+        with pytest.raises(ValueError):
+            graph.remove_edge(edge)
+
+    def test_columns_follow_removal(self):
+        graph = Graph()
+        points = [graph.add_point(i * 10, i * 20) for i in range(4)]
+        edge1 = graph.add_edge(points[0], points[3], 1.5)
+        edge2 = graph.add_edge(points[1], points[2], 2.5)
+
+        graph.remove_point(points[1])
+
+        assert points[1].x == 10 and points[1].y == 20
+        assert edge2.weight == 2.5
+        assert list(graph._point_columns.xs) == [point.x for point in graph.points]
+        assert list(graph._edge_columns.src) == [edge.source._slot for edge in graph.edges]
+        assert list(graph._edge_columns.dst) == [edge.dest._slot for edge in graph.edges]
+        assert graph.edges == [edge1]
+        assert points[3].x == 30 and points[3].y == 60
+
+    @staticmethod
+    def assert_index_consistent(graph):
+        columns = graph._edge_columns
+        incidence = graph._point_columns.incidence
+        for slot in range(len(columns)):
+            source, dest = columns.src[slot], columns.dst[slot]
+            assert incidence[source][columns.src_pos[slot]] == slot
+            assert incidence[dest][columns.dst_pos[slot]] == slot
+            assert columns.find(dest, source) == slot
+        assert sum(map(len, incidence)) == len(columns) + sum(1 for s, d in zip(columns.src, columns.dst) if s != d)
+        assert sorted(slot for slot in columns.table if slot >= 0) == list(range(len(columns)))
+
+    def test_pair_index_follows_removals(self):
+        rng = random.Random(13)
+        graph = Graph()
+        points = [graph.add_point(i, 0) for i in range(40)]
+        pairs = {}
+        for _ in range(600):
+            action = rng.random()
+            if action < 0.55:
+                source, dest = rng.choice(points), rng.choice(points)
+                edge = graph.add_edge(source, dest, 1.0)
+                key = frozenset((source, dest))
+                assert (edge is None) == (key in pairs)
+                if edge is not None:
+                    pairs[key] = edge
+            elif action < 0.9 and graph.edges:
+                edge = rng.choice(graph.edges)
+                graph.remove_edge(edge)
+                del pairs[frozenset((edge.source, edge.dest))]
+            elif len(points) > 2:
+                point = points.pop(rng.randrange(len(points)))
+                graph.remove_point(point)
+                pairs = {key: edge for key, edge in pairs.items() if point not in key}
+                points.append(graph.add_point(0, 0))
+
+            self.assert_index_consistent(graph)
+            for source in points[:8]:
+                for dest in points:
+                    assert graph.find_edge(source, dest) is pairs.get(frozenset((source, dest)))
+
+    def test_hub_edges_are_removed_in_any_order(self):
+        graph = Graph()
+        hub = graph.add_point(0, 0)
+        leaves = graph.add_points_bulk((i, 1) for i in range(2000))
+        edges = list(graph.add_edges_bulk((0, leaf._slot, 1.0) for leaf in leaves))
+        graph.add_edge(hub, hub, 0.5)
+
+        random.Random(3).shuffle(edges)
+        for edge in edges[:1500]:
+            graph.remove_edge(edge)
+
+        self.assert_index_consistent(graph)
+        assert set(hub.edges) == set(edges[1500:]) | {graph.find_edge(hub, hub)}
+        assert all(graph.find_edge(leaf, hub) is None for leaf in leaves if leaf not in
+                   {edge.dest for edge in edges[1500:]})
+
+    def test_model_objects_are_slotted(self):
+        graph = Graph()
+        point1 = graph.add_point(10, 20)
+        point2 = graph.add_point(30, 40)
+        edge = graph.add_edge(point1, point2, 2.5)
+
+        assert not hasattr(point1, '__dict__')
+        assert not hasattr(edge, '__dict__')
+
     def test_clear(self):
         graph = Graph()
         point1 = graph.add_point(10, 20)
@@ -241,6 +431,1311 @@ class TestGraph:
         
         assert prim_weight == 4.0
 
+    def test_prim_matches_kruskal_on_random_graph(self):
+        rng = random.Random(7)
+        graph = Graph()
+        points = [graph.add_point(rng.uniform(0, 500), rng.uniform(0, 500)) for _ in range(60)]
+
+        for _ in range(300):
+            source, dest = rng.sample(points, 2)
+            graph.add_edge(source, dest, rng.randint(1, 20))
+
+        prim_edges = graph.prim()
+        kruskal_edges = graph.kruskal()
+
+        assert len(prim_edges) == len(kruskal_edges)
+        assert sum(edge.weight for edge in prim_edges) == sum(edge.weight for edge in kruskal_edges)
+
+    def test_kruskal_long_chain(self):
+        graph = Graph()
+        points = [graph.add_point(i, 0) for i in range(20000)]
+        for source, dest in zip(points, points[1:]):
+            graph.add_edge(dest, source, 1.0)
+
+        assert len(graph.kruskal()) == 19999
+
+    def test_to_arrays(self):
+        np = pytest.importorskip("numpy")
+        graph = Graph()
+        points = [graph.add_point(i * 10, 0) for i in range(4)]
+        graph.add_edge(points[0], points[1], 1.0)
+        graph.add_edge(points[1], points[2], 2.0)
+        graph.add_edge(points[3], points[1], 3.0)
+
+        arrays = graph.to_arrays()
+
+        assert arrays.vertex_count == 4
+        assert arrays.src.tolist() == [0, 1, 3]
+        assert arrays.dst.tolist() == [1, 2, 1]
+        assert arrays.weights.tolist() == [1.0, 2.0, 3.0]
+        assert arrays.indptr.tolist() == [0, 1, 4, 5, 6]
+        assert sorted(arrays.indices[arrays.indptr[1]:arrays.indptr[2]].tolist()) == [0, 2, 3]
+        assert np.array_equal(arrays.edge_ids[arrays.indptr[3]:arrays.indptr[4]], [2])
+
+    def test_vectorized_kruskal_matches_eager(self, monkeypatch):
+        pytest.importorskip("numpy")
+        import graph as graph_module
+
+        rng = random.Random(11)
+        graph = Graph()
+        points = [graph.add_point(0, 0) for _ in range(80)]
+        for _ in range(600):
+            source, dest = rng.sample(points, 2)
+            graph.add_edge(source, dest, float(rng.randint(1, 5)))
+
+        monkeypatch.setattr(graph_module, "VECTORIZED_KRUSKAL_THRESHOLD", 10 ** 9)
+        eager = graph.kruskal()
+        monkeypatch.setattr(graph_module, "VECTORIZED_KRUSKAL_THRESHOLD", 0)
+        vectorized = graph.kruskal()
+
+        assert vectorized == eager
+        assert graph.kruskal_indices().tolist() == [edge._slot for edge in eager]
+
+    def build_scenario_graph(self):
+        rng = random.Random(12)
+        graph = Graph()
+        points = [graph.add_point(0, 0) for _ in range(40)]
+        for _ in range(150):
+            source, dest = rng.sample(points[:35], 2)
+            if graph.find_edge(source, dest) is None:
+                graph.add_edge(source, dest, 1.0)
+        graph.add_edge(points[36], points[37], 1.0)
+        weights = [[rng.choice([1.0, 2.0, rng.uniform(0, 10)]) for _ in graph.edges] for _ in range(6)]
+        return graph, weights
+
+    def test_mst_scenarios_match_kruskal(self):
+        np = pytest.importorskip("numpy")
+        graph, weights = self.build_scenario_graph()
+
+        result = graph.mst_scenarios(weights, workers=1)
+
+        assert result.membership.shape == (6, len(graph.edges))
+        for row, scenario in enumerate(weights):
+            for edge, weight in zip(list(graph.edges), scenario):
+                graph.set_edge_weight(edge, weight)
+            kruskal_edges = graph.kruskal()
+            assert np.flatnonzero(result.membership[row]).tolist() == sorted(edge._slot for edge in kruskal_edges)
+            assert result.mst_weights[row] == pytest.approx(sum(edge.weight for edge in kruskal_edges))
+
+    def test_mst_scenarios_process_pool(self, monkeypatch):
+        np = pytest.importorskip("numpy")
+        import graph as graph_module
+
+        graph, weights = self.build_scenario_graph()
+        serial = graph.mst_scenarios(weights, workers=1)
+        monkeypatch.setattr(graph_module, "PARALLEL_SCENARIOS_THRESHOLD", 0)
+        monkeypatch.setattr(graph_module, "SCENARIO_BLOCK_SIZE", 1)
+        blocks = self.record_shared_blocks(monkeypatch)
+        parallel = graph.mst_scenarios(weights, workers=2)
+
+        assert np.array_equal(parallel.membership, serial.membership)
+        assert np.array_equal(parallel.mst_weights, serial.mst_weights)
+        self.assert_released(blocks, 5)
+
+    @staticmethod
+    def record_shared_blocks(monkeypatch):
+        import graph as graph_module
+
+        blocks = []
+        share_arrays = graph_module._share_arrays
+
+        def record(*arrays):
+            blocks.extend(share_arrays(*arrays))
+            return blocks[-len(arrays):]
+
+        monkeypatch.setattr(graph_module, "_share_arrays", record)
+        return blocks
+
+    @staticmethod
+    def assert_released(blocks, count):
+        from multiprocessing import shared_memory
+
+        # Workers get the arrays through these blocks, which are unlinked
+        # once the pool is done.
+        assert len(blocks) == count
+        for block in blocks:
+            with pytest.raises(FileNotFoundError):
+                shared_memory.SharedMemory(block.name)
+
+    def test_mst_scenarios_rejects_bad_shape(self):
+        pytest.importorskip("numpy")
+        graph, weights = self.build_scenario_graph()
+
+        with pytest.raises(ValueError):
+            graph.mst_scenarios([row[:-1] for row in weights])
+        with pytest.raises(ValueError):
+            graph.mst_scenarios(weights[0])
+
+    def test_boruvka_matches_kruskal_weight(self):
+        rng = random.Random(5)
+        graph = Graph()
+        points = [graph.add_point(0, 0) for _ in range(70)]
+        for _ in range(250):
+            source, dest = rng.sample(points, 2)
+            graph.add_edge(source, dest, float(rng.randint(1, 9)))
+
+        boruvka_edges = graph.boruvka()
+        kruskal_edges = graph.kruskal()
+
+        assert len(boruvka_edges) == len(kruskal_edges)
+        assert sum(edge.weight for edge in boruvka_edges) == sum(edge.weight for edge in kruskal_edges)
+
+    def test_boruvka_process_pool(self, monkeypatch):
+        import graph as graph_module
+
+        rng = random.Random(6)
+        graph = Graph()
+        points = [graph.add_point(0, 0) for _ in range(40)]
+        for _ in range(120):
+            source, dest = rng.sample(points, 2)
+            graph.add_edge(source, dest, rng.uniform(1, 10))
+
+        monkeypatch.setattr(graph_module, "PARALLEL_BORUVKA_THRESHOLD", 0)
+        blocks = self.record_shared_blocks(monkeypatch)
+        boruvka_edges = graph.boruvka(workers=2)
+
+        assert sorted(edge._slot for edge in boruvka_edges) == sorted(edge._slot for edge in graph.kruskal())
+        self.assert_released(blocks, 4)
+
+    def test_boruvka_multiple_components(self):
+        graph = Graph()
+        points = [graph.add_point(i * 50, 0) for i in range(5)]
+        graph.add_edge(points[0], points[1], 1.0)
+        graph.add_edge(points[2], points[3], 2.0)
+
+        assert len(graph.boruvka()) == 2
+        assert Graph().boruvka() == []
+
+    def test_filter_kruskal_matches_kruskal(self, monkeypatch):
+        import graph as graph_module
+
+        rng = random.Random(8)
+        graph = Graph()
+        points = [graph.add_point(0, 0) for _ in range(120)]
+        for _ in range(3000):
+            source, dest = rng.sample(points, 2)
+            graph.add_edge(source, dest, float(rng.randint(1, 40)))
+        isolated = graph.add_point(0, 0)
+
+        monkeypatch.setattr(graph_module, "FILTER_KRUSKAL_CUTOFF", 16)
+
+        assert graph.filter_kruskal() == graph.kruskal()
+        assert isolated.edges == []
+
+    def test_filter_kruskal_all_ties(self, monkeypatch):
+        import graph as graph_module
+
+        graph = Graph()
+        points = [graph.add_point(0, 0) for _ in range(30)]
+        for source in points:
+            for dest in points:
+                graph.add_edge(source, dest, 1.0)
+
+        monkeypatch.setattr(graph_module, "FILTER_KRUSKAL_CUTOFF", 8)
+
+        assert graph.filter_kruskal() == graph.kruskal()
+        assert Graph().filter_kruskal() == []
+
+    def test_prim_long_chain(self):
+        graph = Graph()
+        points = [graph.add_point(i, 0) for i in range(5000)]
+        for source, dest in zip(points, points[1:]):
+            graph.add_edge(source, dest, 1.0)
+
+        assert len(graph.prim()) == 4999
+
+    def test_from_arrays(self):
+        graph = Graph.from_arrays([0, 10, 20], [0, 5, 0], [0, 1, 1, 2], [1, 2, 0, 1], [1.0, 2.0, 9.0, 3.0])
+
+        assert [(point.x, point.y) for point in graph.points] == [(0, 0), (10, 5), (20, 0)]
+        assert [(edge.source.index, edge.dest.index, edge.weight) for edge in graph.edges] == [(0, 1, 1.0), (1, 2, 2.0)]
+        assert graph.find_edge(graph.points[2], graph.points[1]) is graph.edges[1]
+        assert [entry.kind for entry in graph.changes_since(0)] == [POINT_ADDED] * 3 + [EDGE_ADDED] * 2
+
+        with pytest.raises(ValueError):
+            Graph.from_arrays([0], [0, 1], [], [], [])
+
+    def test_add_edges_bulk(self):
+        graph = Graph()
+        graph.add_points_bulk((i, 0) for i in range(4))
+        existing = graph.add_edge(graph.points[0], graph.points[1], 5.0)
+        batches = []
+        graph.subscribe(lambda changed, events: batches.append(events))
+
+        added = graph.add_edges_bulk(iter([(1, 0, 1.0), (1, 2, "2.5"), (2, 3, 3.0), (3, 2, 4.0)]))
+
+        assert [(edge.source.index, edge.dest.index, edge.weight) for edge in added] == [(1, 2, 2.5), (2, 3, 3.0)]
+        assert existing.weight == 5.0 and len(graph.edges) == 3
+        assert len(batches) == 1 and [event.item for event in batches[0]] == added
+
+        with pytest.raises(IndexError):
+            graph.add_edges_bulk([(0, 2, 1.0), (0, 4, 1.0)])
+        assert graph.find_edge(graph.points[0], graph.points[2]) is not None
+        assert graph.version == len(list(graph.changes_since(0)))
+
+    def test_add_edges_bulk_skips_repeats_within_batch(self):
+        graph = Graph()
+        graph.add_points_bulk((i, 0) for i in range(3))
+
+        added = graph.add_edges_bulk([(0, 1, 1.0), (1, 0, 2.0), (2, 2, 3.0), (2, 2, 4.0), (1, 2, 5.0)])
+
+        assert [(edge.source.index, edge.dest.index, edge.weight) for edge in added] == [
+            (0, 1, 1.0), (2, 2, 3.0), (1, 2, 5.0)]
+        assert graph.points[2].edges == [added[1], added[2]]
+        assert graph.find_edge(graph.points[2], graph.points[1]) is added[2]
+
+
+
+class TestEuclideanMST:
+    def brute_force_weight(self, xs, ys):
+        graph = Graph()
+        points = [graph.add_point(x, y) for x, y in zip(xs, ys)]
+        for i, source in enumerate(points):
+            for dest in points[i + 1:]:
+                graph.add_edge(source, dest, math.dist((source.x, source.y), (dest.x, dest.y)))
+        return sum(edge.weight for edge in graph.kruskal())
+
+    def pairs_weight(self, xs, ys, pairs):
+        return sum(math.dist((xs[a], ys[a]), (xs[b], ys[b])) for a, b in pairs)
+
+    @pytest.mark.parametrize("layout", ["random", "grid", "collinear", "circle", "duplicates"])
+    def test_matches_complete_graph(self, layout):
+        rng = random.Random(layout)
+        if layout == "random":
+            coords = [(rng.uniform(0, 500), rng.uniform(0, 500)) for _ in range(80)]
+        elif layout == "grid":
+            coords = [(x * 40, y * 40) for x in range(7) for y in range(6)]
+        elif layout == "collinear":
+            coords = [(t, 3 * t - 2) for t in rng.sample(range(-50, 50), 30)]
+        elif layout == "circle":
+            coords = [(100 + 50 * math.cos(k * math.pi / 8), 100 + 50 * math.sin(k * math.pi / 8)) for k in range(16)]
+            coords.append((100, 100))
+        else:
+            coords = [(rng.randint(0, 4) * 25, rng.randint(0, 4) * 25) for _ in range(40)]
+        xs = [float(x) for x, _ in coords]
+        ys = [float(y) for _, y in coords]
+
+        pairs = euclidean_mst_pairs(xs, ys)
+
+        assert len(pairs) == len(xs) - 1
+        assert self.pairs_weight(xs, ys, pairs) == pytest.approx(self.brute_force_weight(xs, ys))
+
+    def test_delaunay_is_sparse(self):
+        rng = random.Random(3)
+        xs = [rng.uniform(0, 1000) for _ in range(500)]
+        ys = [rng.uniform(0, 1000) for _ in range(500)]
+
+        assert len(delaunay_edges(xs, ys)) <= 3 * 500 - 6
+
+    def test_graph_euclidean_mst_creates_edges(self):
+        graph = Graph()
+        points = [graph.add_point(0, 0), graph.add_point(30, 40), graph.add_point(100, 0)]
+        existing = graph.add_edge(points[0], points[1], 7.0)
+
+        mst_edges = graph.euclidean_mst()
+
+        assert len(mst_edges) == 2
+        assert existing in mst_edges
+        created = [edge for edge in mst_edges if edge is not existing][0]
+        assert created in graph.edges
+        assert created.weight == pytest.approx(math.dist((30, 40), (100, 0)))
+        assert Graph().euclidean_mst() == []
+
+    def test_euclidean_weight_is_length_and_cached(self):
+        graph = Graph()
+        points = [graph.add_point(0, 0), graph.add_point(30, 40), graph.add_point(100, 0)]
+        graph.add_edge(points[0], points[1], 7.0)
+        profile = Profile()
+
+        with graph.profiling(profile):
+            mst_edges = graph.minimum_spanning_tree("евклидово mst")
+        again = graph.minimum_spanning_tree("евклидово mst")
+
+        assert mst_weight(mst_edges, "евклидово mst") == pytest.approx(50 + math.dist((30, 40), (100, 0)))
+        assert mst_weight(mst_edges, "краскал") == pytest.approx(7 + math.dist((30, 40), (100, 0)))
+        assert profile.notes["euclidean"].startswith("рёбер дерева с весом, не равным длине: 1;")
+        assert again == mst_edges and graph.mst_cache.hits == 1
+
+
+class TestMSTCache:
+    def test_version_bumps_on_mutation(self):
+        graph = Graph()
+        versions = [graph.version]
+        point1 = graph.add_point(0, 0)
+        versions.append(graph.version)
+        point2 = graph.add_point(10, 0)
+        edge = graph.add_edge(point1, point2, 1.0)
+        versions.append(graph.version)
+        graph.set_edge_weight(edge, 2.0)
+        versions.append(graph.version)
+        graph.move_point(point2, 20, 0)
+        versions.append(graph.version)
+        graph.remove_edge(edge)
+        versions.append(graph.version)
+        graph.remove_point(point2)
+        versions.append(graph.version)
+        graph.clear()
+        versions.append(graph.version)
+
+        assert versions == sorted(set(versions))
+
+        point3 = graph.add_point(0, 0)
+        point4 = graph.add_point(5, 0)
+        graph.add_edge(point3, point4, 1.0)
+        unchanged = graph.version
+        assert graph.add_edge(point4, point3, 1.0) is None
+        assert graph.version == unchanged
+
+    def test_repeated_runs_hit_cache(self):
+        graph = Graph()
+        points = [graph.add_point(i * 10, 0) for i in range(3)]
+        graph.add_edge(points[0], points[1], 1.0)
+        edge = graph.add_edge(points[1], points[2], 2.0)
+
+        first = graph.minimum_spanning_tree('краскал')
+        second = graph.minimum_spanning_tree('краскал')
+        graph.minimum_spanning_tree('прим')
+
+        assert first == second
+        assert (graph.mst_cache.hits, graph.mst_cache.misses) == (1, 2)
+
+        graph.set_edge_weight(edge, 5.0)
+        graph.minimum_spanning_tree('краскал')
+        assert graph.mst_cache.misses == 3
+
+        graph.set_edge_weight(edge, 5.0)
+        graph.minimum_spanning_tree('краскал')
+        assert graph.mst_cache.hits == 2
+
+    def test_in_place_writes_invalidate(self):
+        graph = Graph()
+        points = [graph.add_point(0, 0), graph.add_point(10, 0), graph.add_point(0, 10)]
+        e1 = graph.add_edge(points[0], points[1], 1.0)
+        e2 = graph.add_edge(points[1], points[2], 2.0)
+        e3 = graph.add_edge(points[0], points[2], 3.0)
+        assert graph.minimum_spanning_tree('краскал') == [e1, e2]
+
+        version = graph.version
+        e1.weight = 100
+        assert graph.version > version
+        assert [entry.kind for entry in graph.journal.since(version)] == [WEIGHT_CHANGED]
+        assert graph.minimum_spanning_tree('краскал') == [e2, e3]
+
+        version = graph.version
+        points[2].x = 5
+        assert graph.version > version
+        assert (points[2].x, points[2].y) == (5, 10)
+        assert [entry.kind for entry in graph.journal.since(version)] == [POINT_MOVED]
+
+    def test_lru_eviction(self):
+        cache = MSTCache(maxsize=2)
+        cache.get('a', lambda: [1])
+        cache.get('b', lambda: [2])
+        cache.get('a', lambda: [3])
+        cache.get('c', lambda: [4])
+
+        assert 'a' in cache and 'c' in cache
+        assert 'b' not in cache
+        assert cache.stats() == {'hits': 1, 'misses': 3, 'size': 2, 'maxsize': 2}
+
+
+class TestChangeJournal:
+    def test_subscribers_receive_events(self):
+        graph = Graph()
+        received = []
+        graph.subscribe(lambda changed_graph, events: received.append(events))
+
+        point1 = graph.add_point(0, 0)
+        point2 = graph.add_point(10, 0)
+        edge = graph.add_edge(point1, point2, 1.0)
+        graph.set_edge_weight(edge, 4.0)
+        graph.remove_edge(edge)
+
+        assert [events[0].kind for events in received] == [POINT_ADDED, POINT_ADDED, EDGE_ADDED,
+                                                           WEIGHT_CHANGED, EDGE_REMOVED]
+        assert received[2][0].item is edge
+        assert received[3][0].old == 1.0
+        assert [events[0].seq for events in received] == [1, 2, 3, 4, 5]
+        assert graph.version == 5
+
+    def test_transaction_coalesces_notifications(self):
+        graph = Graph()
+        received = []
+        unsubscribe = graph.subscribe(lambda changed_graph, events: received.append(events))
+
+        with graph.transaction():
+            points = [graph.add_point(i, 0) for i in range(3)]
+            with graph.transaction():
+                graph.add_edge(points[0], points[1], 1.0)
+            graph.move_point(points[2], 5, 5)
+            assert received == []
+
+        assert len(received) == 1
+        assert [event.kind for event in received[0]] == [POINT_ADDED] * 3 + [EDGE_ADDED, POINT_MOVED]
+
+        unsubscribe()
+        graph.clear()
+        assert len(received) == 1
+
+    def test_catch_up_from_sequence(self):
+        graph = Graph()
+        point1 = graph.add_point(1.5, 2.5)
+        seq = graph.version
+        point2 = graph.add_point(3, 4)
+        graph.add_edge(point1, point2, 2.0)
+        graph.clear()
+
+        entries = list(graph.changes_since(seq))
+
+        assert [entry.seq for entry in entries] == [seq + 1, seq + 2, seq + 3]
+        assert entries[0].kind == POINT_ADDED and (entries[0].value, entries[0].extra) == (3.0, 4.0)
+        assert entries[1].kind == EDGE_ADDED and (entries[1].first, entries[1].second) == (0, 1)
+        assert entries[2].kind == CLEARED
+
+        graph.journal.trim(seq + 1)
+        assert [entry.seq for entry in graph.changes_since(seq + 1)] == [seq + 2, seq + 3]
+        with pytest.raises(LookupError):
+            list(graph.changes_since(seq))
+
+    def test_journal_is_trimmed_to_retention_window(self, monkeypatch):
+        import graph as graph_module
+
+        monkeypatch.setattr(graph_module, "JOURNAL_RETENTION", 4)
+        graph = Graph()
+        point = graph.add_point(0, 0)
+        for x in range(20):
+            graph.move_point(point, x, 0)
+
+        assert len(graph.journal) <= 8
+        assert len(list(graph.changes_since(graph.version - 4))) == 4
+        with pytest.raises(LookupError):
+            list(graph.changes_since(0))
+
+        seq = graph.version
+        release = graph.retain_journal(seq)
+        graph.add_points_bulk((x, 1) for x in range(20))
+        assert [entry.kind for entry in graph.changes_since(seq)] == [POINT_ADDED] * 20
+
+        release()
+        graph.move_point(point, 1, 1)
+        assert len(graph.journal) <= 8
+
+    def test_dynamic_mst_follows_events(self):
+        graph = Graph()
+        points = [graph.add_point(i * 50, 0) for i in range(3)]
+        graph.add_edge(points[0], points[1], 1.0)
+        heavy = graph.add_edge(points[1], points[2], 5.0)
+        dynamic = DynamicMST(graph)
+        graph.subscribe(lambda changed_graph, events: dynamic.apply(events))
+
+        light = graph.add_edge(points[0], points[2], 2.0)
+        assert light in dynamic and heavy not in dynamic
+
+        with graph.transaction():
+            graph.set_edge_weight(heavy, 0.5)
+            graph.remove_point(points[0])
+        assert dynamic.edges == [heavy]
+
+
+class TestDynamicMST:
+    def mst_weight(self, graph):
+        return sum(edge.weight for edge in graph.kruskal())
+
+    def test_insert_replaces_heaviest_on_cycle(self):
+        graph = Graph()
+        points = [graph.add_point(i * 50, 0) for i in range(3)]
+        edge01 = graph.add_edge(points[0], points[1], 1.0)
+        edge12 = graph.add_edge(points[1], points[2], 5.0)
+        dynamic = DynamicMST(graph)
+
+        edge02 = graph.add_edge(points[0], points[2], 2.0)
+        added, removed = dynamic.edge_added(edge02)
+
+        assert added == [edge02]
+        assert removed == [edge12]
+        assert set(dynamic.edges) == {edge01, edge02}
+
+    def test_delete_tree_edge_finds_replacement(self):
+        graph = Graph()
+        points = [graph.add_point(i * 50, 0) for i in range(4)]
+        graph.add_edge(points[0], points[1], 1.0)
+        bridge = graph.add_edge(points[1], points[2], 1.0)
+        graph.add_edge(points[2], points[3], 1.0)
+        spare = graph.add_edge(points[0], points[3], 7.0)
+        dynamic = DynamicMST(graph)
+
+        graph.remove_edge(bridge)
+        added, removed = dynamic.edge_removed(bridge)
+
+        assert added == [spare]
+        assert removed == [bridge]
+        assert dynamic.total_weight == 9.0
+
+    def test_weight_changes(self):
+        graph = Graph()
+        points = [graph.add_point(i * 50, 0) for i in range(3)]
+        edge01 = graph.add_edge(points[0], points[1], 1.0)
+        edge12 = graph.add_edge(points[1], points[2], 2.0)
+        edge02 = graph.add_edge(points[0], points[2], 3.0)
+        dynamic = DynamicMST(graph)
+
+        edge12.weight = 10.0
+        assert dynamic.weight_changed(edge12, 2.0) == ([edge02], [edge12])
+
+        edge12.weight = 0.5
+        assert dynamic.weight_changed(edge12, 10.0) == ([edge12], [edge02])
+        assert set(dynamic.edges) == {edge01, edge12}
+
+    def test_random_operations_match_kruskal(self):
+        rng = random.Random(21)
+        graph = Graph()
+        points = [graph.add_point(0, 0) for _ in range(25)]
+        dynamic = DynamicMST(graph)
+
+        for _ in range(400):
+            action = rng.random()
+            if action < 0.5:
+                source, dest = rng.sample(points, 2)
+                edge = graph.add_edge(source, dest, float(rng.randint(1, 30)))
+                if edge:
+                    dynamic.edge_added(edge)
+            elif action < 0.75 and graph.edges:
+                edge = rng.choice(graph.edges)
+                graph.remove_edge(edge)
+                dynamic.edge_removed(edge)
+            elif graph.edges:
+                edge = rng.choice(graph.edges)
+                old_weight = edge.weight
+                edge.weight = float(rng.randint(1, 30))
+                dynamic.weight_changed(edge, old_weight)
+
+            assert dynamic.total_weight == self.mst_weight(graph)
+            assert len(dynamic.edges) == len(graph.kruskal())
+
+
+
+class TestProfile:
+    def build_graph(self):
+        graph = Graph()
+        points = [graph.add_point(i, 0) for i in range(5)]
+        for source, dest, weight in [(0, 1, 1.0), (1, 2, 2.0), (2, 3, 3.0), (3, 4, 4.0), (0, 4, 9.0), (1, 3, 8.0)]:
+            graph.add_edge(points[source], points[dest], weight)
+        return graph
+
+    def test_disabled_by_default(self):
+        graph = self.build_graph()
+
+        assert graph.profile.enabled is False
+        assert len(graph.minimum_spanning_tree("краскал")) == 4
+
+    def test_kruskal_and_prim_breakdown(self):
+        graph = self.build_graph()
+
+        with graph.profiling(Profile()) as profile:
+            graph.minimum_spanning_tree("краскал")
+            graph.minimum_spanning_tree("краскал")
+        assert graph.profile.enabled is False
+        assert {"mst", "sort", "union_find"} <= profile.spans.keys()
+        assert profile.counters == {"edges_examined": 4, "finds": 8, "unions": 4, "cache_hits": 1}
+
+        with graph.profiling(Profile()) as profile:
+            graph.prim()
+        assert profile.counters["heap_pushes"] == profile.counters["heap_pops"] >= 4
+        assert profile.counters["edges_examined"] == 12
+
+    def test_round_trip(self):
+        profile = Profile()
+        with profile.span("sort"):
+            pass
+        profile.count("unions", 3)
+
+        restored = Profile.from_dict(json.loads(json.dumps(profile.to_dict())))
+
+        assert restored.spans == profile.spans and restored.counters == {"unions": 3}
+        assert "unions 3" in restored.summary()
+
+    def test_database_migrates_and_stores_profile(self, tmp_path):
+        import sqlite3
+        from database import GraphDatabase
+
+        path = str(tmp_path / "results.db")
+        conn = sqlite3.connect(path)
+        conn.execute('''CREATE TABLE algorithm_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, graph_name TEXT NOT NULL, graph_data TEXT NOT NULL,
+            algorithm_name TEXT NOT NULL, mst_weight REAL NOT NULL, mst_edges TEXT NOT NULL,
+            execution_time REAL, timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+        conn.execute("INSERT INTO algorithm_results (graph_name, graph_data, algorithm_name, mst_weight, mst_edges) "
+                     "VALUES ('old', '{\"points\": [], \"edges\": []}', 'Прим', 0, '[]')")
+        conn.commit()
+        conn.close()
+
+        database = GraphDatabase(db_path=path)
+        result_id = database.save_algorithm_result("new", {"points": [], "edges": []}, "Краскал", 0.0, [],
+                                                   0.5, {"spans_ns": {"mst": 10}, "counters": {}})
+
+        assert database.get_result(result_id)["profile"] == {"spans_ns": {"mst": 10}, "counters": {}}
+        assert [result["profile"] for result in database.get_all_results() if result["graph_name"] == "old"] == [None]
+
+    def test_database_shares_one_wal_connection(self, tmp_path):
+        import threading
+        from database import GraphDatabase
+
+        database = GraphDatabase(db_path=str(tmp_path / "results.db"))
+        conn = database.conn
+        threads = [threading.Thread(target=lambda i=i: [database.save_algorithm_result(
+            f"g{i}", {"points": [], "edges": []}, "Прим", float(j), []) for j in range(20)]) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert database.conn is conn
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+        assert len(database.get_all_results()) == 80
+
+        first_id = database.get_all_results()[-1]["id"]
+        database.delete_result(first_id)
+        assert database.get_result(first_id) is None
+        database.clear_all_results()
+        assert database.get_all_results() == []
+
+        database.close()
+        database.close()
+        assert GraphDatabase(db_path=str(tmp_path / "results.db")).get_all_results() == []
+
+
+class TestConnectivity:
+    def reference_labels(self, graph):
+        labels = {}
+        for point in graph.points:
+            if point in labels:
+                continue
+            stack = [point]
+            labels[point] = len(set(labels.values()))
+            while stack:
+                for other, _ in stack.pop().neighbors():
+                    if other not in labels:
+                        labels[other] = labels[point]
+                        stack.append(other)
+        return [labels[point] for point in graph.points]
+
+    def test_queries(self):
+        graph = Graph()
+        points = [graph.add_point(i, 0) for i in range(6)]
+        graph.add_edge(points[0], points[1], 1.0)
+        graph.add_edge(points[1], points[2], 1.0)
+        graph.add_edge(points[3], points[4], 1.0)
+
+        assert graph.component_count() == 3
+        assert list(graph.component_labels()) == [0, 0, 0, 1, 1, 2]
+        assert graph.component_sizes() == [3, 2, 1]
+        assert graph.same_component(points[0], points[2])
+        assert not graph.same_component(points[2], points[3])
+
+        graph.add_edge(points[2], points[3], 1.0)
+        late = graph.add_point(9, 9)
+        assert graph.component_count() == 3
+        assert graph.same_component(points[0], points[4]) and not graph.same_component(late, points[5])
+
+    def test_incremental_and_rebuilt_match_traversal(self):
+        rng = random.Random(17)
+        graph = Graph()
+        for _ in range(300):
+            action = rng.random()
+            if action < 0.3 or len(graph.points) < 2:
+                graph.add_point(0, 0)
+            elif action < 0.75:
+                graph.add_edge(*rng.sample(graph.points, 2), 1.0)
+            elif action < 0.85 and graph.edges:
+                graph.remove_edge(rng.choice(graph.edges))
+            elif action < 0.9:
+                graph.remove_point(rng.choice(graph.points))
+            else:
+                graph.add_edges_bulk((rng.randrange(len(graph.points)), rng.randrange(len(graph.points)), 1.0)
+                                     for _ in range(3))
+
+            expected = self.reference_labels(graph)
+            assert list(graph.component_labels()) == expected
+            assert graph.component_count() == len(set(expected))
+
+    def test_algorithms_stop_at_forest_size(self):
+        graph = Graph()
+        points = [graph.add_point(i, 0) for i in range(8)]
+        for source, dest, weight in [(0, 1, 1.0), (1, 2, 2.0), (0, 2, 9.0), (4, 5, 3.0), (5, 6, 4.0), (4, 6, 8.0)]:
+            graph.add_edge(points[source], points[dest], weight)
+
+        assert graph.component_count() == 4
+        expected = sorted(edge.weight for edge in graph.kruskal())
+        assert expected == [1.0, 2.0, 3.0, 4.0]
+        for algorithm in (graph.prim, graph.filter_kruskal, graph.boruvka, graph.spanning_forest):
+            assert len(algorithm()) == 4
+        assert sorted(edge.weight for edge in graph.prim()) == expected
+
+
+class TestAutoSelection:
+    def random_graph(self, vertex_count, edge_count, seed, weight=None):
+        rng = random.Random(seed)
+        graph = Graph()
+        points = [graph.add_point(0, 0) for _ in range(vertex_count)]
+        while len(graph.edges) < edge_count:
+            source, dest = rng.sample(points, 2)
+            graph.add_edge(source, dest, weight if weight is not None else float(rng.randint(1, 100)))
+        return graph
+
+    def mst_weight(self, edges):
+        return sum(edge.weight for edge in edges)
+
+    def test_choices(self, monkeypatch):
+        import graph as graph_module
+
+        monkeypatch.setattr(graph_module, "FILTER_KRUSKAL_CUTOFF", 16)
+        assert Graph().choose_algorithm().algorithm == "краскал"
+        assert self.random_graph(30, 60, 1, weight=2.0).choose_algorithm().algorithm == "остовный лес"
+        assert self.random_graph(20, 180, 2).choose_algorithm().algorithm == "фильтр-краскал"
+        assert self.random_graph(60, 120, 3).choose_algorithm().algorithm == "краскал"
+
+        sparse_with_isolated = self.random_graph(20, 170, 4)
+        for _ in range(200):
+            sparse_with_isolated.add_point(0, 0)
+        choice = sparse_with_isolated.choose_algorithm()
+        assert choice.algorithm == "фильтр-краскал" and "компонент ≥ 201" in choice.reason
+
+        monkeypatch.setattr(graph_module, "VECTORIZED_KRUSKAL_THRESHOLD", 50)
+        if graph_module.np is not None:
+            assert self.random_graph(20, 180, 2).choose_algorithm().algorithm == "краскал"
+
+    def test_auto_matches_kruskal_and_is_recorded(self):
+        for graph in (self.random_graph(20, 180, 5), self.random_graph(40, 60, 6), self.random_graph(25, 50, 7, 1.0)):
+            with graph.profiling(Profile()) as profile:
+                edges = graph.minimum_spanning_tree("авто")
+
+            assert len(edges) == len(graph.kruskal())
+            assert self.mst_weight(edges) == self.mst_weight(graph.kruskal())
+            assert profile.notes["auto"].startswith(graph.last_choice.algorithm)
+
+    def test_spanning_forest(self):
+        graph = self.random_graph(30, 40, 8, weight=1.0)
+        graph.add_point(0, 0)
+
+        forest = graph.spanning_forest()
+
+        assert len(forest) == len(graph.kruskal())
+        assert len({edge for edge in forest}) == len(forest)
+
+    def test_spanning_forest_is_only_reachable_through_auto(self):
+        graph = self.random_graph(30, 40, 9)
+
+        assert "остовный лес" not in ALGORITHMS
+        assert "spanning_forest" not in ALGORITHMS.values()
+        with pytest.raises(KeyError):
+            graph.minimum_spanning_tree("остовный лес")
+        with pytest.raises(argparse.ArgumentTypeError):
+            mst_cli.parse_algorithms("spanning_forest")
+
+
+class TestMstCli:
+    def write_graphs(self, directory):
+        graph = Graph()
+        points = [graph.add_point(x, y) for x, y in [(0, 0), (3, 0), (3, 4), (0, 4)]]
+        for source, dest, weight in [(0, 1, 3.0), (1, 2, 4.0), (2, 3, 3.0), (3, 0, 4.0), (0, 2, 5.0)]:
+            graph.add_edge(points[source], points[dest], weight)
+
+        (directory / "square.json").write_text(json.dumps(graph.to_dict()), encoding="utf-8")
+        (directory / "broken.json").write_text("{", encoding="utf-8")
+
+    def test_graph_dict_round_trip(self):
+        graph = Graph()
+        points = [graph.add_point(i, i * 2) for i in range(4)]
+        graph.add_edge(points[0], points[3], 2.5)
+        graph.remove_point(points[1])
+
+        restored = Graph.from_dict(graph.to_dict())
+
+        assert [(point.x, point.y) for point in restored.points] == [(point.x, point.y) for point in graph.points]
+        assert len(restored.edges) == 1
+        assert restored.find_edge(restored.points[0], restored.points[1]).weight == 2.5
+
+    def test_process_file(self, tmp_path):
+        self.write_graphs(tmp_path)
+
+        row, details = mst_cli.process_file(str(tmp_path / "square.json"), ["prim", "euclidean_mst"], True)
+
+        assert row["error"] == "" and (row["points"], row["edges"]) == (4, 5)
+        assert row["prim_weight"] == 10.0 and row["euclidean_mst_weight"] == 10.0
+        assert [result["algorithm_name"] for result in details] == ["Прим", "Евклидово mst"]
+
+        row, details = mst_cli.process_file(str(tmp_path / "broken.json"), ["prim"], True)
+        assert row["error"].startswith("JSONDecodeError") and details == []
+
+    def test_main_streams_rows(self, tmp_path, capsys):
+        self.write_graphs(tmp_path)
+        output = tmp_path / "results.jsonl"
+
+        code = mst_cli.main([str(tmp_path), "-a", "краскал,boruvka", "-j", "1", "-o", str(output), "-q"])
+
+        rows = {row["file"]: row for row in map(json.loads, output.read_text(encoding="utf-8").splitlines())}
+        assert code == 1
+        assert rows[str(tmp_path / "square.json")]["kruskal_weight"] == 10.0
+        assert rows[str(tmp_path / "square.json")]["boruvka_weight"] == 10.0
+        assert rows[str(tmp_path / "broken.json")]["error"]
+
+        with pytest.raises(SystemExit):
+            mst_cli.main([str(tmp_path), "-a", "dijkstra"])
+
+
+class TestBenchmarks:
+    @pytest.mark.parametrize("family", sorted(GENERATORS))
+    def test_generators_are_seeded(self, family):
+        graph = GENERATORS[family](400, seed=3)
+        again = GENERATORS[family](400, seed=3)
+
+        assert graph.to_dict() == again.to_dict()
+        assert 200 <= len(graph.edges) <= 500
+        assert len(graph.kruskal()) == len(graph.prim())
+
+    def test_find_regressions(self):
+        baseline = {
+            "grid/100/prim": {"seconds": 0.050, "peak_bytes": 1000},
+            "grid/100/kruskal": {"seconds": 0.0001, "peak_bytes": 1000},
+            "grid/100/boruvka": {"seconds": 0.050},
+        }
+        results = {
+            "grid/100/prim": {"seconds": 0.100, "best_seconds": 0.090, "peak_bytes": 1100},
+            "grid/100/kruskal": {"seconds": 0.0010, "peak_bytes": 2000},
+            "grid/100/boruvka": {"seconds": 0.100, "best_seconds": 0.055},
+            "grid/1000/prim": {"seconds": 1.0},
+        }
+
+        regressions = suite.find_regressions(results, baseline, threshold=0.25)
+
+        assert [(key, metric) for key, metric, _, _ in regressions] == [
+            ("grid/100/prim", "seconds"), ("grid/100/kruskal", "peak_bytes")]
+
+    def test_runs_do_not_share_components(self, monkeypatch):
+        seen = []
+
+        def record(graph):
+            seen.append(graph._components is None)
+            graph.component_count()
+
+        monkeypatch.setitem(suite.ALGORITHMS, "filter_kruskal", record)
+        monkeypatch.setitem(suite.ALGORITHMS, "prim", record)
+        results = suite.run_suite(["grid"], ["filter_kruskal", "prim"], [100], repeat=2)
+
+        assert sorted(results) == ["grid/100/filter_kruskal", "grid/100/prim"]
+        assert seen == [True] * 6
+
+class TestSnapshotMST:
+    def build_graph(self):
+        graph = Graph()
+        points = [graph.add_point(i % 3, i // 3) for i in range(6)]
+        for source, dest, weight in [(0, 1, 4.0), (1, 2, 1.0), (0, 3, 2.0), (3, 4, 5.0),
+                                     (1, 4, 3.0), (4, 5, 2.0), (2, 5, 7.0)]:
+            graph.add_edge(points[source], points[dest], weight)
+        graph.remove_point(points[0])
+        return graph
+
+    def test_result_maps_back_to_live_edges(self):
+        graph = self.build_graph()
+
+        result = compute_snapshot_mst(graph.snapshot(), "прим", Profile())
+        mst_edges = apply_snapshot_mst(graph, result)
+
+        assert set(mst_edges) == set(graph.kruskal())
+        assert graph.minimum_spanning_tree("прим") == mst_edges
+        assert graph.mst_cache.hits == 1
+
+    def test_auto_choice_survives_other_algorithms(self):
+        graph = self.build_graph()
+        for algorithm in ["авто", "прим"]:
+            apply_snapshot_mst(graph, compute_snapshot_mst(graph.snapshot(), algorithm, Profile()))
+        choice = graph.last_choice
+        graph.last_choice = None
+
+        profile = Profile()
+        with graph.profiling(profile):
+            mst_edges = graph.minimum_spanning_tree("авто")
+
+        assert choice is not None and graph.last_choice == choice
+        assert profile.counters["cache_hits"] == 1 and profile.notes["auto"].startswith(choice.algorithm)
+        assert set(mst_edges) == set(graph.kruskal())
+
+    def test_stale_result_is_dropped(self):
+        graph = self.build_graph()
+        snapshot = graph.snapshot()
+        graph.set_edge_weight(graph.edges[0], 0.5)
+
+        result = compute_snapshot_mst(snapshot, "краскал", Profile())
+
+        assert len(snapshot.weights) == len(graph.edges) and snapshot.weights[0] != 0.5
+        assert apply_snapshot_mst(graph, result) is None
+        assert len(graph.mst_cache) == 0
+
+    def test_euclidean_edges_are_added_to_live_graph(self):
+        graph = Graph()
+        for x, y in [(0, 0), (1, 0), (0, 1), (5, 5)]:
+            graph.add_point(x, y)
+        graph.add_edge(graph.points[0], graph.points[1], 1.0)
+
+        result = compute_snapshot_mst(graph.snapshot(), "евклидово mst", Profile())
+        mst_edges = apply_snapshot_mst(graph, result)
+
+        assert len(mst_edges) == 3 and len(graph.edges) == 3
+        assert all(edge.source in graph.points and edge.dest in graph.points for edge in mst_edges)
+
+    def test_cancel_stops_at_next_phase(self):
+        graph = self.build_graph()
+        profile = Profile()
+        profile.cancel()
+
+        with pytest.raises(Cancelled):
+            compute_snapshot_mst(graph.snapshot(), "краскал", profile)
+        assert len(graph.mst_cache) == 0
+
+    @pytest.mark.parametrize("algorithm, phase, vectorized", [
+        ("прим", "heap", False),
+        ("краскал", "union_find", False),
+        ("краскал", "union_find", True),
+        ("фильтр-краскал", "union_find", False),
+        ("борувка", "cheapest", False),
+        ("авто", "mst", False),
+        ("евклидово mst", "triangulation", False),
+    ])
+    def test_cancel_is_noticed_inside_a_phase(self, monkeypatch, algorithm, phase, vectorized):
+        import graph as graph_module
+
+        class CancelInPhase(Profile):
+            __slots__ = ()
+
+            def start(self, name):
+                super().start(name)
+                if name == phase:
+                    self.cancel()
+
+        monkeypatch.setattr(graph_module, "VECTORIZED_KRUSKAL_THRESHOLD", 0 if vectorized else 10 ** 9)
+        graph = Graph()
+        count = 2 * CHECKPOINT_INTERVAL
+        graph.add_points_bulk((i % 97, i // 97) for i in range(count))
+        # Equal weights make auto() pick the spanning forest.
+        graph.add_edges_bulk((i - 1, i, 1.0 if algorithm == "авто" else float(i % 13)) for i in range(1, count))
+
+        profile = CancelInPhase()
+        with pytest.raises(Cancelled) as excinfo:
+            compute_snapshot_mst(graph.snapshot(), algorithm, profile)
+        # Raised from a loop checkpoint, not from the start of a later phase.
+        assert excinfo.value.args == (phase,)
+
+
+class TestMSTSteps:
+    def build_graph(self):
+        graph = Graph()
+        points = [graph.add_point(i, i % 2) for i in range(7)]
+        for source, dest, weight in [(0, 1, 4.0), (1, 2, 1.0), (0, 2, 3.0), (2, 3, 2.0), (1, 3, 5.0),
+                                     (3, 0, 6.0), (4, 5, 1.5), (5, 6, 1.0), (4, 6, 0.5)]:
+            graph.add_edge(points[source], points[dest], weight)
+        return graph
+
+    def test_accepted_edges_match_eager_versions(self):
+        graph = self.build_graph()
+
+        for algorithm, eager in (("прим", graph.prim), ("краскал", graph.kruskal)):
+            steps = [MSTStep(*step) for step in graph.mst_steps(algorithm)]
+            assert [graph.edges[step.slot] for step in steps if step.accepted] == eager()
+            assert any(not step.accepted for step in steps)
+
+    def test_state_is_live(self):
+        graph = self.build_graph()
+
+        steps = graph.kruskal_steps()
+        slot, accepted, components = next(steps)
+        assert isinstance(components, KruskalForest)
+        assert accepted and graph.edges[slot].weight == 0.5 and components.count == 6
+        for _ in steps:
+            pass
+        assert components.count == graph.component_count() == 2
+        edge = graph.edges[slot]
+        assert components.find(edge.source._slot) == components.find(edge.dest._slot)
+
+        slot, accepted, heap = next(graph.prim_steps())
+        assert accepted and graph.edges[slot].weight == 3.0
+        assert sorted(entry[0] for entry in heap) == [1.0, 2.0, 4.0, 6.0]
+
+    def test_vectorized_order_matches_kruskal(self):
+        graph = GENERATORS["sparse"](VECTORIZED_KRUSKAL_THRESHOLD)
+
+        accepted = [graph.edges[slot] for slot, is_accepted, _ in graph.kruskal_steps() if is_accepted]
+
+        assert len(graph.edges) >= VECTORIZED_KRUSKAL_THRESHOLD
+        assert accepted == graph.kruskal()
+
+    def test_empty_graph(self):
+        graph = Graph()
+
+        assert list(graph.prim_steps()) == [] and list(graph.kruskal_steps()) == []
+
+
+class TestGraphIO:
+    def build_graph(self):
+        graph = Graph()
+        points = [graph.add_point(i * 1.5, -i) for i in range(6)]
+        for source, dest, weight in [(0, 1, 2.5), (1, 2, 1.0), (2, 3, 4.0), (3, 4, 0.5), (4, 5, 3.0), (5, 0, 7.0)]:
+            graph.add_edge(points[source], points[dest], weight)
+        graph.remove_point(points[2])
+        return graph
+
+    def structure(self, graph):
+        return sorted((edge.source.x, edge.source.y, edge.dest.x, edge.dest.y, edge.weight) for edge in graph.edges)
+
+    @pytest.mark.parametrize("extension", [".mstg", ".json", ".json.gz", ".json.xz", ".jsonl", ".jsonl.gz",
+                                           ".csv", ".csv.xz", ".gr", ".gr.gz"])
+    def test_round_trip(self, tmp_path, extension):
+        graph = self.build_graph()
+        path = str(tmp_path / f"graph{extension}")
+
+        graph_io.save_graph(graph, path)
+        restored = graph_io.read_graph(path)
+
+        assert restored.to_dict() == Graph.from_dict(graph.to_dict()).to_dict()
+        assert self.structure(restored) == self.structure(graph)
+
+    def test_compressed_files_are_compressed(self, tmp_path):
+        graph = Graph.from_arrays([0.0] * 200, [0.0] * 200, list(range(199)), list(range(1, 200)), [1.0] * 199)
+        graph_io.save_graph(graph, str(tmp_path / "graph.csv"))
+        graph_io.save_graph(graph, str(tmp_path / "graph.csv.gz"))
+
+        assert (tmp_path / "graph.csv.gz").read_bytes()[:2] == b"\x1f\x8b"
+        assert (tmp_path / "graph.csv.gz").stat().st_size < (tmp_path / "graph.csv").stat().st_size / 3
+        with pytest.raises(ValueError):
+            graph_io.save_graph(graph, str(tmp_path / "graph.mstg.gz"))
+
+    def test_binary_columns_are_views(self, tmp_path):
+        graph = self.build_graph()
+        path = str(tmp_path / "graph.mstg")
+        graph_io.write_binary(graph, path)
+
+        columns = graph_io.open_binary(path)
+
+        assert list(columns.weights) == list(graph._edge_columns.weights)
+        assert list(columns.src) == list(graph._edge_columns.src)
+        if graph_io.np is not None:
+            assert not columns.xs.flags.owndata and not columns.xs.flags.writeable
+
+    def test_binary_appends_to_existing_graph(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(graph_io, "LOAD_CHUNK_SIZE", 2)
+        path = str(tmp_path / "graph.mstg")
+        graph_io.write_binary(self.build_graph(), path)
+        graph = Graph()
+        graph.add_point(100, 100)
+
+        points, edges = graph_io.load_graph(path, graph)
+
+        assert len(points) == 5 and len(edges) == 4
+        assert all(edge.source in points and edge.dest in points for edge in edges)
+
+    def test_rejects_damaged_files(self, tmp_path):
+        path = tmp_path / "graph.mstg"
+        graph_io.write_binary(self.build_graph(), str(path))
+        data = path.read_bytes()
+
+        path.write_bytes(data[:-8])
+        with pytest.raises(ValueError):
+            graph_io.read_graph(str(path))
+        path.write_bytes(b"NOTGRAPH" + data[8:])
+        with pytest.raises(ValueError):
+            graph_io.read_graph(str(path))
+        with pytest.raises(ValueError):
+            graph_io.read_graph(str(tmp_path / "graph.txt"))
+
+    def test_streaming_reads_small_chunks(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(graph_io, "STREAM_CHUNK_BYTES", 7)
+        graph = self.build_graph()
+        path = str(tmp_path / "graph.jsonl")
+        graph_io.save_graph(graph, path)
+        reports = []
+
+        points, edges = graph_io.load_graph(path, Graph(), lambda done, total: reports.append((done, total)))
+
+        assert (len(points), len(edges)) == (5, 4)
+        assert len(reports) > 10 and reports == sorted(reports)
+        assert reports[-1][0] == reports[-1][1] == (tmp_path / "graph.jsonl").stat().st_size
+
+    def test_csv_sections(self, tmp_path):
+        path = tmp_path / "graph.csv"
+        path.write_text("x,y\n0,0\n\n3,4\n6,8\nsource_index,dest_index\n0,1\n1,2\n", encoding="utf-8")
+
+        graph = graph_io.read_graph(str(path))
+
+        assert [(point.x, point.y) for point in graph.points] == [(0, 0), (3, 4), (6, 8)]
+        assert [edge.weight for edge in graph.edges] == [1.0, 1.0]
+
+    @pytest.mark.parametrize("text", [
+        "0,1,2.0\n",
+        "index,x,y\n0,0,0\nsource_index,dest_index,weight\n0,5,1.0\n",
+        "index,x,y\n0,zero,0\n",
+        "source_index,dest_index,weight\n0.5,1,1\n",
+        "from,to\n0,1\n",
+        "index,x,y\n0,0,0\n1,1,1\n2,2,2\nsource_index,dest_index,weight\n0,1,5,2\n1,2\n",
+    ])
+    def test_csv_errors(self, tmp_path, text):
+        path = tmp_path / "graph.csv"
+        path.write_text(text, encoding="utf-8")
+
+        with pytest.raises(ValueError):
+            graph_io.read_graph(str(path))
+
+    @pytest.mark.parametrize("name, text", [
+        ("graph.csv", "index,x,y\n0,0,0\n1,5,5\n2,9,9\nsource_index,dest_index,weight\n0,1,1.0\n1,7,1.0\n"),
+        ("graph.jsonl", '{"index": 0, "x": 0, "y": 0}\n{"index": 1, "x": 5, "y": 5}\n'
+                        '{"source_index": 0, "dest_index": 1, "weight": 1.0}\n{"source_index": 1}\n'),
+    ])
+    def test_failed_load_is_rolled_back(self, tmp_path, monkeypatch, name, text):
+        monkeypatch.setattr(graph_io, "STREAM_CHUNK_BYTES", 16)
+        (tmp_path / name).write_text(text, encoding="utf-8")
+        graph = self.build_graph()
+        before = graph.to_dict()
+
+        with pytest.raises((ValueError, KeyError)):
+            graph_io.load_graph(str(tmp_path / name), graph)
+
+        assert graph.to_dict() == before
+        assert list(graph._edge_columns.src) == [edge.source._slot for edge in graph.edges]
+
+    def test_csv_without_numpy(self, tmp_path, monkeypatch):
+        graph = self.build_graph()
+        path = str(tmp_path / "graph.csv")
+        graph_io.save_graph(graph, path)
+        expected = graph_io.read_graph(path).to_dict()
+
+        monkeypatch.setattr(graph_io, "np", None)
+
+        assert graph_io.read_graph(path).to_dict() == expected
+
+    def test_dimacs_from_other_tools(self, tmp_path):
+        path = tmp_path / "road.gr"
+        path.write_text("c road network\np sp 5 4\na 1 2 7\nc arcs\na 2 3 2\n  a 3 1 4\na 4 5 1\n", encoding="ascii")
+
+        graph = graph_io.read_graph(str(path))
+
+        assert len(graph.points) == 5 and len(graph.edges) == 4
+        assert sorted(edge.weight for edge in graph.kruskal()) == [1.0, 2.0, 4.0]
+        assert len({(point.x, point.y) for point in graph.points}) == 5
+
+        path.write_text("p sp 2 1\na 1 3 1\n", encoding="ascii")
+        with pytest.raises(IndexError):
+            graph_io.read_graph(str(path))
+
+    def test_replace_with_keeps_graph_until_load_succeeds(self, tmp_path):
+        graph = self.build_graph()
+        before = graph.to_dict()
+        (tmp_path / "broken.json").write_text('{"points": [{"index": 0, "x": 1', encoding="utf-8")
+        with pytest.raises(ValueError):
+            graph_io.read_graph(str(tmp_path / "broken.json"))
+        assert graph.to_dict() == before
+
+        graph_io.write_binary(Graph.from_arrays([0, 3], [0, 4], [0], [1], [5.0]), str(tmp_path / "new.mstg"))
+        loaded = graph_io.read_graph(str(tmp_path / "new.mstg"))
+        received = []
+        graph.subscribe(lambda changed_graph, events: received.extend(event.kind for event in events))
+
+        points, edges = graph.replace_with(loaded)
+
+        assert (len(points), len(edges)) == (2, 1) and graph.points == points and loaded.points == []
+        assert received == [CLEARED, POINT_ADDED, POINT_ADDED, EDGE_ADDED]
+        assert [entry.kind for entry in graph.changes_since(graph.version - 3)] == received[1:]
+        assert graph.add_edge(points[1], graph.add_point(9, 9), 2.0).weight == 2.0
+        assert sum(edge.weight for edge in graph.kruskal()) == 7.0
+
+    def test_with_extension(self):
+        assert graph_io.with_extension("/tmp/g", graph_io.FILE_FILTERS[".mstg"]) == "/tmp/g.mstg"
+        assert graph_io.with_extension("/tmp/g.json", graph_io.FILE_FILTERS[".mstg"]) == "/tmp/g.json"
+
+    def test_cli_reads_binary_graphs(self, tmp_path):
+        graph_io.write_binary(self.build_graph(), str(tmp_path / "graph.mstg"))
+
+        row, _ = mst_cli.process_file(str(tmp_path / "graph.mstg"), ["kruskal"])
+
+        assert mst_cli.collect_files([str(tmp_path)]) == [str(tmp_path / "graph.mstg")]
+        assert row["error"] == "" and row["kruskal_weight"] == 13.0
+
+
+class TestExternalKruskal:
+    def build_graph(self, seed=5, vertex_count=300, edge_count=2000):
+        rng = random.Random(seed)
+        graph = Graph()
+        graph.add_points_bulk((rng.uniform(0, 500), rng.uniform(0, 500)) for _ in range(vertex_count))
+        graph.add_edges_bulk((rng.randrange(vertex_count), rng.randrange(vertex_count), float(rng.randint(1, 20)))
+                             for _ in range(edge_count))
+        return graph
+
+    def read_edges(self, path):
+        with open(path, encoding="utf-8") as f:
+            rows = list(csv.reader(f))
+        assert tuple(rows[0]) == graph_io.EDGE_FIELDS
+        return [(int(source), int(dest), float(weight)) for source, dest, weight in rows[1:]]
+
+    @pytest.mark.parametrize("extension", [".mstg", ".csv", ".jsonl.gz"])
+    @pytest.mark.parametrize("with_numpy", [True, False])
+    def test_matches_in_memory_kruskal(self, tmp_path, monkeypatch, extension, with_numpy):
+        if not with_numpy:
+            monkeypatch.setattr(external_mst, "np", None)
+        monkeypatch.setattr(external_mst, "MERGE_FAN_IN", 4)
+        graph = self.build_graph()
+        path = str(tmp_path / f"graph{extension}")
+        graph_io.save_graph(graph, path)
+        expected = graph.kruskal()
+        profile = Profile()
+
+        result = external_mst.external_kruskal(path, str(tmp_path / "mst.csv"),
+                                               memory_budget=40 * external_mst.BYTES_PER_BUFFERED_EDGE,
+                                               temp_dir=str(tmp_path), profile=profile)
+
+        assert result.runs == math.ceil(len(graph.edges) / 40)
+        assert profile.counters["merge_passes"] == 2
+        assert (result.vertex_count, result.edge_count) == (len(graph.points), len(graph.edges))
+        assert result.mst_edge_count == len(expected)
+        assert result.mst_weight == sum(edge.weight for edge in expected)
+        assert self.read_edges(str(tmp_path / "mst.csv")) == [
+            (edge.source.index, edge.dest.index, edge.weight) for edge in expected]
+        assert sorted(path.name for path in tmp_path.iterdir()) == [f"graph{extension}", "mst.csv"]
+
+    def test_dimacs_and_disconnected_graphs(self, tmp_path):
+        path = tmp_path / "road.gr"
+        path.write_text("p sp 6 8\na 1 2 7\na 2 1 7\na 2 3 2\na 3 2 2\na 3 1 4\na 1 3 4\na 5 6 1\na 6 5 1\n",
+                        encoding="ascii")
+
+        result = external_mst.external_kruskal(str(path), str(tmp_path / "mst.csv"), memory_budget=1024)
+
+        assert (result.vertex_count, result.mst_edge_count, result.mst_weight) == (6, 3, 7.0)
+        assert self.read_edges(str(tmp_path / "mst.csv")) == [(5, 6, 1.0), (2, 3, 2.0), (3, 1, 4.0)]
+
+    def test_rejects_bad_input(self, tmp_path):
+        graph_io.save_graph(self.build_graph(), str(tmp_path / "graph.json"))
+        with pytest.raises(ValueError):
+            external_mst.external_kruskal(str(tmp_path / "graph.json"))
+        with pytest.raises(ValueError):
+            external_mst.external_kruskal(str(tmp_path / "graph.json"), memory_budget=8)
+
+        path = tmp_path / "graph.csv"
+        path.write_text("index,x,y\n0,0,0\nsource_index,dest_index,weight\n0,7,1.0\n", encoding="utf-8")
+        with pytest.raises(ValueError):
+            external_mst.external_kruskal(str(path))
+
+    def test_cli(self, tmp_path, capsys):
+        graph = self.build_graph()
+        graph_io.save_graph(graph, str(tmp_path / "graph.csv.gz"))
+
+        code = mst_cli.main([str(tmp_path / "graph.csv.gz"), "--memory-budget", "4k",
+                             "--mst-dir", str(tmp_path / "mst"), "-q"])
+
+        rows = list(csv.DictReader(capsys.readouterr().out.splitlines()))
+        assert code == 0 and rows[0]["error"] == ""
+        assert float(rows[0]["kruskal_weight"]) == sum(edge.weight for edge in graph.kruskal())
+        assert len(self.read_edges(str(tmp_path / "mst" / "graph.mst.csv"))) == len(graph.points) - 1
+        assert mst_cli.parse_size("1.5M") == 3 * 2 ** 19
+        with pytest.raises(SystemExit):
+            mst_cli.main([str(tmp_path / "graph.csv.gz"), "--memory-budget", "1M", "-a", "prim"])
+
 
 if __name__ == "__main__":
-    pytest.main([__file__, "-v"])
\ No newline at end of file
+    pytest.main([__file__, "-v"])